@@ -0,0 +1,100 @@
+# allocator.py
+"""
+הקצאת תקציב לכל ההזדמנויות של סריקה בבת אחת.
+
+במקום להחליט על כל הזדמנות בנפרד (ולגלות באמצע שהכסף נגמר), ה-allocator מקבל
+את כל ה-batch ואת היתרה השמורה, מחשב כמות יחידות לכולם בשלב אחד לפי הדירוג
+(score מהסורק), וחותך במקום שבו התקציב הכולל נגמר.
+"""
+import logging
+from itertools import accumulate
+from typing import Dict, List, Optional
+
+from .config import PORTFOLIO_PERCENT, MIN_POSITION_USD
+
+logger = logging.getLogger(__name__)
+
+MIN_ORDER_SHARES = 5  # פולימרקט דורשים מינימום 5 יחידות בדר"כ
+MIN_ORDER_PRICE = 0.001  # הגנה נגד חלוקה באפס
+ORDER_PRICE_DECIMALS = 3  # tick של פקודה: ה-executor שולח מחירים בדיוק של 0.001
+
+
+def position_size_for(
+    balance: Optional[float],
+    portfolio_percent: float = PORTFOLIO_PERCENT,
+    min_position_usd: float = MIN_POSITION_USD
+) -> float:
+    """גודל פוזיציה לטרייד: אחוז מהתיק, לא פחות מהמינימום (בלי יתרה - המינימום)."""
+    if not balance:
+        return min_position_usd
+    return max(balance * portfolio_percent, min_position_usd)
+
+
+def allocate_batch(
+    opportunities: List[Dict],
+    position_size_usd: float,
+    budget_usd: Optional[float],
+    min_position_usd: float = MIN_POSITION_USD,
+    min_shares: int = MIN_ORDER_SHARES
+) -> List[Dict]:
+    """
+    מחזיר רשימת הקצאות {opportunity, token_id, price, shares, cost} לפי סדר הדירוג.
+    price כבר מעוגל ל-tick (זה המחיר שנשלח), וה-shares וה-cost מחושבים לפיו.
+
+    position_size_usd = גודל לטרייד (position_size_for על היתרה השמורה).
+    budget_usd = כמה כסף פנוי לכל ה-batch; None (יתרה לא ידועה) = בלי תקרה כוללת.
+    """
+    if not opportunities:
+        return []
+
+    per_trade = position_size_usd
+    ranked = sorted(opportunities, key=lambda opp: opp.get("score", 0.0), reverse=True)
+    prices = [
+        max(round(opp.get("price") or opp.get("current_price") or 0, ORDER_PRICE_DECIMALS), MIN_ORDER_PRICE)
+        for opp in ranked
+    ]
+    shares = [int(per_trade / price) for price in prices]
+    costs = [n * price for n, price in zip(shares, prices)]
+
+    # הזדמנויות שלא מגיעות למינימום יחידות לא צורכות תקציב
+    eligible = [i for i, n in enumerate(shares) if n >= min_shares]
+    if budget_usd is None:
+        cut = len(eligible)
+        budget_left = 0.0
+    else:
+        budget = max(budget_usd, 0.0)
+        cumulative = list(accumulate(costs[i] for i in eligible))
+        cut = next((k for k, total in enumerate(cumulative) if total > budget + 1e-9), len(eligible))
+        budget_left = budget - (cumulative[cut - 1] if cut else 0.0)
+
+    allocations = [
+        {
+            "opportunity": ranked[i],
+            "token_id": ranked[i]["token_id"],
+            "price": prices[i],
+            "shares": shares[i],
+            "cost": costs[i],
+        }
+        for i in eligible[:cut]
+    ]
+
+    # מה שנשאר מהתקציב הולך להזדמנות הבאה בתור, בגודל מוקטן (אם עדיין עומד במינימום)
+    if cut < len(eligible) and budget_left >= min_position_usd:
+        i = eligible[cut]
+        n = int(budget_left / prices[i])
+        if n >= min_shares:
+            allocations.append({
+                "opportunity": ranked[i],
+                "token_id": ranked[i]["token_id"],
+                "price": prices[i],
+                "shares": n,
+                "cost": n * prices[i],
+            })
+
+    skipped = len(ranked) - len(allocations)
+    if skipped:
+        logger.info(
+            f"💼 הקצאה: {len(allocations)}/{len(ranked)} הזדמנויות "
+            f"(${sum(a['cost'] for a in allocations):.2f}, ${per_trade:.2f} לטרייד) | {skipped} בלי תקציב/מתחת למינימום"
+        )
+    return allocations
@@ -0,0 +1,209 @@
+# backtest.py
+"""
+Backtest וקטורי של האסטרטגיה על היסטוריית מחירים, לסריקת רשת פרמטרים.
+
+הנתונים נשמרים כמטריצה אחת (tokens x זמן, float32, NaN איפה שאין מחיר). בתהליך
+העבודה המחירים מעוגלים חזרה לדיוק ה-tick ב-float64 - אחרת 0.002 נקרא כ-0.0020000001,
+נופל מ-threshold של 0.002 ו-int(1 / price) נותן 499 במקום 500 כמו ב-bot. כל צירוף (threshold, multiplier, min_hours, position_size) מחושב על כל ה-tokens
+בבת אחת עם NumPy, לפי אותה לוגיקה של SimpleTrader:
+
+- כניסה: הפעם הראשונה שהמחיר בין 0.0001 ל-threshold ונשארו לפחות min_hours עד הסגירה,
+  ורק אם int(position_size / price) >= 5
+- יציאה: הפעם הראשונה אחרי הכניסה שהמחיר >= מחיר כניסה * multiplier (מוכרים במחיר הזה)
+- בלי stop loss: בלי יציאה מחזיקים עד הסוף (שוק שנסגר מתיישב ל-0/1, אחרת לפי המחיר האחרון)
+- כניסה אחת לכל token (ה-bot מאפשר כניסה חוזרת רק אחרי OPPORTUNITY_COOLDOWN)
+
+צירופי (threshold, min_hours) מתחלקים בין תהליכים; כל תהליך טוען את ה-dataset פעם אחת.
+"""
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from itertools import product
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import requests
+
+from .allocator import MIN_ORDER_SHARES
+from .catalog_snapshot import parse_json_list
+from .config import CLOB_URL
+
+logger = logging.getLogger(__name__)
+
+MIN_VALID_PRICE = 0.0001  # כמו ב-verify_opportunities
+SETTLE_HIGH = 0.99        # מחיר אחרון של שוק שנסגר מעל זה = התיישב ל-1
+SETTLE_LOW = 0.01
+PRICE_DECIMALS = 4        # דיוק ה-tick הכי קטן ב-CLOB (0.0001)
+
+History = List[Tuple[int, float]]
+
+
+def _end_ts(end_date: Optional[str]) -> float:
+    try:
+        return datetime.fromisoformat(end_date.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return float("nan")
+
+
+def catalog_tokens(markets: Iterable[Dict]) -> Dict[str, float]:
+    """token_id -> endDate (unix) לכל ה-outcomes בקטלוג."""
+    tokens = {}
+    for m in markets:
+        end_ts = _end_ts(m.get("endDate"))
+        for token_id in parse_json_list(m.get("clobTokenIds")):
+            tokens[str(token_id)] = end_ts
+    return tokens
+
+
+def fetch_price_history(token_id: str, fidelity: int = 60, session: Optional[requests.Session] = None) -> History:
+    """GET /prices-history (כל התקופה, נקודה כל fidelity דקות)."""
+    http = session or requests
+    response = http.get(
+        f"{CLOB_URL}/prices-history",
+        params={"market": token_id, "interval": "max", "fidelity": fidelity},
+        timeout=15
+    )
+    response.raise_for_status()
+    return [(int(point["t"]), float(point["p"])) for point in response.json().get("history", [])]
+
+
+def fetch_histories(token_ids: Sequence[str], fidelity: int = 60, threads: int = 8) -> Dict[str, History]:
+    """מושך היסטוריה להרבה tokens במקביל. tokens שנכשלו פשוט חסרים בתוצאה."""
+    session = requests.Session()
+    histories: Dict[str, History] = {}
+
+    def fetch(token_id):
+        try:
+            return token_id, fetch_price_history(token_id, fidelity, session)
+        except Exception as e:
+            logger.debug(f"prices-history נכשל ל-{token_id[:10]}: {e}")
+            return token_id, []
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for token_id, history in pool.map(fetch, token_ids):
+            if history:
+                histories[token_id] = history
+    return histories
+
+
+def build_dataset(histories: Dict[str, History], end_ts: Dict[str, float], step: int = 3600) -> Dict[str, np.ndarray]:
+    """
+    מיישר את כל הסדרות לרשת זמן אחת (כל step שניות) עם forward-fill.
+    לפני הנקודה הראשונה ואחרי הסגירה - NaN.
+    """
+    token_ids = sorted(histories)
+    start = min(history[0][0] for history in histories.values())
+    stop = max(history[-1][0] for history in histories.values())
+    times = np.arange(start - start % step, stop + step, step, dtype=np.int64)
+    prices = np.full((len(token_ids), len(times)), np.nan, dtype=np.float32)
+
+    for row, token_id in enumerate(token_ids):
+        points = np.asarray(histories[token_id], dtype=np.float64)
+        columns = np.searchsorted(times, points[:, 0].astype(np.int64), side="right") - 1
+        prices[row, columns] = points[:, 1]
+
+    # forward-fill: לכל תא, האינדקס של התצפית האחרונה עד אליו
+    observed = ~np.isnan(prices)
+    last_seen = np.where(observed, np.arange(len(times)), 0)
+    np.maximum.accumulate(last_seen, axis=1, out=last_seen)
+    prices = np.take_along_axis(prices, last_seen, axis=1)
+    prices[np.maximum.accumulate(observed, axis=1) == 0] = np.nan
+
+    ends = np.array([end_ts.get(token_id, np.nan) for token_id in token_ids], dtype=np.float64)
+    prices[times[None, :] > ends[:, None]] = np.nan
+    return {"token_ids": np.array(token_ids), "times": times, "prices": prices, "end_ts": ends}
+
+
+def save_dataset(path, dataset: Dict[str, np.ndarray]) -> None:
+    np.savez_compressed(path, **dataset)
+
+
+def load_dataset(path) -> Dict[str, np.ndarray]:
+    with np.load(path, allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
+
+
+def final_values(dataset: Dict[str, np.ndarray]) -> np.ndarray:
+    """שווי token בלי יציאה: 0/1 לשוק שנסגר בתוך הנתונים, אחרת המחיר האחרון."""
+    prices, times, ends = dataset["prices"], dataset["times"], dataset["end_ts"]
+    observed = ~np.isnan(prices)
+    last_col = prices.shape[1] - 1 - np.argmax(observed[:, ::-1], axis=1)
+    last = prices[np.arange(len(prices)), last_col].astype(np.float64)
+    closed = ends <= times[-1]
+    settled = np.where(last >= SETTLE_HIGH, 1.0, np.where(last <= SETTLE_LOW, 0.0, last))
+    return np.where(closed, settled, np.nan_to_num(last))
+
+
+# --- ריצה בתהליכי עבודה ---
+
+_worker_data: Dict[str, np.ndarray] = {}
+
+
+def _init_worker(dataset_path: str) -> None:
+    data = load_dataset(dataset_path)
+    data["prices"] = np.round(data["prices"].astype(np.float64), PRICE_DECIMALS)
+    data["hours_left"] = ((data["end_ts"][:, None] - data["times"][None, :]) / 3600).astype(np.float32)
+    data["final"] = final_values(data)
+    _worker_data.clear()
+    _worker_data.update(data)
+
+
+def _evaluate_block(task) -> List[Dict]:
+    """כל ה-multipliers וה-sizes עבור (threshold, min_hours) אחד."""
+    threshold, min_hours, multipliers, sizes = task
+    prices = _worker_data["prices"]
+    rows = np.arange(prices.shape[0])
+    columns = np.arange(prices.shape[1])
+
+    with np.errstate(invalid="ignore"):
+        entry_mask = (prices >= MIN_VALID_PRICE) & (prices <= threshold) & (_worker_data["hours_left"] >= min_hours)
+    has_entry = entry_mask.any(axis=1)
+    entry_col = np.argmax(entry_mask, axis=1)
+    entry_price = prices[rows, entry_col].astype(np.float64)
+
+    results = []
+    for multiplier in multipliers:
+        target = entry_price * multiplier
+        with np.errstate(invalid="ignore"):
+            exit_mask = (prices >= target[:, None]) & (columns[None, :] > entry_col[:, None])
+        has_exit = exit_mask.any(axis=1) & has_entry
+        exit_col = np.argmax(exit_mask, axis=1)
+        exit_price = np.where(has_exit, prices[rows, exit_col], _worker_data["final"])
+
+        for size in sizes:
+            shares = np.floor(size / np.where(has_entry, entry_price, np.inf))
+            traded = has_entry & (shares >= MIN_ORDER_SHARES)
+            cost = np.where(traded, shares * entry_price, 0.0)
+            pnl = np.where(traded, shares * (exit_price - entry_price), 0.0)
+            trades = int(traded.sum())
+            invested = float(cost.sum())
+            results.append({
+                "threshold": threshold,
+                "multiplier": multiplier,
+                "min_hours": min_hours,
+                "position_size": size,
+                "trades": trades,
+                "exits": int((traded & has_exit).sum()),
+                "invested": round(invested, 4),
+                "pnl": round(float(pnl.sum()), 4),
+                "roi": round(float(pnl.sum()) / invested, 4) if invested else 0.0,
+                "win_rate": round(float((pnl[traded] > 0).mean()), 4) if trades else 0.0,
+            })
+    return results
+
+
+def run_sweep(dataset_path, thresholds: Sequence[float], multipliers: Sequence[float],
+              min_hours: Sequence[float], sizes: Sequence[float], workers: int = 0) -> List[Dict]:
+    """מריץ את כל הרשת. workers=0/1 = בתהליך הנוכחי."""
+    tasks = [(threshold, hours, list(multipliers), list(sizes)) for threshold, hours in product(thresholds, min_hours)]
+    started = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(str(dataset_path),)) as pool:
+            blocks = list(pool.map(_evaluate_block, tasks))
+    else:
+        _init_worker(str(dataset_path))
+        blocks = [_evaluate_block(task) for task in tasks]
+    results = [row for block in blocks for row in block]
+    logger.info(f"📈 Backtest: {len(results)} צירופים ב-{time.perf_counter() - started:.1f}s")
+    return results
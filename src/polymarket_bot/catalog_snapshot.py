@@ -0,0 +1,310 @@
+# catalog_snapshot.py
+"""
+snapshot בינארי של קטלוג השווקים, לשיתוף בין תהליכים דרך mmap.
+
+הסורק מפרסם כל קטלוג שהושלם כקובץ catalog.<version>.bin, ואז מחליף אטומית את
+קובץ המצביע catalog.latest. תהליכים אחרים (כלי דיבוג, אסטרטגיה שנייה) פותחים את
+הגרסה האחרונה בלי להעתיק אותה ובלי לפנות ל-API.
+
+פורמט (little-endian):
+    header:   magic(4) | format(u32) | version(u64) | created_at(f64) | count(u32) | strings_len(u32)
+    columns:  yes_price[f64 * n] | no_price[f64 * n] | end_ts[f64 * n]
+              yes_token[u32 * n] | no_token[u32 * n] | condition_id[u32 * n] | question[u32 * n]
+              (היסטים לטבלת המחרוזות)
+    strings:  כל מחרוזת = u16 אורך + בייטים של UTF-8
+"""
+import gzip
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"PMCS"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sIQdII")
+FLOAT_COLUMNS = ("yes_price", "no_price", "end_ts")
+STRING_COLUMNS = ("yes_token", "no_token", "condition_id", "question")
+KEEP_VERSIONS = 3
+RAW_CATALOG_FILE = "catalog_raw.jsonl.gz"
+RAW_CATALOG_INFO_FILE = "catalog_raw.info.json"
+OPPORTUNITIES_FILE = "opportunities.json"
+
+
+def snapshot_dir() -> Path:
+    return Path(os.environ.get("CATALOG_DIR", Path(os.environ.get("BOT_LOG_DIR", "logs")) / "catalog"))
+
+
+def parse_json_list(value) -> list:
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return []
+    return value or []
+
+
+def _end_ts(end_date: Optional[str]) -> float:
+    try:
+        return datetime.fromisoformat(end_date.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return float("nan")
+
+
+def _encode(markets: List[Dict], version: int) -> bytes:
+    n = len(markets)
+    floats = {name: array("d") for name in FLOAT_COLUMNS}
+    offsets = {name: array("I") for name in STRING_COLUMNS}
+    strings = bytearray()
+    interned: Dict[str, int] = {}
+
+    def add_string(value: str) -> int:
+        if value in interned:
+            return interned[value]
+        raw = value.encode("utf-8")
+        if len(raw) > 0xFFFF:  # חיתוך על גבול תו - לא באמצע רצף UTF-8
+            raw = raw[:0xFFFF].decode("utf-8", "ignore").encode("utf-8")
+        interned[value] = len(strings)
+        strings.extend(struct.pack("<H", len(raw)))
+        strings.extend(raw)
+        return interned[value]
+
+    for m in markets:
+        token_ids = parse_json_list(m.get("clobTokenIds"))
+        prices = parse_json_list(m.get("outcomePrices"))
+        try:
+            yes_price = float(prices[0]) if len(prices) > 0 else float("nan")
+            no_price = float(prices[1]) if len(prices) > 1 else float("nan")
+        except (TypeError, ValueError):
+            yes_price = no_price = float("nan")
+        floats["yes_price"].append(yes_price)
+        floats["no_price"].append(no_price)
+        floats["end_ts"].append(_end_ts(m.get("endDate")))
+        offsets["yes_token"].append(add_string(str(token_ids[0]) if len(token_ids) > 0 else ""))
+        offsets["no_token"].append(add_string(str(token_ids[1]) if len(token_ids) > 1 else ""))
+        offsets["condition_id"].append(add_string(m.get("conditionId") or ""))
+        offsets["question"].append(add_string(m.get("question") or ""))
+
+    parts = [HEADER.pack(MAGIC, FORMAT_VERSION, version, time.time(), n, len(strings))]
+    parts += [floats[name].tobytes() for name in FLOAT_COLUMNS]
+    parts += [offsets[name].tobytes() for name in STRING_COLUMNS]
+    parts.append(bytes(strings))
+    return b"".join(parts)
+
+
+def publish_snapshot(markets: List[Dict], directory: Optional[Path] = None) -> Optional[Path]:
+    """כותב snapshot חדש ומעדכן את catalog.latest אטומית. מחזיר את נתיב הקובץ."""
+    directory = Path(directory or snapshot_dir())
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        version = time.time_ns()
+        path = directory / f"catalog.{version}.bin"
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(_encode(markets, version))
+        os.replace(tmp_path, path)
+
+        # המצביע מוחלף אטומית - קוראים רואים תמיד גרסה שלמה
+        pointer_tmp = directory / "catalog.latest.tmp"
+        pointer_tmp.write_text(path.name, encoding="utf-8")
+        os.replace(pointer_tmp, directory / "catalog.latest")
+
+        _cleanup_old_versions(directory)
+        logger.info(f"🗂️ Snapshot קטלוג פורסם: {path.name} ({len(markets)} שווקים)")
+        return path
+    except OSError as e:
+        logger.warning(f"⚠️ לא הצלחתי לפרסם snapshot קטלוג: {e}")
+        return None
+
+
+def _cleanup_old_versions(directory: Path) -> None:
+    versions = sorted(directory.glob("catalog.*.bin"))
+    for old in versions[:-KEEP_VERSIONS]:
+        try:
+            old.unlink()
+        except OSError:
+            pass  # אולי עדיין ממופה אצל קורא (Windows) - יימחק בפעם הבאה
+
+
+def record_raw_catalog(markets: List[Dict], directory: Optional[Path] = None,
+                       fields: Optional[Sequence[str]] = None, source: str = "full") -> Optional[Path]:
+    """
+    שומר את ה-JSON של כל שוק (שורה לכל שוק, gzip) - בשביל שאלות שה-snapshot
+    הבינארי לא עונה עליהן: raw JSON, שיוך לאירועים, למה שוק נפסל.
+
+    fields = השדות שנשארו אם השורות מצומצמות (סריקה מפוצלת),
+    source = מאיפה הגיעו (כולל הפילטרים שרצו בצד השרת). שניהם נכתבים ל-RAW_CATALOG_INFO_FILE
+    כדי ש-inspect_catalog יגיד שההקלטה חלקית במקום להציג אותה כ-JSON מלא.
+    """
+    directory = Path(directory or snapshot_dir())
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / RAW_CATALOG_FILE
+        tmp_path = directory / (RAW_CATALOG_FILE + ".tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=1) as f:
+            for m in markets:
+                f.write(json.dumps({k: v for k, v in m.items() if k != "_received_at"}, ensure_ascii=False))
+                f.write("\n")
+        info = {
+            "recorded_at": time.time(),
+            "markets": len(markets),
+            "fields": sorted(fields) if fields else None,
+            "source": source,
+        }
+        info_tmp = directory / (RAW_CATALOG_INFO_FILE + ".tmp")
+        info_tmp.write_text(json.dumps(info, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, path)
+        os.replace(info_tmp, directory / RAW_CATALOG_INFO_FILE)
+        return path
+    except OSError as e:
+        logger.warning(f"⚠️ לא הצלחתי להקליט את הקטלוג: {e}")
+        return None
+
+
+def load_raw_catalog(directory: Optional[Path] = None, max_age: Optional[float] = None) -> Optional[List[Dict]]:
+    """טוען את הקטלוג המוקלט האחרון, או None אם אין (או שהוא ישן מ-max_age שניות)."""
+    path = Path(directory or snapshot_dir()) / RAW_CATALOG_FILE
+    try:
+        if max_age is not None and time.time() - path.stat().st_mtime > max_age:
+            return None
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except OSError:
+        return None
+
+
+def load_raw_catalog_info(directory: Optional[Path] = None) -> Optional[Dict]:
+    """המטא-דאטה של ההקלטה האחרונה (fields=None = שורות מלאות), או None להקלטה ישנה בלי קובץ כזה."""
+    try:
+        return json.loads((Path(directory or snapshot_dir()) / RAW_CATALOG_INFO_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def save_opportunities(opportunities: List[Dict], directory: Optional[Path] = None) -> Optional[Path]:
+    """
+    שומר את ההזדמנויות של הסריקה האחרונה (בשביל warm start בהפעלה הבאה).
+    timestamps הם time.monotonic של התהליך הנוכחי - לא נשמרים.
+    """
+    directory = Path(directory or snapshot_dir())
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / OPPORTUNITIES_FILE
+        tmp_path = directory / (OPPORTUNITIES_FILE + ".tmp")
+        payload = {
+            "saved_at": time.time(),
+            "opportunities": [{k: v for k, v in opp.items() if k != "timestamps"} for opp in opportunities],
+        }
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, path)
+        return path
+    except OSError as e:
+        logger.warning(f"⚠️ לא הצלחתי לשמור את ההזדמנויות: {e}")
+        return None
+
+
+def load_opportunities(max_age: float, directory: Optional[Path] = None) -> Optional[List[Dict]]:
+    """
+    ההזדמנויות השמורות, עם hours_until_close מעודכן לזמן שעבר.
+    None אם אין קובץ או שהוא ישן מ-max_age שניות.
+    """
+    path = Path(directory or snapshot_dir()) / OPPORTUNITIES_FILE
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    age = time.time() - payload.get("saved_at", 0)
+    if age > max_age:
+        return None
+    opportunities = payload.get("opportunities", [])
+    for opp in opportunities:
+        opp["hours_until_close"] = round(opp.get("hours_until_close", 0) - age / 3600, 1)
+    return opportunities
+
+
+class CatalogSnapshot:
+    """קורא snapshot דרך mmap. העמודות הן memoryviews על הקובץ עצמו (zero-copy)."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self._mmap)
+        magic, fmt, self.version, self.created_at, self.count, strings_len = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            buf.release()
+            self._mmap.close()
+            raise ValueError(f"Not a catalog snapshot: {self.path}")
+
+        n = self.count
+        pos = HEADER.size
+        self._views = []
+        self.columns: Dict[str, memoryview] = {}
+        for name in FLOAT_COLUMNS:
+            view = buf[pos:pos + 8 * n].cast("d")
+            self.columns[name] = view
+            self._views.append(view)
+            pos += 8 * n
+        for name in STRING_COLUMNS:
+            view = buf[pos:pos + 4 * n].cast("I")
+            self.columns[name] = view
+            self._views.append(view)
+            pos += 4 * n
+        self._strings = buf[pos:pos + strings_len]
+        self._views.append(self._strings)
+        self._buf = buf
+
+    @classmethod
+    def open_latest(cls, directory: Optional[Path] = None) -> Optional["CatalogSnapshot"]:
+        directory = Path(directory or snapshot_dir())
+        try:
+            name = (directory / "catalog.latest").read_text(encoding="utf-8").strip()
+            return cls(directory / name)
+        except (OSError, ValueError) as e:
+            logger.debug(f"אין snapshot קטלוג זמין: {e}")
+            return None
+
+    def string(self, offset: int) -> str:
+        (length,) = struct.unpack_from("<H", self._strings, offset)
+        return bytes(self._strings[offset + 2:offset + 2 + length]).decode("utf-8")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def row(self, i: int) -> Dict:
+        c = self.columns
+        return {
+            "question": self.string(c["question"][i]),
+            "condition_id": self.string(c["condition_id"][i]),
+            "yes_token": self.string(c["yes_token"][i]),
+            "no_token": self.string(c["no_token"][i]),
+            "yes_price": c["yes_price"][i],
+            "no_price": c["no_price"][i],
+            "end_ts": c["end_ts"][i],
+        }
+
+    def rows(self) -> Iterator[Dict]:
+        for i in range(self.count):
+            yield self.row(i)
+
+    def age_seconds(self) -> float:
+        return time.time() - self.created_at
+
+    def close(self) -> None:
+        for view in self._views:
+            view.release()
+        self._buf.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
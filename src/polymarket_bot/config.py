@@ -17,18 +17,48 @@ API_PASSPHRASE = os.getenv("POLYMARKET_API_PASSPHRASE")
 PRIVATE_KEY = os.getenv("POLYMARKET_PRIVATE_KEY")
 FUNDER_ADDRESS = os.getenv("POLYMARKET_FUNDER_ADDRESS")
 
+# Simulated exchange: OrderExecutor runs against an in-memory matching engine (no keys, no real orders)
+SIMULATED_EXCHANGE = os.getenv("SIMULATED_EXCHANGE", "false").lower() == "true"
+SIM_STARTING_BALANCE = float(os.getenv("SIM_STARTING_BALANCE", "1000"))
+SIM_LATENCY_MS = float(os.getenv("SIM_LATENCY_MS", "0"))      # per request
+SIM_FILL_RATE = float(os.getenv("SIM_FILL_RATE", "0.2"))      # taker trades/second hitting each token with a resting order
+SIM_BOOKS_FILE = os.getenv("SIM_BOOKS_FILE") or None          # recorded POST /books JSON; default: books around the recorded catalog
+SIM_SEED = int(os.environ["SIM_SEED"]) if os.getenv("SIM_SEED") else None
+SIM_RETENTION = float(os.getenv("SIM_RETENTION", "3600"))     # seconds closed orders, trades and unused synced books are kept (0 = caps only)
+
 # Validate required credentials
 required_env_vars = ["POLYMARKET_API_KEY", "POLYMARKET_API_SECRET", 
                      "POLYMARKET_API_PASSPHRASE", "POLYMARKET_PRIVATE_KEY", 
                      "POLYMARKET_FUNDER_ADDRESS"]
 missing_vars = [var for var in required_env_vars if not os.getenv(var)]
-if missing_vars:
+if missing_vars and not SIMULATED_EXCHANGE:
     error_msg = f"CRITICAL: Missing required environment variables: {', '.join(missing_vars)}"
     raise EnvironmentError(error_msg)
 
+# Extra wallets for the executor pool: the same five variables with a _2, _3, ... suffix
+# (e.g. POLYMARKET_PRIVATE_KEY_2). Each wallet gets its own client, rate limit and balance.
+WALLETS = [{
+    "name": "wallet1", "api_key": API_KEY, "api_secret": API_SECRET, "api_passphrase": API_PASSPHRASE,
+    "private_key": PRIVATE_KEY, "funder": FUNDER_ADDRESS,
+}]
+while os.getenv(f"POLYMARKET_PRIVATE_KEY_{len(WALLETS) + 1}"):
+    suffix = f"_{len(WALLETS) + 1}"
+    missing_vars = [var + suffix for var in required_env_vars if not os.getenv(var + suffix)]
+    if missing_vars and not SIMULATED_EXCHANGE:
+        raise EnvironmentError(f"CRITICAL: Missing required environment variables: {', '.join(missing_vars)}")
+    WALLETS.append({
+        "name": f"wallet{len(WALLETS) + 1}",
+        "api_key": os.getenv("POLYMARKET_API_KEY" + suffix),
+        "api_secret": os.getenv("POLYMARKET_API_SECRET" + suffix),
+        "api_passphrase": os.getenv("POLYMARKET_API_PASSPHRASE" + suffix),
+        "private_key": os.getenv("POLYMARKET_PRIVATE_KEY" + suffix),
+        "funder": os.getenv("POLYMARKET_FUNDER_ADDRESS" + suffix),
+    })
+WALLET_RATE_LIMIT = float(os.getenv("WALLET_RATE_LIMIT", "10"))  # requests/second per wallet's API key
+
 # API URLs
-GAMMA_API_URL = "https://gamma-api.polymarket.com"
-CLOB_URL = "https://clob.polymarket.com"
+GAMMA_API_URL = os.getenv("GAMMA_API_URL", "https://gamma-api.polymarket.com")
+CLOB_URL = os.getenv("CLOB_URL", "https://clob.polymarket.com")
 CLOB_WS_URL = "wss://ws-subscriptions-clob.polymarket.com/ws/market"
 
 # Blockchain Configuration
@@ -54,4 +84,37 @@ API_RATE_LIMIT_DELAY = 1
 MARKET_SCAN_INTERVAL = 3600
 ORDER_TIMEOUT = 30
 
+# Scanner Configuration
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", "0"))  # 0/1 = single process, N = sharded scan across N processes
+SCAN_FETCH_MODE = os.getenv("SCAN_FETCH_MODE", "full")  # "minimal" = market filters also sent to the server (/markets)
+SCAN_MIN_LIQUIDITY = float(os.getenv("SCAN_MIN_LIQUIDITY", "0"))
+SCAN_MIN_VOLUME = float(os.getenv("SCAN_MIN_VOLUME", "0"))
+SCAN_ORDER = os.getenv("SCAN_ORDER") or None  # e.g. "volumeNum" (descending)
+VERIFY_WITH_CLOB = os.getenv("VERIFY_WITH_CLOB", "true").lower() == "true"  # check real best ask before trading
+PUBLISH_CATALOG_SNAPSHOT = os.getenv("PUBLISH_CATALOG_SNAPSHOT", "false").lower() == "true"  # mmap snapshot in CATALOG_DIR
+RECORD_RAW_CATALOG = os.getenv("RECORD_RAW_CATALOG", "false").lower() == "true"  # gzip JSON for src/utils/inspect_catalog.py
+WARM_START = os.getenv("WARM_START", "false").lower() == "true"  # queue the last saved opportunities on startup
+WARM_START_MAX_AGE = float(os.getenv("WARM_START_MAX_AGE", "1800"))  # seconds; older snapshots are ignored
+OPPORTUNITY_COOLDOWN = float(os.getenv("OPPORTUNITY_COOLDOWN", "3600"))  # seconds before a token may be queued again
+
+# Metrics endpoint (Prometheus text format at http://METRICS_HOST:METRICS_PORT/metrics; 0 = off)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+
+# Pipeline Configuration (seconds / queue sizes / concurrency per stage)
+SCAN_INTERVAL = float(os.getenv("SCAN_INTERVAL", "300"))
+EXIT_CHECK_INTERVAL = float(os.getenv("EXIT_CHECK_INTERVAL", "30"))
+SETTLE_INTERVAL = float(os.getenv("SETTLE_INTERVAL", "600"))
+RECONCILE_INTERVAL = float(os.getenv("RECONCILE_INTERVAL", "15"))
+
+# Order Management (cancel/replace of stale resting orders)
+STALE_ORDER_MAX_AGE = float(os.getenv("STALE_ORDER_MAX_AGE", "120"))             # seconds before an order may be repriced
+STALE_ORDER_MAX_DISTANCE = float(os.getenv("STALE_ORDER_MAX_DISTANCE", "0.0005"))  # min gap to best ask that triggers cancel/replace
+STALE_ORDER_MAX_REPRICE = float(os.getenv("STALE_ORDER_MAX_REPRICE", "0.5"))    # max rise over the first order price to re-post at (taker); 0 = cancel only
+CANDIDATE_QUEUE_SIZE = int(os.getenv("CANDIDATE_QUEUE_SIZE", "500"))
+ORDER_QUEUE_SIZE = int(os.getenv("ORDER_QUEUE_SIZE", "100"))
+VERIFY_BATCH_SIZE = int(os.getenv("VERIFY_BATCH_SIZE", "100"))
+ORDER_SUBMITTERS = int(os.getenv("ORDER_SUBMITTERS", "4"))
+ORDER_BATCH_SIZE = int(os.getenv("ORDER_BATCH_SIZE", "45"))  # orders sized together and posted via POST /orders
+
 logger = logging.getLogger(__name__)
\ No newline at end of file
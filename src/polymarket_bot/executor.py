@@ -1,45 +1,80 @@
 # executor.py
 import logging
-import httpx
-from typing import Optional, Dict, Any
-from py_clob_client.client import ClobClient
-from py_clob_client.clob_types import ApiCreds, OrderArgs, OrderType
-from py_clob_client.order_builder.constants import BUY, SELL
+from typing import Optional, Dict, Any, List
+from urllib.parse import urlsplit
 from .config import (
     CLOB_URL, API_KEY, API_SECRET, API_PASSPHRASE, PRIVATE_KEY, 
-    CHAIN_ID, STOP_LOSS_PERCENT, FUNDER_ADDRESS
+    CHAIN_ID, STOP_LOSS_PERCENT, FUNDER_ADDRESS, SIMULATED_EXCHANGE
 )
+from .profiling import stage, count
+from .allocator import ORDER_PRICE_DECIMALS
+from .latency import mark
+from .metrics import api_call
 
 logger = logging.getLogger(__name__)
 
+# py_clob_client (eth_account וכו') ו-httpx נטענים רק כשצריך אותם: הייבוא לוקח
+# כמעט שנייה, ובזמן הזה הבוט כבר יכול לסרוק (OrderExecutor נבנה ב-thread)
+
+CLOB_HOST = urlsplit(CLOB_URL).netloc
+
+# מקסימום פקודות בקריאת POST /orders אחת
+MAX_BATCH_ORDERS = 15
+
+# ל-USDC יש 6 ספרות עשרוניות; get_balance_allowance מחזיר יתרה ביחידות בסיס
+USDC_DECIMALS = 6
+
 class OrderExecutor:
     """מנהל פקודות עבור ארנקי Proxy (Magic/Email) לפי שלב 4 בתיעוד."""
     
-    def __init__(self):
+    def __init__(self, client=None, wallet: Optional[Dict[str, str]] = None):
+        """
+        client = backend חלופי עם הממשק של ClobClient (למשל SimulatedClobClient).
+        wallet = סט מפתחות מ-config.WALLETS (ברירת מחדל: ה-POLYMARKET_* הראשי).
+        """
+        wallet = wallet or {}
+        self.name = wallet.get("name", "wallet1")
+        self.funder = wallet.get("funder") or FUNDER_ADDRESS
+        self.usdc_balance = 0.0
+        self.balance_is_real = False  # False = יתרת ה-demo, לא משהו שנקרא מהארנק
+        self.open_positions = {}  # מעקב אחרי פוזיציות פתוחות
         try:
+            if client is None and SIMULATED_EXCHANGE:
+                from .sim_exchange import SimulatedClobClient
+                client = SimulatedClobClient.from_config(
+                    address=f"0xSIMULATED-{self.name}" if wallet else "0xSIMULATED"
+                )
+            if client is not None:
+                self.client = client
+                logger.info(f"✅ OrderExecutor initialized with {type(client).__name__} ({client.get_address()})")
+                return
+
+            from py_clob_client.client import ClobClient
+            from py_clob_client.clob_types import ApiCreds
+
+            api_key = wallet.get("api_key", API_KEY)
+            api_secret = wallet.get("api_secret", API_SECRET)
+            api_passphrase = wallet.get("api_passphrase", API_PASSPHRASE)
             creds = ApiCreds(
-                api_key=API_KEY.strip() if API_KEY else "",
-                api_secret=API_SECRET.strip() if API_SECRET else "",
-                api_passphrase=API_PASSPHRASE.strip() if API_PASSPHRASE else ""
+                api_key=api_key.strip() if api_key else "",
+                api_secret=api_secret.strip() if api_secret else "",
+                api_passphrase=api_passphrase.strip() if api_passphrase else ""
             )
             
             # Initialize client with signature_type=1 (POLY_PROXY)
             self.client = ClobClient(
                 host=CLOB_URL,
-                key=PRIVATE_KEY,
+                key=wallet.get("private_key", PRIVATE_KEY),
                 chain_id=CHAIN_ID,
                 creds=creds,
                 signature_type=1,
-                funder=FUNDER_ADDRESS
+                funder=self.funder
             )
             
             self.client.set_api_creds(creds)
-            self.usdc_balance = 0.0
-            self._balance_is_real = False
-            self.open_positions = {}  # מעקב אחרי פוזיציות פתוחות
             
             logger.info(f"🔑 Signer Wallet: {self.client.get_address()}")
-            logger.info(f"💰 Funder Wallet (Proxy): {FUNDER_ADDRESS}")
+            logger.info(f"💰 Funder Wallet (Proxy): {self.funder}")
             logger.info("✅ OrderExecutor initialized with POLY_PROXY support")
         except Exception as e:
             logger.error(f"Failed to initialize: {e}"); raise
@@ -48,17 +83,17 @@ class OrderExecutor:
         """משיכת יתרה - מנסה מספר endpoints."""
         # ניסיון 1: שיטת הספרייה המקורית
         try:
-            result = self.client.get_balance_allowance()
-            if result and 'balance' in result:
-                self.usdc_balance = float(result['balance'])
-                logger.info(f"💰 Balance: ${self.usdc_balance:.2f} USDC")
-                self._balance_is_real = True
-                return self.usdc_balance
+            self.usdc_balance = self._clob_balance()
+            logger.info(f"💰 Balance: ${self.usdc_balance:.2f} USDC")
+            self.balance_is_real = True
+            return self.usdc_balance
         except Exception:
             pass
         
         # ניסיון 2: קריאה ישירה ל-Polygon blockchain
         try:
+            import httpx
+
             # כתובת חוזה USDC על Polygon
             usdc_contract = "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174"
             
@@ -72,12 +107,13 @@ class OrderExecutor:
                     "method": "eth_call",
                     "params": [{
                         "to": usdc_contract,
-                        "data": f"0x70a08231000000000000000000000000{FUNDER_ADDRESS[2:]}"
+                        "data": f"0x70a08231000000000000000000000000{self.funder[2:]}"
                     }, "latest"],
                     "id": 1
                 }
                 
-                resp = await http_client.post(rpc_url, json=payload, timeout=10)
+                with api_call(urlsplit(rpc_url).netloc):
+                    resp = await http_client.post(rpc_url, json=payload, timeout=10)
                 if resp.status_code == 200:
                     data = resp.json()
                     if 'result' in data:
@@ -86,37 +122,75 @@ class OrderExecutor:
                         # USDC has 6 decimals
                         self.usdc_balance = balance_wei / 1_000_000
                         logger.info(f"💰 On-chain Balance: ${self.usdc_balance:.2f} USDC")
-                        self._balance_is_real = True
+                        self.balance_is_real = True
                         return self.usdc_balance
         except Exception as e:
             logger.warning(f"⚠️ Blockchain read failed: {str(e)[:50]}")
         
-        # Fallback: demo mode
+        # Fallback: demo mode (לגודל הפוזיציה בלבד - לא יתרה אמיתית)
         logger.warning("⚠️ Using demo mode ($100)")
         self.usdc_balance = 100.0
-        self._balance_is_real = True
+        self.balance_is_real = False
         return self.usdc_balance
 
-    def execute_trade(self, token_id: str, side: str, size: float, price: float) -> Optional[Dict]:
+    def _clob_balance(self) -> float:
+        """יתרת ה-USDC (collateral) מה-CLOB, בדולרים."""
+        from py_clob_client.clob_types import AssetType, BalanceAllowanceParams
+
+        params = BalanceAllowanceParams(asset_type=AssetType.COLLATERAL)
+        with api_call(CLOB_HOST):
+            result = self.client.get_balance_allowance(params)
+        return float(result["balance"]) / 10 ** USDC_DECIMALS
+
+    def refresh_balance(self) -> Optional[float]:
+        """
+        יתרת ה-USDC מה-CLOB (get_balance_allowance), בלי fallbacks - לסבבי ה-reconcile.
+        זו היתרה הכוללת: USDC של פקודות BUY פתוחות עדיין בתוכה. None אם הקריאה נכשלה.
+        """
+        try:
+            self.usdc_balance = self._clob_balance()
+            count("requests")
+            self.balance_is_real = True
+            return self.usdc_balance
+        except Exception as e:
+            logger.warning(f"⚠️ Balance refresh failed: {str(e)[:50]}")
+            return None
+
+    def release_order(self, order_id: str) -> None:
+        """ארנק יחיד - אין ledger לשחרר (ר' ExecutorPool)."""
+
+    def release_token(self, token_id: str) -> None:
+        """ארנק יחיד - אין ledger לשחרר (ר' ExecutorPool)."""
+
+    def execute_trade(self, token_id: str, side: str, size: float, price: float,
+                      timestamps: Optional[Dict[str, float]] = None) -> Optional[Dict]:
         """ביצוע טרייד עם חתימת Proxy (מתאים למשתמשי אימייל)."""
+        from py_clob_client.clob_types import OrderArgs, OrderType
+        from py_clob_client.order_builder.constants import BUY, SELL
         try:
             order_args = OrderArgs(
                 token_id=token_id,
-                price=float(round(price, 3)),
+                price=float(round(price, ORDER_PRICE_DECIMALS)),
                 size=float(round(size, 2)),
                 side=BUY if side.lower() == 'buy' else SELL
             )
             
             # יצירת הפקודה (כאן מתבצעת החתימה עם signature_type=1)
-            signed_order = self.client.create_order(order_args)
+            with stage("sign_order"):
+                signed_order = self.client.create_order(order_args)
+            mark(timestamps, "signed")
             
             logger.info(f"🚀 Posting {side.upper()} order via Proxy for {token_id[:8]}...")
-            response = self.client.post_order(signed_order, OrderType.GTC)
+            with stage("post_order"), api_call(CLOB_HOST):
+                response = self.client.post_order(signed_order, OrderType.GTC)
+            count("orders_posted")
             
             if response and response.get('success'):
+                mark(timestamps, "acked")
                 logger.info(f"✅ SUCCESS: Order {response.get('orderID')}")
                 return response
             else:
+                count("orders_rejected")
                 error_msg = response.get('errorMsg', 'Unknown error')
                 logger.error(f"❌ Rejected: {error_msg}")
                 return None
@@ -124,6 +198,103 @@ class OrderExecutor:
             logger.error(f"❌ Execution failed: {e}")
             return None
 
+    def execute_batch(self, orders: List[Dict]) -> List[Optional[Dict]]:
+        """
+        חותם ושולח הרבה פקודות BUY (GTC) ב-POST /orders, עד MAX_BATCH_ORDERS לקריאה.
+        orders = הקצאות מ-allocate_batch. מחזיר תשובה (או None) לכל פקודה, באותו סדר.
+        """
+        from py_clob_client.clob_types import OrderArgs, OrderType, PostOrdersArgs
+        from py_clob_client.order_builder.constants import BUY
+        results: List[Optional[Dict]] = [None] * len(orders)
+        for start in range(0, len(orders), MAX_BATCH_ORDERS):
+            chunk = orders[start:start + MAX_BATCH_ORDERS]
+            try:
+                with stage("sign_order"):
+                    signed = [
+                        self.client.create_order(OrderArgs(
+                            token_id=o["token_id"],
+                            price=float(round(o["price"], ORDER_PRICE_DECIMALS)),
+                            size=float(round(o["shares"], 2)),
+                            side=BUY
+                        ))
+                        for o in chunk
+                    ]
+                for o in chunk:
+                    mark(o["opportunity"].get("timestamps"), "signed")
+
+                logger.info(f"🚀 Posting batch of {len(chunk)} BUY orders via Proxy...")
+                with stage("post_order"), api_call(CLOB_HOST):
+                    responses = self.client.post_orders(
+                        [PostOrdersArgs(order=order, orderType=OrderType.GTC) for order in signed]
+                    )
+                count("requests")
+                count("orders_posted", len(chunk))
+            except Exception as e:
+                logger.error(f"❌ Batch execution failed ({len(chunk)} orders): {e}")
+                continue
+
+            for offset, (o, response) in enumerate(zip(chunk, responses or [])):
+                if response and response.get('success'):
+                    mark(o["opportunity"].get("timestamps"), "acked")
+                    results[start + offset] = response
+                else:
+                    count("orders_rejected")
+                    error_msg = (response or {}).get('errorMsg', 'Unknown error')
+                    logger.error(f"❌ Rejected {o['token_id'][:8]}: {error_msg}")
+        return results
+
+    def fetch_open_orders(self) -> List[Dict]:
+        """כל הפקודות הפתוחות שלנו בקריאה אחת (הספרייה עוברת על כל ה-cursors)."""
+        from py_clob_client.clob_types import OpenOrderParams
+        with stage("fetch_open_orders"), api_call(CLOB_HOST):
+            orders = self.client.get_orders(OpenOrderParams())
+        count("requests")
+        return orders or []
+
+    def fetch_trades(self, after: Optional[int] = None) -> List[Dict]:
+        """כל ה-trades של הארנק מאז after (unix seconds) בקריאה אחת."""
+        from py_clob_client.clob_types import TradeParams
+        with stage("fetch_trades"), api_call(CLOB_HOST):
+            trades = self.client.get_trades(TradeParams(maker_address=self.funder, after=after))
+        count("requests")
+        return trades or []
+
+    def fetch_order(self, order_id: str) -> Optional[Dict]:
+        """פקודה אחת (GET /data/order) - גם אחרי ביטול, כדי לקרוא את size_matched הסופי. None אם נכשל."""
+        try:
+            with stage("fetch_order"), api_call(CLOB_HOST):
+                order = self.client.get_order(order_id)
+            count("requests")
+            return order or None
+        except Exception as e:
+            logger.warning(f"⚠️ Fetch order {order_id[:10]} failed: {e}")
+            return None
+
+    def cancel_orders(self, order_ids: List[str]) -> Dict:
+        """ביטול הרבה פקודות בקריאה אחת (DELETE /orders)."""
+        if not order_ids:
+            return {"canceled": [], "not_canceled": {}}
+        try:
+            with stage("cancel_orders"), api_call(CLOB_HOST):
+                result = self.client.cancel_orders(order_ids)
+            count("requests")
+            count("orders_cancelled", len(result.get("canceled", [])))
+            return result
+        except Exception as e:
+            logger.error(f"❌ Cancel failed for {len(order_ids)} orders: {e}")
+            return {"canceled": [], "not_canceled": {oid: str(e) for oid in order_ids}}
+
+    def cancel_market(self, token_id: str) -> Dict:
+        """ביטול כל הפקודות שלנו על token אחד (DELETE /cancel-market-orders)."""
+        try:
+            with stage("cancel_orders"), api_call(CLOB_HOST):
+                result = self.client.cancel_market_orders(asset_id=token_id)
+            count("requests")
+            return result
+        except Exception as e:
+            logger.error(f"❌ Cancel-market failed for {token_id[:8]}: {e}")
+            return {"canceled": [], "not_canceled": {}}
+
     def check_liquidity(self, opportunity: Dict[str, Any], shares_leg1: float, shares_leg2: float) -> Dict[str, Any]:
         """בדיקת נזילות - וידוא שיש מספיק מניות זמינות לקנייה בשני הצדדים."""
         try:
@@ -0,0 +1,330 @@
+# executor_pool.py
+"""
+מאגר של כמה ארנקים מאחורי הממשק של OrderExecutor.
+
+לכל ארנק ב-config.WALLETS יש OrderExecutor משלו (client, חתימה, funder), rate limiter
+משלו (token bucket לכל API key) ו-ledger של יתרה: כמה USDC תפוס בפקודות שנחו על הספר
+וכמה בפקודות שנשלחות עכשיו. פקודות BUY מנותבות לארנק שיכול לממן אותן ושהכי פחות עמוס
+(פקודות בדרך), ובשוויון - לזה עם הכי הרבה יתרה פנויה. כל ארנק שולח את החלק שלו
+ב-batch במקביל לאחרים, כך שהתפוקה גדלה עם מספר הארנקים.
+
+SimpleTrader / OrderTracker / OrderManager רואים executor אחד: פקודות ו-trades של כל
+הארנקים מתאחדים, ומכירה/ביטול של token הולכים לארנק שמחזיק אותו.
+
+ה-ledger משתחרר כש-OrderTracker מדווח שפקודה הגיעה למצב סופי (release_order) או שפוזיציה
+נסגרה (release_token). בנוסף, refresh_balance (בכל סבב reconcile) מושך יתרה ופקודות פתוחות
+מכל ארנק ובונה את committed מחדש מה-CLOB - כך גם ביטולים ומילויים שלא עברו דרכנו
+(ביטול ידני, פקיעה) לא משאירים USDC תפוס לתמיד.
+"""
+import asyncio
+import contextvars
+import logging
+import math
+import threading
+import time
+from collections import ChainMap
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .config import WALLETS, WALLET_RATE_LIMIT
+from .executor import OrderExecutor, MAX_BATCH_ORDERS
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """token bucket: עד rate בקשות לשנייה (burst של שנייה אחת). rate<=0 = בלי הגבלה."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n: int = 1) -> None:
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= n  # נלקח מראש - קורא הבא יחכה גם לחוב הזה
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+
+class WalletSlot:
+    """ארנק אחד במאגר: executor, rate limiter ו-ledger."""
+
+    def __init__(self, executor: OrderExecutor, rate_limit: float):
+        self.executor = executor
+        self.name = executor.name
+        self.limiter = RateLimiter(rate_limit)
+        self.balance: Optional[float] = None   # None = לא ידוע (בלי תקרה)
+        self.committed = 0.0                   # USDC בפקודות BUY שנחו על הספר
+        self.reserved = 0.0                    # USDC בפקודות שנשלחות עכשיו
+        self.inflight = 0                      # פקודות שנשלחות עכשיו
+        self.orders: Dict[str, Tuple[str, float, float]] = {}  # order_id -> (token_id, cost, recorded_at)
+
+    def available(self) -> float:
+        if self.balance is None:
+            return math.inf
+        return self.balance - self.committed - self.reserved
+
+
+class ExecutorPool:
+    def __init__(self, executors: Sequence[OrderExecutor], rate_limit: float = WALLET_RATE_LIMIT):
+        self.slots = [WalletSlot(executor, rate_limit) for executor in executors]
+        self._order_slot: Dict[str, WalletSlot] = {}
+        self._token_slot: Dict[str, WalletSlot] = {}
+        self._lock = threading.Lock()
+        self._threads = ThreadPoolExecutor(max_workers=len(self.slots), thread_name_prefix="wallet")
+        logger.info(f"👛 ExecutorPool: {len(self.slots)} ארנקים, {rate_limit:g} בקשות/שנייה לכל ארנק")
+
+    @classmethod
+    def from_config(cls) -> "ExecutorPool":
+        """executor לכל ארנק ב-WALLETS (נבנים במקביל - כל client גוזר כתובת וחותם)."""
+        with ThreadPoolExecutor(max_workers=len(WALLETS)) as threads:
+            executors = list(threads.map(lambda wallet: OrderExecutor(wallet=wallet), WALLETS))
+        return cls(executors)
+
+    # --- תצוגה מאוחדת ---
+
+    @property
+    def client(self):
+        return self.slots[0].executor.client
+
+    @property
+    def open_positions(self):
+        return ChainMap(*(slot.executor.open_positions for slot in self.slots))
+
+    def wallet_for(self, token_id: str) -> Optional[str]:
+        slot = self._token_slot.get(token_id)
+        return slot.name if slot else None
+
+    def _map(self, fn, items) -> List:
+        """fn(item) במקביל על ה-threads של הארנקים, עם ה-context של הקורא (מחזור ה-profiling)."""
+        context = contextvars.copy_context()
+        return list(self._threads.map(lambda item: context.copy().run(fn, item), items))
+
+    def _each(self, fn, requests: int = 1) -> List:
+        """fn(slot) לכל הארנקים במקביל, כל אחד דרך ה-rate limiter שלו."""
+        def call(slot):
+            slot.limiter.acquire(requests)
+            return fn(slot)
+        return self._map(call, self.slots)
+
+    # --- ledger ---
+
+    def _route(self, cost: float, prefer: Optional[WalletSlot] = None) -> Optional[WalletSlot]:
+        """הארנק שמממן את הפקודה: הכי פחות עמוס, ואז הכי הרבה יתרה פנויה. נקרא תחת self._lock."""
+        if prefer is not None and prefer.available() >= cost - 1e-9:
+            return prefer
+        affordable = [slot for slot in self.slots if slot.available() >= cost - 1e-9]
+        if not affordable:
+            return None
+        return min(affordable, key=lambda slot: (slot.inflight, -slot.available()))
+
+    def _record_order(self, slot: WalletSlot, order_id: str, token_id: str, cost: float) -> None:
+        slot.orders[order_id] = (token_id, cost, time.monotonic())
+        slot.committed += cost
+        self._order_slot[order_id] = slot
+        self._token_slot[token_id] = slot
+
+    def _release_orders(self, order_ids) -> None:
+        for order_id in order_ids:
+            slot = self._order_slot.pop(order_id, None)
+            if slot is None:
+                continue
+            _, cost, _ = slot.orders.pop(order_id, (None, 0.0, 0.0))
+            slot.committed = max(0.0, slot.committed - cost)
+
+    def _release_token(self, slot: WalletSlot, token_id: str) -> None:
+        self._release_orders([oid for oid, (token, *_) in slot.orders.items() if token == token_id])
+
+    def _rebuild_ledger(self, slot: WalletSlot, open_orders: List[Dict], started: float) -> None:
+        """
+        committed מחדש לפי הפקודות הפתוחות שה-CLOB החזיר (מה שנשאר בהן למילוי). פקודה שלא
+        הופיעה ונרשמה לפני תחילת הקריאה כבר לא על הספר. נקרא תחת self._lock.
+        """
+        live = {order.get("id"): order for order in open_orders}
+        for order_id, (token_id, cost, recorded_at) in list(slot.orders.items()):
+            order = live.get(order_id)
+            if order is not None:
+                if cost:  # SELL נרשם בלי עלות
+                    remaining = float(order.get("original_size", 0)) - float(order.get("size_matched", 0))
+                    slot.orders[order_id] = (token_id, remaining * float(order.get("price", 0)), recorded_at)
+            elif recorded_at < started:
+                slot.orders.pop(order_id)
+                self._order_slot.pop(order_id, None)
+        slot.committed = sum(cost for _, cost, _ in slot.orders.values())
+
+    def release_order(self, order_id: str) -> None:
+        """הפקודה הגיעה למצב סופי (מולאה / בוטלה / פגה) - ה-USDC שלה כבר לא תפוס."""
+        with self._lock:
+            self._release_orders([order_id])
+
+    def release_token(self, token_id: str) -> None:
+        """הפוזיציה נסגרה - משחרר את הפקודות שנשארו עליה ואת השיוך לארנק."""
+        with self._lock:
+            slot = self._token_slot.pop(token_id, None)
+            if slot is not None:
+                self._release_token(slot, token_id)
+
+    def refresh_balance(self) -> Optional[float]:
+        """יתרה + פקודות פתוחות מכל ארנק (במקביל) ובניית ה-ledger מחדש. מחזיר את סך היתרות."""
+        started = time.monotonic()
+
+        def fetch(slot):
+            balance = slot.executor.refresh_balance()
+            if balance is None:
+                return None, None
+            try:
+                return balance, slot.executor.fetch_open_orders()
+            except Exception as e:
+                logger.warning(f"⚠️ {slot.name}: קריאת פקודות פתוחות נכשלה: {str(e)[:50]}")
+                return balance, None
+
+        results = self._each(fetch, requests=2)
+        with self._lock:
+            for slot, (balance, open_orders) in zip(self.slots, results):
+                if balance is None:
+                    continue
+                slot.balance = balance
+                if open_orders is not None:
+                    self._rebuild_ledger(slot, open_orders, started)
+        known = [slot.balance for slot in self.slots if slot.balance is not None]
+        return sum(known) if known else None
+
+    # --- הממשק של OrderExecutor ---
+
+    async def get_usdc_balance(self) -> float:
+        """
+        סך היתרות (לגודל הפוזיציה). יתרת demo של ארנק שלא נקרא לא נכנסת ל-ledger שלו -
+        הוא נשאר בלי תקרה עד ש-refresh_balance יקרא יתרה אמיתית.
+        """
+        balances = await asyncio.gather(*(slot.executor.get_usdc_balance() for slot in self.slots))
+        with self._lock:
+            for slot, balance in zip(self.slots, balances):
+                slot.balance = balance if slot.executor.balance_is_real else None
+        logger.info("💰 יתרות: " + " | ".join(
+            f"{slot.name}=${balance:.2f}" + ("" if slot.executor.balance_is_real else " (demo)")
+            for slot, balance in zip(self.slots, balances)
+        ))
+        return sum(balances)
+
+    def execute_batch(self, orders: List[Dict]) -> List[Optional[Dict]]:
+        """מחלק את ה-batch בין הארנקים ושולח את כל החלקים במקביל. תשובה לכל פקודה, באותו סדר."""
+        results: List[Optional[Dict]] = [None] * len(orders)
+        groups: Dict[int, List[int]] = {}
+        with self._lock:
+            for i, o in enumerate(orders):
+                slot = self._route(o["cost"])
+                if slot is None:
+                    logger.warning(f"⚠️ אין ארנק עם ${o['cost']:.2f} פנויים ל-{o['token_id'][:8]}")
+                    continue
+                slot.reserved += o["cost"]
+                slot.inflight += 1
+                groups.setdefault(self.slots.index(slot), []).append(i)
+
+        def post(slot_index: int) -> List[Optional[Dict]]:
+            slot = self.slots[slot_index]
+            chunk = [orders[i] for i in groups[slot_index]]
+            slot.limiter.acquire(math.ceil(len(chunk) / MAX_BATCH_ORDERS))
+            return slot.executor.execute_batch(chunk)
+
+        indices = list(groups)
+        for slot_index, responses in zip(indices, self._map(post, indices)):
+            slot = self.slots[slot_index]
+            with self._lock:
+                for i, response in zip(groups[slot_index], responses):
+                    o = orders[i]
+                    slot.reserved -= o["cost"]
+                    slot.inflight -= 1
+                    if response and response.get("success"):
+                        self._record_order(slot, response.get("orderID"), o["token_id"], o["cost"])
+                        results[i] = dict(response, wallet=slot.name)
+        if len(groups) > 1:
+            logger.info("👛 batch חולק: " + ", ".join(
+                f"{self.slots[i].name}={len(members)}" for i, members in groups.items()
+            ))
+        return results
+
+    def execute_trade(self, token_id: str, side: str, size: float, price: float,
+                      timestamps: Optional[Dict[str, float]] = None) -> Optional[Dict]:
+        """מכירה הולכת לארנק שמחזיק את ה-token; קנייה (החלפת פקודה) - אליו אם יש לו יתרה."""
+        buy = side.lower() == "buy"
+        cost = size * price
+        with self._lock:
+            owner = self._token_slot.get(token_id)
+            slot = self._route(cost, prefer=owner) if buy else (owner or self.slots[0])
+            if slot is None:
+                logger.warning(f"⚠️ אין ארנק עם ${cost:.2f} פנויים ל-{token_id[:8]}")
+                return None
+            if buy:
+                slot.reserved += cost
+        slot.limiter.acquire()
+        response = slot.executor.execute_trade(token_id, side, size, price, timestamps=timestamps)
+        with self._lock:
+            if buy:
+                slot.reserved -= cost
+            if response and response.get("success"):
+                if not buy:
+                    # ה-BUY של ה-token כבר לא מחזיק USDC; ה-token נשאר משויך לארנק עד שה-SELL מתמלא
+                    self._release_token(slot, token_id)
+                self._record_order(slot, response.get("orderID"), token_id, cost if buy else 0.0)
+                return dict(response, wallet=slot.name)
+        return response
+
+    def fetch_open_orders(self) -> List[Dict]:
+        return [order for orders in self._each(lambda slot: slot.executor.fetch_open_orders()) for order in orders]
+
+    def fetch_trades(self, after: Optional[int] = None) -> List[Dict]:
+        return [trade for trades in self._each(lambda slot: slot.executor.fetch_trades(after=after)) for trade in trades]
+
+    def fetch_order(self, order_id: str) -> Optional[Dict]:
+        """מהארנק של הפקודה; אחרי ביטול היא כבר לא ב-ledger - שואלים את כולם."""
+        slot = self._order_slot.get(order_id)
+        if slot is not None:
+            slot.limiter.acquire()
+            return slot.executor.fetch_order(order_id)
+        return next((order for order in self._each(lambda slot: slot.executor.fetch_order(order_id)) if order), None)
+
+    def cancel_orders(self, order_ids: List[str]) -> Dict:
+        """כל ארנק מבטל את הפקודות שלו (order id לא מוכר - אצל הארנק הראשון)."""
+        if not order_ids:
+            return {"canceled": [], "not_canceled": {}}
+        by_slot: Dict[int, List[str]] = {}
+        for order_id in order_ids:
+            slot = self._order_slot.get(order_id, self.slots[0])
+            by_slot.setdefault(self.slots.index(slot), []).append(order_id)
+
+        def cancel(slot_index: int) -> Dict:
+            slot = self.slots[slot_index]
+            slot.limiter.acquire()
+            return slot.executor.cancel_orders(by_slot[slot_index])
+
+        merged = {"canceled": [], "not_canceled": {}}
+        for result in self._map(cancel, list(by_slot)):
+            merged["canceled"].extend(result.get("canceled", []))
+            merged["not_canceled"].update(result.get("not_canceled", {}))
+        with self._lock:
+            self._release_orders(merged["canceled"])
+        return merged
+
+    def cancel_market(self, token_id: str) -> Dict:
+        owner = self._token_slot.get(token_id)
+        slots = [owner] if owner else self.slots
+        merged = {"canceled": [], "not_canceled": {}}
+        for slot in slots:
+            slot.limiter.acquire()
+            result = slot.executor.cancel_market(token_id)
+            merged["canceled"].extend(result.get("canceled", []))
+            merged["not_canceled"].update(result.get("not_canceled", {}))
+        with self._lock:
+            self._release_orders(merged["canceled"])
+        return merged
+
+    async def check_and_settle_positions(self) -> None:
+        await asyncio.gather(*(slot.executor.check_and_settle_positions() for slot in self.slots))
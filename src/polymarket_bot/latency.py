@@ -0,0 +1,100 @@
+# latency.py
+"""
+מדידת tick-to-trade: מהרגע שמחיר נראה בתשובת ה-API ועד שהפקודה שלנו על הספר.
+
+כל הזדמנות נושאת dict של חותמות זמן monotonic תחת "timestamps":
+    received -> filtered -> (verified) -> decided -> signed -> acked
+"""
+import json
+import logging
+import os
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# (שם המקטע, מ-, עד-)
+SEGMENTS = (
+    ("filter", "received", "filtered"),
+    ("verify", "filtered", "verified"),
+    ("decide", "filtered", "decided"),
+    ("sign", "decided", "signed"),
+    ("post", "signed", "acked"),
+    ("tick_to_trade", "received", "acked"),
+)
+
+
+def mark(timestamps: Optional[Dict[str, float]], stage_name: str) -> None:
+    """רושם חותמת זמן monotonic לשלב (אם יש dict חותמות)."""
+    if timestamps is not None:
+        timestamps[stage_name] = time.monotonic()
+
+
+def _percentile(sorted_values, pct: float) -> float:
+    idx = min(len(sorted_values) - 1, int(len(sorted_values) * pct))
+    return sorted_values[idx]
+
+
+class LatencyTracker:
+    """היסטוגרמות latency בזיכרון (חלון של הדגימות האחרונות לכל מקטע)."""
+
+    def __init__(self, max_samples: int = 2048, export_interval: float = 300.0):
+        self.samples: Dict[str, Deque[float]] = {
+            name: deque(maxlen=max_samples) for name, _, _ in SEGMENTS
+        }
+        self.export_interval = export_interval
+        self._last_export = time.monotonic()
+
+    def record(self, timestamps: Optional[Dict[str, float]]) -> None:
+        """מוסיף את כל המקטעים ששני הקצוות שלהם נמדדו."""
+        if not timestamps:
+            return
+        for name, start, end in SEGMENTS:
+            if start in timestamps and end in timestamps:
+                self.samples[name].append(timestamps[end] - timestamps[start])
+
+    def percentiles(self) -> Dict[str, Dict[str, float]]:
+        """p50/p95/p99 במילישניות לכל מקטע שיש לו דגימות."""
+        result = {}
+        for name, values in self.samples.items():
+            if not values:
+                continue
+            ordered = sorted(values)
+            result[name] = {
+                "count": len(ordered),
+                "p50_ms": round(_percentile(ordered, 0.50) * 1000, 1),
+                "p95_ms": round(_percentile(ordered, 0.95) * 1000, 1),
+                "p99_ms": round(_percentile(ordered, 0.99) * 1000, 1),
+            }
+        return result
+
+    def export(self) -> Dict[str, Dict[str, float]]:
+        """מדפיס שורת סיכום ושומר latency.json בתיקיית הלוגים."""
+        self._last_export = time.monotonic()
+        snapshot = self.percentiles()
+        if not snapshot:
+            return snapshot
+
+        parts = [
+            f"{name} p50={s['p50_ms']}ms p95={s['p95_ms']}ms p99={s['p99_ms']}ms (n={s['count']})"
+            for name, s in snapshot.items()
+        ]
+        logger.info(f"⚡ Latency | {' | '.join(parts)}")
+
+        try:
+            log_dir = Path(os.environ.get('BOT_LOG_DIR', 'logs'))
+            log_dir.mkdir(exist_ok=True)
+            with open(log_dir / "latency.json", "w", encoding="utf-8") as f:
+                json.dump({"exported_at": time.time(), "segments": snapshot}, f, indent=2)
+        except OSError as e:
+            logger.warning(f"⚠️ לא הצלחתי לשמור latency.json: {e}")
+        return snapshot
+
+    def maybe_export(self) -> None:
+        if time.monotonic() - self._last_export >= self.export_interval:
+            self.export()
+
+
+latency_tracker = LatencyTracker()
@@ -0,0 +1,262 @@
+# metrics.py
+"""
+רישום מדדים בתוך התהליך (counters / gauges / histograms) ו-endpoint מקומי
+בפורמט הטקסט של Prometheus (METRICS_PORT, GET /metrics).
+
+עדכון מדד זול מספיק ללולאות חמות: labels() מחזיר child שמור (פעם אחת לכל צירוף
+labels), ו-inc/observe הם כמה פעולות אריתמטיות תחת lock של ה-child.
+
+    REJECTIONS.labels("inactive").inc()
+    with api_call(GAMMA_HOST): requests.get(...)
+
+כל count() של profiling נרשם גם כ-counter בשם polybot_<name>_total, וכל stage()
+כ-histogram ב-polybot_stage_seconds - כך שהמדידות הקיימות מגיעות ל-endpoint בלי קוד נוסף.
+"""
+import bisect
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# שניות - מ-request מקומי ועד סריקה מלאה
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Value:
+    """ערך של counter/gauge עבור צירוף labels אחד."""
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, n: float = 1.0) -> None:
+        with self._lock:
+            self.value += n
+
+    def dec(self, n: float = 1.0) -> None:
+        with self._lock:
+            self.value -= n
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _Buckets:
+    """ערך של histogram עבור צירוף labels אחד (מונה לכל bucket, לא מצטבר)."""
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # האחרון = +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0)
+
+
+class Metric:
+    def __init__(self, name: str, help_text: str, kind: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        self._function: Optional[Callable[[], float]] = None
+
+    def labels(self, *values):
+        child = self._children.get(values)  # המקרה הנפוץ: labels שכבר נראו, כמחרוזות
+        if child is not None:
+            return child
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(
+                    key, _Buckets(self.buckets) if self.kind == "histogram" else _Value()
+                )
+        return child
+
+    # קיצורים למדד בלי labels
+    def inc(self, n: float = 1.0) -> None:
+        self.labels().inc(n)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        """gauge שמחושב רק בזמן scrape (בלי עלות בזמן ריצה)."""
+        self._function = fn
+
+    def _label_text(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        if self._function is not None:
+            try:
+                lines.append(f"{self.name} {_format_value(self._function())}")
+            except Exception as e:
+                logger.debug(f"metric {self.name} נכשל: {e}")
+            return lines
+        with self._lock:
+            children = sorted(self._children.items())
+        for key, child in children:
+            if self.kind != "histogram":
+                lines.append(f"{self.name}{self._label_text(key)} {_format_value(child.value)}")
+                continue
+            with child._lock:
+                counts, total, n = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{self._label_text(key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{self._label_text(key)} {n}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, name: str, help_text: str, kind: str, labelnames: Sequence[str], **kwargs) -> Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Metric(name, help_text, kind, labelnames, **kwargs)
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Metric:
+        return self._register(name, help_text, "counter", labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Metric:
+        return self._register(name, help_text, "gauge", labelnames)
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Metric:
+        return self._register(name, help_text, "histogram", labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+registry = MetricsRegistry()
+
+# --- המדדים של הבוט ---
+
+SCAN_DURATION = registry.histogram("polybot_scan_duration_seconds", "Full scan cycle duration",
+                                   buckets=(1, 2.5, 5, 10, 20, 30, 60, 120, 300))
+MARKETS_BY_STAGE = registry.gauge("polybot_scan_markets", "Markets left after each filter stage (last scan)", ["stage"])
+REJECTIONS = registry.counter("polybot_scan_rejections_total", "Markets rejected by the scanner, by reason", ["reason"])
+OPPORTUNITIES = registry.gauge("polybot_scan_opportunities", "Opportunities returned by the last scan")
+OPEN_POSITIONS = registry.gauge("polybot_open_positions", "Positions tracked by the trader")
+QUEUE_DEPTH = registry.gauge("polybot_queue_depth", "Items waiting between pipeline stages", ["queue"])
+STAGE_SECONDS = registry.histogram("polybot_stage_seconds", "Time spent per profiling stage", ["stage"])
+API_LATENCY = registry.histogram("polybot_api_latency_seconds", "HTTP/API call latency per host", ["host"])
+API_REQUESTS = registry.counter("polybot_api_requests_total", "HTTP/API calls per host", ["host"])
+API_ERRORS = registry.counter("polybot_api_errors_total", "Failed HTTP/API calls per host", ["host"])
+
+_event_counters: Dict[str, _Value] = {}
+
+
+def count_event(name: str, n: int = 1) -> None:
+    """polybot_<name>_total - נקרא מ-profiling.count."""
+    counter = _event_counters.get(name)
+    if counter is None:
+        counter = _event_counters[name] = registry.counter(f"polybot_{name}_total", f"profiling counter '{name}'").labels()
+    counter.inc(n)
+
+
+@contextmanager
+def api_call(host: str) -> Iterator[None]:
+    """מודד קריאת API: latency, מספר קריאות ושגיאות (חריגה) לכל host."""
+    t0 = time.perf_counter()
+    API_REQUESTS.labels(host).inc()
+    try:
+        yield
+    except Exception:
+        API_ERRORS.labels(host).inc()
+        raise
+    finally:
+        API_LATENCY.labels(host).observe(time.perf_counter() - t0)
+
+
+# --- endpoint ---
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # בלי שורת לוג לכל scrape
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> Optional[ThreadingHTTPServer]:
+    """מפעיל את ה-endpoint ב-thread ברקע. port=0 = כבוי."""
+    if not port:
+        return None
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        logger.warning(f"⚠️ לא הצלחתי להפעיל metrics על {host}:{port}: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.info(f"📡 Metrics: http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,97 @@
+# opportunity_stream.py
+"""
+זרם שינויים של הזדמנויות בין סריקות.
+
+במקום set קבוע של כל ה-tokens שאי פעם נראו, שומרים רק את ההזדמנויות של הסריקה
+הקודמת (token -> hash של מחיר/צד/שוק) ומחזירים diff: נוספו / נעלמו / מחיר השתנה.
+ה-bot מגיב רק לשינויים, והזיכרון חסום בגודל סריקה אחת + tokens שעדיין ב-cooldown.
+
+cooldown: token שנכנס לתור לא ייכנס שוב לפני שעברו cooldown שניות - כך token
+שיצא ונכנס מתחת ל-threshold יכול להיסחר שוב, אבל לא בכל סריקה. הזדמנות שלא השתנתה
+ושה-cooldown שלה עבר (האימות דחה אותה / הפקודה בוטלה) חוזרת ב-diff.due לבדיקה נוספת.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .config import OPPORTUNITY_COOLDOWN
+
+
+def fingerprint(opp: Dict) -> int:
+    """hash של השדות שמשנים החלטה (hours_until_close זז בכל סריקה - לא נכלל)."""
+    return hash((opp["price"], opp.get("side"), opp.get("condition_id")))
+
+
+@dataclass
+class OpportunityDiff:
+    added: List[Dict] = field(default_factory=list)
+    removed: List[Dict] = field(default_factory=list)
+    repriced: List[Dict] = field(default_factory=list)
+    unchanged: int = 0
+    due: List[Dict] = field(default_factory=list)  # מתוך unchanged: לא בתור ולא ב-cooldown
+
+    def changed(self) -> List[Dict]:
+        """הזדמנויות שצריך לבדוק מחדש (חדשות + מחיר השתנה)."""
+        return self.added + self.repriced
+
+    def to_check(self) -> List[Dict]:
+        """מה שנכנס לתור האימות: השינויים + הזדמנויות ישנות שה-cooldown שלהן עבר."""
+        return self.changed() + self.due
+
+    def summary(self) -> str:
+        return f"+{len(self.added)} -{len(self.removed)} ~{len(self.repriced)} ={self.unchanged} ↻{len(self.due)}"
+
+
+class OpportunityStream:
+    def __init__(self, cooldown: float = OPPORTUNITY_COOLDOWN):
+        self.cooldown = cooldown
+        self._previous: Dict[str, Tuple[int, Dict]] = {}  # token -> (fingerprint, הזדמנות)
+        self._queued_at: Dict[str, float] = {}            # token -> מתי נכנס לתור (monotonic)
+
+    def __len__(self) -> int:
+        return len(self._previous)
+
+    def update(self, opportunities: Iterable[Dict], now: Optional[float] = None) -> OpportunityDiff:
+        """מחליף את הסט הקודם בסריקה הנוכחית ומחזיר מה השתנה."""
+        self._expire(time.monotonic() if now is None else now)
+        diff = OpportunityDiff()
+        previous = self._previous
+        current: Dict[str, Tuple[int, Dict]] = {}
+        for opp in opportunities:
+            token_id = opp["token_id"]
+            fp = fingerprint(opp)
+            current[token_id] = (fp, opp)
+            before = previous.get(token_id)
+            if before is None:
+                diff.added.append(opp)
+            elif before[0] != fp:
+                diff.repriced.append(opp)
+            else:
+                diff.unchanged += 1
+                if token_id not in self._queued_at:
+                    diff.due.append(opp)
+        diff.removed = [opp for token_id, (_, opp) in previous.items() if token_id not in current]
+        self._previous = current
+        return diff
+
+    def ready(self, token_id: str, now: Optional[float] = None) -> bool:
+        """מותר להכניס לתור (לא נכנס, או שעבר ה-cooldown)."""
+        queued_at = self._queued_at.get(token_id)
+        if queued_at is None:
+            return True
+        return (time.monotonic() if now is None else now) - queued_at >= self.cooldown
+
+    def mark_queued(self, token_id: str, now: Optional[float] = None) -> None:
+        self._queued_at[token_id] = time.monotonic() if now is None else now
+
+    def forget(self, token_id: str) -> None:
+        """ההזדמנות לא נכנסה לתור (backpressure) - בסריקה הבאה היא תופיע שוב כחדשה."""
+        self._previous.pop(token_id, None)
+
+    def cooling_down(self) -> int:
+        return len(self._queued_at)
+
+    def _expire(self, now: float) -> None:
+        expired = [token_id for token_id, queued_at in self._queued_at.items() if now - queued_at >= self.cooldown]
+        for token_id in expired:
+            del self._queued_at[token_id]
@@ -0,0 +1,132 @@
+# order_manager.py
+"""
+ניהול פקודות נחות: ביטול והחלפה של פקודות ישנות שהמחיר כבר ברח מהן.
+
+פקודות GTC שנשלחו במחיר Gamma שכבר זז סתם נחות על הספר ותופסות USDC.
+ה-manager עובר על כל הפקודות הנחות של ה-trader, משווה אותן ל-best ask הנוכחי,
+מבטל ב-bulk (cancel-many / cancel-market) ושולח מחדש במחיר הנוכחי אם הוא עדיין מתחת ל-threshold.
+
+מדיניות המחיר: הפקודה החדשה נשלחת ב-best ask עצמו, כלומר היא חוצה את ה-spread ולוקחת
+נזילות (taker) - משלמים את ה-ask במקום לחכות על ה-bid. כדי שזה לא ירדוף אחרי מחיר שברח,
+ה-ask מותר עד max_reprice (חלק יחסי) מעל מחיר הפקודה הראשונה של הפוזיציה; מעל זה
+הפקודה רק מבוטלת (max_reprice=0 = בלי החלפות בכלל).
+
+בין ה-reconcile לביטול הפקודה יכולה להתמלא עוד; לכן אחרי הביטול קוראים שוב את
+הפקודה (get_order -> size_matched) ורק אז מחשבים כמה נשאר לשלוח מחדש.
+"""
+import logging
+import time
+from typing import Dict, List
+
+from .allocator import ORDER_PRICE_DECIMALS
+from .order_tracker import update_filled
+
+logger = logging.getLogger(__name__)
+
+
+class OrderManager:
+    def __init__(self, executor, trader, verifier, low_price_threshold: float,
+                 max_age: float = 120.0, max_distance: float = 0.0005, max_reprice: float = 0.5):
+        self.executor = executor
+        self.trader = trader
+        self.verifier = verifier
+        self.low_price_threshold = low_price_threshold
+        self.max_age = max_age            # שניות עד שפקודה נחשבת ישנה
+        self.max_distance = max_distance  # מרחק מינימלי (במחיר) בין הפקודה שלנו ל-best ask כדי להחליף
+        self.max_reprice = max_reprice    # עלייה יחסית מקסימלית מעל מחיר הפקודה הראשונה
+
+    def _is_stale(self, pos: Dict, now: float) -> bool:
+        return bool(
+            pos.get("order_id")
+            and pos.get("status") in ("open", "partial")
+            and now - pos.get("placed_at", now) >= self.max_age
+        )
+
+    def run(self) -> Dict[str, int]:
+        """
+        סבב אחד. כדאי להריץ מיד אחרי OrderTracker.reconcile כדי שמילויים
+        שקרו לפני הביטול כבר ייספרו. הפוזיציות נתפסות (claim) לכל הסבב - check_exit
+        לא נוגע בהן באמצע ביטול/החלפה, ומה שהוא כבר תפס מחכה לסבב הבא.
+        """
+        now = time.time()
+        candidates = [token_id for token_id, pos in self.trader.positions() if self._is_stale(pos, now)]
+        if not candidates:
+            return {}
+        with self.trader.claim(candidates) as claimed:
+            # בין ה-snapshot ל-claim הפוזיציה יכלה לעבור ל-exiting / להיסגר
+            stale = {token_id: pos for token_id, pos in claimed.items() if self._is_stale(pos, now)}
+            if not stale:
+                return {}
+            return self._manage(stale)
+
+    def _manage(self, stale: Dict[str, Dict]) -> Dict[str, int]:
+        quotes = self.verifier.get_quotes(stale.keys())
+        to_cancel: List[str] = []       # order ids -> cancel-many
+        dead_markets: List[str] = []    # הספר חזר בלי asks -> cancel-market לכל ה-asset
+        to_reprice: Dict[str, float] = {}
+        unquoted = 0
+
+        for token_id, pos in stale.items():
+            if token_id not in quotes:
+                unquoted += 1  # הקריאה נכשלה - לא יודעים כלום על הספר, ננסה בסבב הבא
+                continue
+            best_bid, best_ask = quotes[token_id]
+            if best_ask is None:
+                dead_markets.append(token_id)
+                continue
+            if best_ask - pos.get("order_price", pos["entry_price"]) < self.max_distance:
+                continue  # עדיין קרוב לספר - משאירים
+            to_cancel.append(pos["order_id"])
+            base_price = pos.get("first_order_price", pos.get("order_price", pos["entry_price"]))
+            if 0.0001 <= best_ask <= min(self.low_price_threshold, base_price * (1 + self.max_reprice)):
+                to_reprice[token_id] = round(best_ask, ORDER_PRICE_DECIMALS)
+
+        cancelled = set()
+        if to_cancel:
+            result = self.executor.cancel_orders(to_cancel)
+            cancelled = set(result.get("canceled", []))
+        for token_id in dead_markets:
+            # רק מה שה-CLOB אישר שבוטל; פקודה שהביטול שלה נכשל עדיין נחה על הספר
+            cancelled.update(self.executor.cancel_market(token_id).get("canceled", []))
+
+        reposted = 0
+        for token_id, pos in stale.items():
+            if pos["order_id"] not in cancelled:
+                continue
+            # מה שהתמלא עד רגע הביטול (אם הקריאה נכשלה - נשארים עם מה שה-reconcile ראה)
+            update_filled(pos, self.executor.fetch_order(pos["order_id"]))
+            remaining = pos["shares"] - pos.get("filled_shares", 0)
+            if token_id in to_reprice and remaining >= 5:
+                new_price = to_reprice[token_id]
+                order_result = self.executor.execute_trade(
+                    token_id=token_id, side="BUY", size=remaining, price=new_price
+                )
+                if order_result and order_result.get("success"):
+                    pos.setdefault("first_order_price", pos.get("order_price", pos["entry_price"]))
+                    pos["prior_filled"] = pos.get("filled_shares", 0)
+                    pos["order_trade_filled"] = 0
+                    pos["order_size_matched"] = 0
+                    pos["order_id"] = order_result.get("orderID")
+                    pos["order_price"] = new_price
+                    pos["placed_at"] = time.time()
+                    pos["status"] = "partial" if pos.get("filled_shares", 0) > 0 else "open"
+                    if not pos.get("avg_fill_price"):
+                        pos["entry_price"] = new_price
+                        pos["target_price"] = new_price * self.trader.target_multiplier
+                    reposted += 1
+                    continue
+            self._close_order(token_id, pos)
+
+        logger.info(
+            f"♻️ ניהול פקודות: {len(stale)} ישנות | בוטלו={len(cancelled)} "
+            f"הוחלפו={reposted} שווקים מתים={len(dead_markets)} בלי מחיר={unquoted}"
+        )
+        return {"stale": len(stale), "cancelled": len(cancelled), "reposted": reposted, "unquoted": unquoted}
+
+    def _close_order(self, token_id: str, pos: Dict) -> None:
+        """הפקודה בוטלה ולא הוחלפה: שומרים רק את מה שמולא, או מוחקים."""
+        if pos.get("filled_shares", 0) > 0:
+            pos["shares"] = pos["filled_shares"]
+            pos["status"] = "filled"
+        else:
+            self.trader.remove_position(token_id)
@@ -0,0 +1,209 @@
+# order_tracker.py
+"""
+התאמת מצב פקודות מול ה-CLOB.
+
+post_order שמחזיר success אומר רק שהפקודה (GTC) נחה על הספר, לא שהיא בוצעה.
+ה-tracker מושך את כל הפקודות הפתוחות וכל ה-trades האחרונים שלנו בכמה קריאות bulk
+(מספר קבוע של בקשות, לא בקשה לכל פקודה) ומעדכן את open_positions של ה-trader:
+filled_shares, avg_fill_price ו-status (open / partial / filled / cancelled).
+
+גם פקודות SELL של יציאה (status=exiting) נעקבות: כשה-SELL התמלא במלואו הפוזיציה נמחקת;
+אם הוא ירד מהספר עם מילוי חלקי - מה שנמכר יורד מהפוזיציה והיא חוזרת ל-filled לניסיון נוסף.
+
+ה-reconcile רץ ב-thread ותופס (trader.claim) את הפוזיציות שהוא מתאים לכל הסבב. פוזיציה
+ש-check_exit באמצע לטפל בה מדלגת לסבב הבא, וה-trades שלה לא נשכחים: חלון ה-trades לא
+מתקדם וה-trade נזכר רק כשהוא נספר לפקודה.
+"""
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# פקודה שנשלחה הרגע עוד לא תמיד מופיעה ב-get_orders - לא מסיקים ביטול לפני זה
+MISSING_ORDER_GRACE = 30.0
+# כמה trade ids לזכור כדי לא לספור מילוי פעמיים
+MAX_SEEN_TRADES = 20_000
+
+
+def update_filled(pos: Dict, order: Optional[Dict] = None) -> float:
+    """
+    filled_shares של פוזיציה: prior_filled (פקודות קודמות שלה, לפני cancel/replace) + מילוי
+    הפקודה הנוכחית - size_matched של ה-CLOB או סכום ה-trades, מה שהתעדכן קודם.
+    order = הפקודה כפי שה-CLOB מחזיר אותה (get_orders / get_order), אם יש.
+    """
+    if order is not None:
+        pos["order_size_matched"] = float(order.get("size_matched", 0))
+    current_filled = max(pos.get("order_trade_filled", 0), pos.get("order_size_matched", 0))
+    pos["filled_shares"] = pos.get("prior_filled", 0) + current_filled
+    return pos["filled_shares"]
+
+
+class OrderTracker:
+    def __init__(self, executor, trader):
+        self.executor = executor
+        self.trader = trader
+        self._seen_trades: Set[str] = set()
+        self._seen_trades_order: Deque[str] = deque()
+        self._last_reconcile = 0.0
+
+    def _remember_trade(self, trade_id: str) -> bool:
+        """מחזיר False אם ה-trade כבר נספר."""
+        if trade_id in self._seen_trades:
+            return False
+        self._seen_trades.add(trade_id)
+        self._seen_trades_order.append(trade_id)
+        if len(self._seen_trades_order) > MAX_SEEN_TRADES:
+            self._seen_trades.discard(self._seen_trades_order.popleft())
+        return True
+
+    def _collect_fills(self, trades, tracked: Dict[str, Dict]) -> Dict[str, list]:
+        """order_id -> [(size, price), ...] מתוך trades שבהם הפקודה שלנו השתתפה (taker או maker)."""
+        fills: Dict[str, list] = {}
+        for trade in trades:
+            trade_id = trade.get("id")
+            if not trade_id or trade_id in self._seen_trades:
+                continue
+            matched = []
+            taker_order_id = trade.get("taker_order_id")
+            if taker_order_id in tracked:
+                matched.append((taker_order_id, float(trade.get("size", 0)), float(trade.get("price", 0))))
+            for maker_order in trade.get("maker_orders", []):
+                order_id = maker_order.get("order_id")
+                if order_id in tracked:
+                    matched.append(
+                        (order_id, float(maker_order.get("matched_amount", 0)), float(maker_order.get("price", 0)))
+                    )
+            # trade של פקודה שלא נעקבת בסבב הזה (פוזיציה תפוסה) יישאר לסבב הבא
+            if matched:
+                self._remember_trade(trade_id)
+            for order_id, size, price in matched:
+                fills.setdefault(order_id, []).append((size, price))
+        return fills
+
+    @staticmethod
+    def _has_live_order(pos: Dict) -> bool:
+        if pos.get("status") == "exiting":
+            return bool(pos.get("exit_order_id"))
+        return bool(pos.get("order_id")) and pos.get("status") in ("open", "partial")
+
+    def reconcile(self) -> Dict[str, int]:
+        """סבב התאמה אחד. מחזיר ספירה של הפוזיציות לפי סטטוס."""
+        candidates = [token_id for token_id, pos in self.trader.positions() if self._has_live_order(pos)]
+        if not candidates:
+            return {}
+        with self.trader.claim(candidates) as positions:
+            return self._reconcile(positions, busy=len(candidates) - len(positions))
+
+    def _reconcile(self, positions: Dict[str, Dict], busy: int) -> Dict[str, int]:
+        # order_id -> token_id, רק לפקודות שעוד לא הגיעו למצב סופי
+        tracked = {
+            pos["order_id"]: token_id
+            for token_id, pos in positions.items()
+            if pos.get("order_id") and pos.get("status") in ("open", "partial")
+        }
+        exits = {
+            pos["exit_order_id"]: token_id
+            for token_id, pos in positions.items()
+            if pos.get("exit_order_id") and pos.get("status") == "exiting"
+        }
+        if not tracked and not exits:
+            return {}
+
+        since = min(
+            [positions[token_id].get("placed_at", 0) for token_id in tracked.values()]
+            + [positions[token_id].get("exit_placed_at", 0) for token_id in exits.values()]
+        )
+        # trades מלפני הסבב הקודם כבר נספרו - מושכים רק מאז (60 שניות מרווח לשעונים)
+        fetched_at = time.time()
+        if self._last_reconcile:
+            since = max(since, self._last_reconcile)
+        open_orders = {order.get("id"): order for order in self.executor.fetch_open_orders()}
+        trades = self.executor.fetch_trades(after=int(since) - 60)
+        fills = self._collect_fills(trades, {**tracked, **exits})
+
+        now = time.time()
+        summary = {"open": 0, "partial": 0, "filled": 0, "cancelled": 0, "exiting": 0, "sold": 0}
+        for order_id, token_id in tracked.items():
+            pos = positions.get(token_id)
+            if pos is None:
+                continue
+
+            for size, price in fills.get(order_id, []):
+                pos["order_trade_filled"] = pos.get("order_trade_filled", 0) + size
+                pos["trade_filled"] = pos.get("trade_filled", 0) + size
+                pos["trade_cost"] = pos.get("trade_cost", 0) + size * price
+            if pos.get("trade_filled"):
+                pos["avg_fill_price"] = pos["trade_cost"] / pos["trade_filled"]
+
+            order = open_orders.get(order_id)
+            update_filled(pos, order)
+
+            if order is not None:
+                pos["status"] = "partial" if pos["filled_shares"] > 0 else "open"
+            elif now - pos.get("placed_at", now) < MISSING_ORDER_GRACE:
+                pass
+            elif pos.get("filled_shares", 0) > 0:
+                # הפקודה כבר לא על הספר: מולאה במלואה, או שהיתרה בוטלה
+                if pos["filled_shares"] < pos["shares"]:
+                    logger.info(f"✂️ פקודה {order_id[:10]} מולאה חלקית ({pos['filled_shares']:.0f}/{pos['shares']}), היתרה בוטלה")
+                    pos["shares"] = pos["filled_shares"]
+                pos["status"] = "filled"
+                self.executor.release_order(order_id)
+            else:
+                pos["status"] = "cancelled"
+
+            if pos.get("avg_fill_price"):
+                pos["entry_price"] = pos["avg_fill_price"]
+                pos["target_price"] = pos["avg_fill_price"] * self.trader.target_multiplier
+            summary[pos["status"]] += 1
+
+            if pos["status"] == "cancelled":
+                logger.info(f"🚫 פקודה {order_id[:10]} בוטלה בלי מילוי - מסיר פוזיציה")
+                self.trader.remove_position(token_id)
+
+        for order_id, token_id in exits.items():
+            pos = positions.get(token_id)
+            if pos is None or pos.get("exit_order_id") != order_id:
+                continue
+            summary[self._reconcile_exit(token_id, pos, open_orders.get(order_id), fills.get(order_id, []), now)] += 1
+
+        if not busy:
+            self._last_reconcile = fetched_at
+        logger.info(
+            f"🧾 התאמת פקודות: {len(tracked) + len(exits)} פקודות | open={summary['open']} partial={summary['partial']} "
+            f"filled={summary['filled']} cancelled={summary['cancelled']} exiting={summary['exiting']} "
+            f"sold={summary['sold']} | trades={len(trades)} תפוסות={busy}"
+        )
+        return summary
+
+    def _reconcile_exit(self, token_id: str, pos: Dict, order: Optional[Dict], fills: list, now: float) -> str:
+        """מילוי פקודת SELL של יציאה. מחזיר exiting / sold / filled (ה-SELL ירד עם מילוי חלקי)."""
+        order_id = pos["exit_order_id"]
+        for size, _ in fills:
+            pos["exit_filled"] = pos.get("exit_filled", 0) + size
+        if order is None and now - pos.get("exit_placed_at", now) >= MISSING_ORDER_GRACE:
+            # ירדה מהספר - size_matched הסופי (trades יכולים לאחר)
+            order = self.executor.fetch_order(order_id)
+        if order is not None:
+            pos["exit_filled"] = max(pos.get("exit_filled", 0), float(order.get("size_matched", 0)))
+
+        if pos["exit_filled"] >= pos["exit_shares"] - 1e-9:
+            # מה שנשאר מעבר ל-exit_shares הוא שבר מתחת ל-0.01 שאי אפשר למכור
+            logger.info(f"💸 SELL {order_id[:10]} מולא ({pos['exit_shares']:.0f}) - סוגר פוזיציה")
+            self.trader.remove_position(token_id)
+            return "sold"
+        if order is None or order.get("status") == "LIVE":
+            return "exiting"
+
+        # ה-SELL בוטל/פג עם מילוי חלקי: מורידים את מה שנמכר ומשאירים את השאר למכירה חוזרת
+        sold = pos["exit_filled"]
+        logger.info(f"✂️ SELL {order_id[:10]} נמכר חלקית ({sold:.0f}/{pos['exit_shares']:.0f}), היתרה חוזרת לפוזיציה")
+        pos["shares"] = pos["shares"] - sold
+        pos["filled_shares"] = pos.get("filled_shares", 0) - sold
+        for key in ("exit_order_id", "exit_shares", "exit_filled", "exit_placed_at"):
+            pos.pop(key, None)
+        self.executor.release_order(order_id)
+        pos["status"] = "filled"
+        return "filled"
@@ -0,0 +1,243 @@
+# price_history.py
+"""
+היסטוריית מחירים קומפקטית לכל token: ring buffer של (timestamp, bid, ask).
+
+כל הזיכרון מוקצה פעם אחת (בכתיבה הראשונה - גם NumPy נטען רק אז, כך שייבוא
+המודול בעליית ה-bot ובתהליכי ה-shard לא משלם עליו) כמטריצות NumPy בגודל (max_tokens x capacity), ולכל token
+יש שורה (slot). כתיבה של tick היא כמה השמות סקלריות - בלי הקצאות.
+כשכל ה-slots תפוסים, ה-token שלא עודכן הכי הרבה זמן מפנה את מקומו.
+
+buffer נפרד לכל מקור מחיר: gamma_history (outcomePrices מהסורק) ו-clob_history (best bid/ask
+מהמאמת). מחיר Gamma מפגר אחרי ה-CLOB, ובסדרה משותפת כל מעבר בין המקורות נראה כמו tick אמיתי -
+תנודתיות מדומה ו-low/high שאף אחד לא יכול היה לקנות בהם.
+
+שאילתות (O(1) רק ל-latest ו-volatility; השאר סורקים את השורה):
+- latest: O(1) - ה-tick שלפני ה-head
+- volatility: O(1) - סכומים רצים של log returns של המחיר (ask, או bid כשאין ask)
+- low_high: סריקה וקטורית של השורה - O(capacity) לכל token, בלי לולאת Python
+- time_at_or_below: כמה שניות בחלון המחיר היה מתחת לרמה - O(capacity) (מיון לפי head + סכום)
+- low_high_many: min/max לאלפי tokens בקריאת NumPy אחת - O(tokens x capacity)
+
+אין min/max רץ (monotonic deque) כי חלון הזמן משתנה בין קריאות; עם capacity=128
+שאילתה עולה כ-15-40 מיקרו-שניות ל-token, וזה המחיר של חלון שרירותי.
+"""
+import math
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+np = None  # numpy - נטען ב-_allocate
+
+DEFAULT_CAPACITY = 128
+DEFAULT_MAX_TOKENS = 4096
+
+# (best_bid, best_ask) - כמו ב-price_verifier
+Quote = Tuple[Optional[float], Optional[float]]
+
+
+def _price(value) -> Optional[float]:
+    """float32 מהמטריצה -> float רגיל (מעוגל, כדי ש-0.002 לא יחזור כ-0.0020000000949)."""
+    value = float(value)
+    return None if math.isnan(value) else round(value, 6)
+
+
+class PriceHistory:
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, max_tokens: int = DEFAULT_MAX_TOKENS):
+        self.capacity = capacity
+        self.max_tokens = max_tokens
+        self._slots: "OrderedDict[str, int]" = OrderedDict()  # token -> שורה, לפי סדר עדכון (LRU)
+        self._free = list(range(max_tokens - 1, -1, -1))
+        self._lock = threading.Lock()
+        self._allocated = False
+
+    def _allocate(self) -> None:
+        global np
+        if np is None:
+            import numpy
+            np = numpy
+        shape = (self.max_tokens, self.capacity)
+        max_tokens = self.max_tokens
+        self.ts = np.full(shape, np.nan, dtype=np.float64)
+        self.bid = np.full(shape, np.nan, dtype=np.float32)
+        self.ask = np.full(shape, np.nan, dtype=np.float32)
+        self.ret = np.zeros(shape, dtype=np.float64)       # log return מול ה-tick הקודם
+        self.head = np.zeros(max_tokens, dtype=np.int64)   # המקום הבא לכתיבה
+        self.count = np.zeros(max_tokens, dtype=np.int64)
+        self.ret_sum = np.zeros(max_tokens, dtype=np.float64)
+        self.ret_sq = np.zeros(max_tokens, dtype=np.float64)
+        self.ret_n = np.zeros(max_tokens, dtype=np.int64)
+        self.last_price = np.full(max_tokens, np.nan, dtype=np.float64)
+        self._allocated = True
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, token_id: str) -> bool:
+        return token_id in self._slots
+
+    def _slot_for_write(self, token_id: str) -> int:
+        if not self._allocated:
+            self._allocate()
+        row = self._slots.get(token_id)
+        if row is not None:
+            self._slots.move_to_end(token_id)
+            return row
+        if self._free:
+            row = self._free.pop()
+        else:
+            _, row = self._slots.popitem(last=False)
+            self._reset(row)
+        self._slots[token_id] = row
+        return row
+
+    def _reset(self, row: int) -> None:
+        self.ts[row] = np.nan
+        self.bid[row] = np.nan
+        self.ask[row] = np.nan
+        self.ret[row] = 0.0
+        self.head[row] = self.count[row] = self.ret_n[row] = 0
+        self.ret_sum[row] = self.ret_sq[row] = 0.0
+        self.last_price[row] = np.nan
+
+    def _write(self, token_id: str, bid: Optional[float], ask: Optional[float], ts: float) -> None:
+        row = self._slot_for_write(token_id)
+        pos = int(self.head[row])
+        full = self.count[row] == self.capacity
+
+        # ה-return שנדרס יוצא מהסכומים הרצים
+        if full and self.ret[row, pos] != 0.0:
+            old = self.ret[row, pos]
+            self.ret_sum[row] -= old
+            self.ret_sq[row] -= old * old
+            self.ret_n[row] -= 1
+
+        # ask ולא mid: ה-buffer של Gamma מקבל רק ask, וכך שני ה-buffers מודדים את אותו צד
+        price = ask or bid
+        r = 0.0
+        if price:
+            previous = self.last_price[row]
+            if previous > 0:
+                r = math.log(price / previous)
+                if r != 0.0:
+                    self.ret_sum[row] += r
+                    self.ret_sq[row] += r * r
+                    self.ret_n[row] += 1
+            self.last_price[row] = price
+
+        self.ts[row, pos] = ts
+        self.bid[row, pos] = np.nan if bid is None else bid
+        self.ask[row, pos] = np.nan if ask is None else ask
+        self.ret[row, pos] = r
+        self.head[row] = (pos + 1) % self.capacity
+        if not full:
+            self.count[row] += 1
+        elif pos == self.capacity - 1:
+            # פעם בסיבוב מחשבים מחדש כדי שטעויות עיגול לא יצטברו
+            returns = self.ret[row]
+            moves = returns[returns != 0.0]
+            self.ret_sum[row] = moves.sum()
+            self.ret_sq[row] = (moves * moves).sum()
+            self.ret_n[row] = len(moves)
+
+    def record(self, token_id: str, bid: Optional[float], ask: Optional[float], ts: Optional[float] = None) -> None:
+        with self._lock:
+            self._write(token_id, bid, ask, time.time() if ts is None else ts)
+
+    def record_quotes(self, quotes: Dict[str, Quote], ts: Optional[float] = None) -> None:
+        """הזנה מ-PriceVerifier.get_quotes: {token: (best_bid, best_ask)}."""
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            for token_id, (bid, ask) in quotes.items():
+                self._write(token_id, bid, ask, ts)
+
+    def record_prices(self, prices: Iterable[Tuple[str, float]], ts: Optional[float] = None) -> None:
+        """הזנה מהסורק: מחיר Gamma נרשם כ-ask (המחיר שהסורק מתייחס אליו כמחיר קנייה)."""
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            for token_id, price in prices:
+                self._write(token_id, None, price, ts)
+
+    # --- שאילתות ---
+
+    def _window_mask(self, row: int, window: Optional[float], now: Optional[float]) -> "np.ndarray":
+        ts = self.ts[row]
+        if window is None:
+            return ~np.isnan(ts)
+        with np.errstate(invalid="ignore"):
+            return ts >= (time.time() if now is None else now) - window
+
+    def latest(self, token_id: str) -> Optional[Tuple[float, Optional[float], Optional[float]]]:
+        """(ts, bid, ask) של ה-tick האחרון."""
+        with self._lock:
+            row = self._slots.get(token_id)
+            if row is None:
+                return None
+            pos = (int(self.head[row]) - 1) % self.capacity
+            return (float(self.ts[row, pos]), _price(self.bid[row, pos]), _price(self.ask[row, pos]))
+
+    def low_high(self, token_id: str, side: str = "ask", window: Optional[float] = None,
+                 now: Optional[float] = None) -> Tuple[Optional[float], Optional[float]]:
+        """(min, max) של bid/ask בחלון (שניות אחורה) או בכל ה-buffer. סורק את השורה - O(capacity)."""
+        with self._lock:
+            row = self._slots.get(token_id)
+            if row is None:
+                return (None, None)
+            values = (self.ask if side == "ask" else self.bid)[row][self._window_mask(row, window, now)]
+            values = values[~np.isnan(values)]
+            if not len(values):
+                return (None, None)
+            return (_price(values.min()), _price(values.max()))
+
+    def low_high_many(self, token_ids: Iterable[str], side: str = "ask") -> Dict[str, Tuple[float, float]]:
+        """min/max על כל ה-buffer לכמה tokens בבת אחת (tokens בלי נתונים לא מופיעים). O(tokens x capacity)."""
+        with self._lock:
+            known = [(token_id, self._slots[token_id]) for token_id in token_ids if token_id in self._slots]
+            if not known:
+                return {}
+            values = (self.ask if side == "ask" else self.bid)[[row for _, row in known]]
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)  # שורות בלי נתונים בצד הזה
+                lows, highs = np.nanmin(values, axis=1), np.nanmax(values, axis=1)
+        return {
+            token_id: (_price(low), _price(high))
+            for (token_id, _), low, high in zip(known, lows, highs)
+            if not math.isnan(low)
+        }
+
+    def volatility(self, token_id: str) -> Optional[float]:
+        """סטיית תקן של log returns (ticks שבהם המחיר זז) - O(1)."""
+        with self._lock:
+            row = self._slots.get(token_id)
+            if row is None or self.ret_n[row] < 2:
+                return None
+            n = self.ret_n[row]
+            mean = self.ret_sum[row] / n
+            return math.sqrt(max(self.ret_sq[row] / n - mean * mean, 0.0))
+
+    def time_at_or_below(self, token_id: str, price: float, side: str = "ask", window: Optional[float] = None,
+                         now: Optional[float] = None) -> float:
+        """
+        כמה שניות (בחלון) המחיר היה <= price. כל tick נחשב תקף עד ה-tick הבא (האחרון - עד now).
+        סורק את השורה בסדר כרונולוגי - O(capacity).
+        """
+        with self._lock:
+            row = self._slots.get(token_id)
+            if row is None or not self.count[row]:
+                return 0.0
+            now = time.time() if now is None else now
+            # סדר כרונולוגי: מה-head (הישן ביותר) עד הסוף
+            order = np.roll(np.arange(self.capacity), -int(self.head[row])) if self.count[row] == self.capacity \
+                else np.arange(int(self.count[row]))
+            ts = self.ts[row, order]
+            values = (self.ask if side == "ask" else self.bid)[row, order]
+            ends = np.append(ts[1:], now)
+            starts = ts if window is None else np.maximum(ts, now - window)
+            durations = np.clip(ends - starts, 0, None)
+            with np.errstate(invalid="ignore"):
+                return float(durations[values <= price].sum())
+
+
+gamma_history = PriceHistory()  # record_prices מהסורק
+clob_history = PriceHistory()   # record_quotes מ-PriceVerifier
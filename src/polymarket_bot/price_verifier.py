@@ -0,0 +1,174 @@
+# price_verifier.py
+"""
+אימות מחירים מול ה-CLOB אחרי הסינון הזול לפי outcomePrices של Gamma.
+
+- קריאה אחת ל-POST /books לכל batch של tokens
+- cache קצר-טווח לכל token
+- single-flight: בדיקות מקבילות לאותו token חולקות בקשה אחת
+- SIMULATED_EXCHANGE: המחירים נקראים מהספרים של הבורסה המדומה (אותם ספרים שהפקודות
+  מתמלאות מולם). בלי SIM_BOOKS_FILE הנזילות החיצונית שלהם מסונכרנת קודם מ-POST /books.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+from .config import CLOB_URL, SIMULATED_EXCHANGE, SIM_BOOKS_FILE
+from .profiling import stage, count
+from .latency import mark
+from .price_history import clob_history
+from .metrics import api_call
+
+logger = logging.getLogger(__name__)
+
+CLOB_HOST = urlsplit(CLOB_URL).netloc
+
+BOOKS_BATCH_SIZE = 100   # tokens לכל בקשת POST /books
+PRICE_CACHE_TTL = 2.0    # שניות
+
+# (best_bid, best_ask) - None אם אין הצעות בצד הזה
+Quote = Tuple[Optional[float], Optional[float]]
+
+
+def _best_prices(book: Dict) -> Quote:
+    bids = [float(level["price"]) for level in book.get("bids", [])]
+    asks = [float(level["price"]) for level in book.get("asks", [])]
+    return (max(bids) if bids else None, min(asks) if asks else None)
+
+
+class PriceVerifier:
+    """קורא best bid/ask אמיתיים מה-CLOB, ב-batches ועם cache."""
+
+    def __init__(self, ttl: float = PRICE_CACHE_TTL, batch_size: int = BOOKS_BATCH_SIZE):
+        self.ttl = ttl
+        self.batch_size = batch_size
+        self._cache: Dict[str, Tuple[float, Quote]] = {}  # token -> (זמן, quote)
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _fetch_books(self, token_ids: List[str]) -> Dict[str, Quote]:
+        books = self._simulated_books(token_ids) if SIMULATED_EXCHANGE else self._post_books(token_ids)
+        return {book.get("asset_id"): _best_prices(book) for book in books}
+
+    def _post_books(self, token_ids: List[str]) -> List[Dict]:
+        """קריאה אחת ל-POST /books עבור רשימת tokens."""
+        with stage("fetch_books"), api_call(CLOB_HOST):
+            response = requests.post(
+                f"{CLOB_URL}/books",
+                json=[{"token_id": token_id} for token_id in token_ids],
+                timeout=10
+            )
+            response.raise_for_status()
+        count("requests")
+        count("bytes", len(response.content))
+        with stage("decode"):
+            return response.json()
+
+    def _simulated_books(self, token_ids: List[str]) -> List[Dict]:
+        """הספרים של הבורסה המדומה, אחרי סנכרון הנזילות החיצונית (אם אין ספרים מוקלטים)."""
+        from .sim_exchange import shared_market
+        market = shared_market()
+        if not SIM_BOOKS_FILE:
+            try:
+                market.sync_books(self._post_books(token_ids))
+            except Exception as e:
+                logger.debug(f"סנכרון ספרים לבורסה המדומה נכשל ({len(token_ids)} tokens): {str(e)[:60]}")
+        return market.get_books(token_ids)
+
+    def get_quotes(self, token_ids: Iterable[str]) -> Dict[str, Quote]:
+        """מחזיר (best_bid, best_ask) לכל token. tokens שנכשלו לא יופיעו בתוצאה."""
+        now = time.monotonic()
+        result: Dict[str, Quote] = {}
+        to_fetch: List[str] = []
+        waiting: Dict[str, Future] = {}
+        owned: Dict[str, Future] = {}
+
+        with self._lock:
+            for token_id in dict.fromkeys(token_ids):
+                cached = self._cache.get(token_id)
+                if cached and now - cached[0] < self.ttl:
+                    result[token_id] = cached[1]
+                elif token_id in self._inflight:
+                    waiting[token_id] = self._inflight[token_id]
+                else:
+                    future = Future()
+                    self._inflight[token_id] = future
+                    owned[token_id] = future
+                    to_fetch.append(token_id)
+
+        for i in range(0, len(to_fetch), self.batch_size):
+            batch = to_fetch[i:i + self.batch_size]
+            try:
+                quotes = self._fetch_books(batch)
+            except Exception as e:
+                logger.warning(f"⚠️ קריאת CLOB books נכשלה ({len(batch)} tokens): {str(e)[:60]}")
+                quotes = {}
+            fetched_at = time.monotonic()
+            with self._lock:
+                for token_id in batch:
+                    quote = quotes.get(token_id)
+                    if quote is not None:
+                        self._cache[token_id] = (fetched_at, quote)
+                        result[token_id] = quote
+                    self._inflight.pop(token_id, None)
+                    owned[token_id].set_result(quote)
+
+        clob_history.record_quotes({token_id: result[token_id] for token_id in owned if token_id in result})
+
+        for token_id, future in waiting.items():
+            quote = future.result()
+            if quote is not None:
+                result[token_id] = quote
+
+        self._evict_expired(now)
+        return result
+
+    def get_best_ask(self, token_id: str) -> Optional[float]:
+        return self.get_quotes([token_id]).get(token_id, (None, None))[1]
+
+    def _evict_expired(self, now: float) -> None:
+        with self._lock:
+            if len(self._cache) < 10_000:
+                return
+            for token_id in [t for t, (ts, _) in self._cache.items() if now - ts >= self.ttl]:
+                del self._cache[token_id]
+
+    def verify_opportunities(self, opportunities: List[Dict], low_price_threshold: float) -> List[Dict]:
+        """
+        משאיר רק הזדמנויות שה-best ask האמיתי שלהן עדיין מתחת ל-threshold.
+        המחיר בהזדמנות מתעדכן ל-best ask (זה המחיר שבאמת אפשר לקנות בו).
+        """
+        if not opportunities:
+            return []
+
+        quotes = self.get_quotes(opp["token_id"] for opp in opportunities)
+        verified = []
+        rejected_no_book = 0
+        rejected_price_moved = 0
+
+        for opp in opportunities:
+            best_bid, best_ask = quotes.get(opp["token_id"], (None, None))
+            if best_ask is None:
+                rejected_no_book += 1
+                continue
+            if not 0.0001 <= best_ask <= low_price_threshold:
+                rejected_price_moved += 1
+                continue
+            opp["gamma_price"] = opp["price"]
+            opp["price"] = best_ask
+            opp["best_bid"] = best_bid
+            mark(opp.get("timestamps"), "verified")
+            verified.append(opp)
+
+        logger.info(
+            f"🔎 אימות CLOB: {len(verified)}/{len(opportunities)} עברו "
+            f"(אין ask: {rejected_no_book} | מחיר זז: {rejected_price_moved})"
+        )
+        return verified
+
+
+price_verifier = PriceVerifier()
@@ -0,0 +1,179 @@
+# profiling.py
+"""
+מדידת זמנים לפי שלבים ומונים לכל מחזור סריקה/מסחר.
+
+שימוש:
+    with stage("fetch_markets"): ...
+    count("requests"); count("bytes", len(response.content))
+
+BOT_PROFILE=cprofile / tracemalloc עוטף כל מחזור ב-profiler ושומר את התוצאות בתיקיית הלוגים.
+המחזור הנוכחי שמור ב-ContextVar: start_cycle() של לולאת הסריקה לא מאפס את המונים של
+שלבים אחרים שרצים במקביל (כל task של asyncio, ו-asyncio.to_thread, מקבלים עותק של ה-context).
+batch של פקודות וסבב reconcile פותחים מחזור משלהם (with cycle("submit")) ומדפיסים אותו בסוף.
+כל stage/count נרשמים גם ב-metrics (ל-endpoint של Prometheus); מחוץ למחזור - רק שם.
+"""
+import cProfile
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Iterator
+
+from .metrics import STAGE_SECONDS, count_event
+
+logger = logging.getLogger(__name__)
+
+
+class CycleStats:
+    """זמנים מצטברים לכל שלב ומונים של מחזור אחד."""
+
+    def __init__(self, name: str = "cycle"):
+        self.name = name
+        self.started = time.perf_counter()
+        self.stage_times: Dict[str, float] = defaultdict(float)
+        self.counters: Dict[str, int] = defaultdict(int)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            self.stage_times[name] += elapsed
+            STAGE_SECONDS.labels(name).observe(elapsed)
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] += n
+        count_event(name, n)
+
+    def merge(self, stage_times: Dict[str, float], counters: Dict[str, int]) -> None:
+        """מוסיף זמנים ומונים שנמדדו בתהליך אחר (למשל worker של סריקה מפוצלת)."""
+        for name, seconds in stage_times.items():
+            self.stage_times[name] += seconds
+        for name, n in counters.items():
+            self.counters[name] += n
+            count_event(name, n)  # המונים של ה-worker נשארו בתהליך שלו
+
+    def summary_line(self) -> str:
+        total = time.perf_counter() - self.started
+        stages = " ".join(f"{name}={seconds:.2f}s" for name, seconds in self.stage_times.items())
+        counters = " ".join(
+            f"{name}={_format_bytes(n) if name == 'bytes' else n}" for name, n in self.counters.items()
+        )
+        return f"⏱️ {self.name} {total:.2f}s | {stages or '-'} | {counters or '-'}"
+
+
+class _MetricsOnly(CycleStats):
+    """stage()/count() מחוץ לכל מחזור (אימות, יציאות, settlement): רק ל-metrics, בלי לצבור."""
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        with STAGE_SECONDS.labels(name).time():
+            yield
+
+    def count(self, name: str, n: int = 1) -> None:
+        count_event(name, n)
+
+    def merge(self, stage_times: Dict[str, float], counters: Dict[str, int]) -> None:
+        for name, n in counters.items():
+            count_event(name, n)
+
+
+def _format_bytes(n: int) -> str:
+    if n >= 1024 * 1024:
+        return f"{n / (1024 * 1024):.1f}MB"
+    if n >= 1024:
+        return f"{n / 1024:.1f}KB"
+    return f"{n}B"
+
+
+_current: ContextVar[CycleStats] = ContextVar("profiling_cycle")
+_background = _MetricsOnly("background")  # שלבים שלא פתחו מחזור משלהם
+
+
+def current_cycle() -> CycleStats:
+    return _current.get(_background)
+
+
+def start_cycle() -> CycleStats:
+    """פותח מחזור חדש ב-context הנוכחי - כל stage()/count() מכאן והלאה (באותו task) נרשמים אליו."""
+    cycle = CycleStats()
+    _current.set(cycle)
+    return cycle
+
+
+def end_cycle() -> CycleStats:
+    """מדפיס שורת סיכום אחת למחזור ומחזיר את הנתונים."""
+    cycle = current_cycle()
+    logger.info(cycle.summary_line())
+    return cycle
+
+
+@contextmanager
+def cycle(name: str) -> Iterator[CycleStats]:
+    """מחזור נפרד לעבודה שאינה הסריקה (batch של פקודות, סבב reconcile): נרשם ומודפס ביציאה."""
+    stats = CycleStats(name)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+        logger.info(stats.summary_line())
+
+
+def stage(name: str):
+    return current_cycle().stage(name)
+
+
+def count(name: str, n: int = 1) -> None:
+    current_cycle().count(name, n)
+
+
+@contextmanager
+def profile_cycle(cycle_number: int) -> Iterator[None]:
+    """עוטף מחזור ב-cProfile או tracemalloc לפי BOT_PROFILE, ושומר לתיקיית הלוגים."""
+    mode = os.environ.get("BOT_PROFILE", "").strip().lower()
+    if mode not in ("cprofile", "tracemalloc"):
+        yield
+        return
+
+    log_dir = Path(os.environ.get('BOT_LOG_DIR', 'logs'))
+    log_dir.mkdir(exist_ok=True)
+
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            out_file = log_dir / f"profile_cycle_{cycle_number}.prof"
+            profiler.dump_stats(out_file)
+            with open(log_dir / f"profile_cycle_{cycle_number}.txt", "w", encoding="utf-8") as f:
+                pstats.Stats(profiler, stream=f).sort_stats("cumulative").print_stats(40)
+            logger.info(f"🧪 cProfile נשמר: {out_file}")
+        return
+
+    started_here = not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start(10)
+    before = tracemalloc.take_snapshot()
+    try:
+        yield
+    finally:
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if started_here:
+            tracemalloc.stop()
+        out_file = log_dir / f"tracemalloc_cycle_{cycle_number}.txt"
+        with open(out_file, "w", encoding="utf-8") as f:
+            f.write(f"current={_format_bytes(current)} peak={_format_bytes(peak)}\n\n")
+            for stat in after.compare_to(before, "lineno")[:40]:
+                f.write(f"{stat}\n")
+        logger.info(f"🧪 tracemalloc נשמר: {out_file} (peak {_format_bytes(peak)})")
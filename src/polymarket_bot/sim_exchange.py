@@ -0,0 +1,639 @@
+# sim_exchange.py
+"""
+בורסה מדומה בזיכרון - backend חלופי ל-OrderExecutor (SIMULATED_EXCHANGE=true).
+
+SimulatedClobClient חושף את אותן מתודות של ClobClient שה-executor משתמש בהן
+(create_order / post_order / post_orders / get_orders / get_order / get_trades /
+cancel_* / get_balance_allowance ...), ולכן אין צורך במפתחות ואף פקודה לא יוצאת לרשת.
+
+- SimMarket: הספרים וזרימת ה-taker, משותפים לכל הארנקים המדומים בתהליך (ExecutorPool)
+  ול-PriceVerifier - הבוט מאמת מחירים מול אותם ספרים שהפקודות שלו מתמלאות מולם
+- מנוע התאמה price-time לכל token (רמות מחיר ממוינות + FIFO בכל רמה)
+- ספרים נזרעים מקובץ books מוקלט (תשובת POST /books), מהקטלוג המוקלט, מסונכרנים
+  מ-POST /books האמיתי (PriceVerifier), או נבנים סינתטית סביב הפקודה הראשונה על token לא מוכר
+- זרימת taker מדומה ממלאת פקודות נחות בהדרגה (מילויים חלקיים)
+- יתרת USDC ויתרות tokens לכל ארנק, כולל נעילה של כסף/יחידות בפקודות פתוחות
+- latency מוגדרת לכל קריאה (ברירת מחדל 0 - לבדיקות עומס)
+
+הזיכרון חסום: פקודות שהסתיימו עוברות ל-closed_orders (עד MAX_CLOSED_ORDERS), רק trades
+שלנו נשמרים (עד MAX_TRADES), וספרים בלי פקודות שלנו מפנים מקום מעל MAX_BOOKS. בנוסף,
+עם retention (SIM_RETENTION) נזרקים פקודות סגורות ו-trades ישנים מזה, וספרים שלא נגעו
+בהם זמן כזה - כך שווקים שנסגרו לא נשארים לנצח (ספרים - לא עם SIM_BOOKS_FILE, שם
+הספרים המוקלטים הם מקור הנזילות היחיד).
+"""
+import bisect
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .catalog_snapshot import load_raw_catalog, parse_json_list
+from .config import SIM_STARTING_BALANCE, SIM_LATENCY_MS, SIM_FILL_RATE, SIM_BOOKS_FILE, SIM_SEED, SIM_RETENTION
+from .executor import USDC_DECIMALS
+
+logger = logging.getLogger(__name__)
+
+PRICE_DECIMALS = 4
+SYNTHETIC_LEVELS = 5
+SYNTHETIC_LEVEL_SIZE = 2_000.0
+MAX_TRADES = 10_000          # trades שלנו לכל ארנק
+MAX_CLOSED_ORDERS = 10_000   # פקודות שמולאו/בוטלו שעדיין עונים עליהן ב-get_order
+MAX_BOOKS = 20_000           # ספרים בזיכרון (הישן ביותר בלי פקודות שלנו מפנה מקום)
+
+# מונה משותף לכל המופעים: כמה ארנקים מדומים (ExecutorPool) לא יקבלו אותו order id
+_ORDER_IDS = itertools.count(1)
+
+
+def tick_size(price: float) -> float:
+    """כמו בפולימרקט: tick של 0.001 במחירים קיצוניים, 0.01 באמצע."""
+    return 0.001 if price < 0.04 or price > 0.96 else 0.01
+
+
+def synthetic_book(price: float, levels: int = SYNTHETIC_LEVELS, size: float = SYNTHETIC_LEVEL_SIZE,
+                   spread_ticks: int = 1) -> Tuple[List[Tuple[float, float]], List[Tuple[float, float]]]:
+    """(bids, asks) סביב price: ה-ask הטוב ביותר ב-price, ה-bid הטוב ביותר spread_ticks מתחתיו."""
+    tick = tick_size(price)
+    asks = [(round(price + i * tick, PRICE_DECIMALS), size) for i in range(levels) if price + i * tick < 1]
+    bids = [
+        (round(price - (i + spread_ticks) * tick, PRICE_DECIMALS), size)
+        for i in range(levels) if price - (i + spread_ticks) * tick > 0
+    ]
+    return bids, asks
+
+
+@dataclass
+class SimSignedOrder:
+    """מה ש-create_order מחזיר (במקום SignedOrder חתום)."""
+    token_id: str
+    price: float
+    size: float
+    side: str
+
+
+class OrderBook:
+    """ספר פקודות של token אחד. כל רמה היא deque של [order_id, remaining]."""
+
+    def __init__(self, token_id: str):
+        self.token_id = token_id
+        self.touched = time.monotonic()                        # שימוש אחרון (ל-retention)
+        self.levels = {"BUY": {}, "SELL": {}}                 # side -> price -> deque
+        self.prices: Dict[str, List[float]] = {"BUY": [], "SELL": []}  # ממוינים עולה
+
+    def best(self, side: str) -> Optional[float]:
+        prices = self.prices[side]
+        if not prices:
+            return None
+        return prices[-1] if side == "BUY" else prices[0]
+
+    def add(self, order_id: str, side: str, price: float, size: float) -> None:
+        levels = self.levels[side]
+        if price not in levels:
+            levels[price] = deque()
+            bisect.insort(self.prices[side], price)
+        levels[price].append([order_id, size])
+
+    def remove(self, order_id: str, side: str, price: float) -> None:
+        level = self.levels[side].get(price)
+        if level is None:
+            return
+        for entry in level:
+            if entry[0] == order_id:
+                level.remove(entry)
+                break
+        if not level:
+            self._drop_level(side, price)
+
+    def _drop_level(self, side: str, price: float) -> None:
+        del self.levels[side][price]
+        prices = self.prices[side]
+        del prices[bisect.bisect_left(prices, price)]
+
+    def match(self, side: str, limit: Optional[float], size: float) -> Tuple[List[Tuple[str, float, float]], float]:
+        """
+        מתאים taker מול הצד השני (limit=None = market). מחזיר
+        ([(maker_order_id, size, price), ...], כמות שלא מולאה).
+        """
+        opposite = "SELL" if side == "BUY" else "BUY"
+        levels, prices = self.levels[opposite], self.prices[opposite]
+        fills = []
+        while size > 1e-9 and prices:
+            price = prices[0] if side == "BUY" else prices[-1]
+            if limit is not None and (price > limit if side == "BUY" else price < limit):
+                break
+            level = levels[price]
+            while size > 1e-9 and level:
+                entry = level[0]
+                take = min(size, entry[1])
+                fills.append((entry[0], take, price))
+                entry[1] -= take
+                size -= take
+                if entry[1] <= 1e-9:
+                    level.popleft()
+            if not level:
+                self._drop_level(opposite, price)
+        return fills, size
+
+    def snapshot(self, depth: int = 20) -> Dict:
+        """הספר בפורמט של POST /books."""
+        def side_levels(side, prices):
+            return [
+                {"price": str(price), "size": str(round(sum(e[1] for e in self.levels[side][price]), 2))}
+                for price in prices
+            ]
+        return {
+            "asset_id": self.token_id,
+            "bids": side_levels("BUY", self.prices["BUY"][-depth:]),
+            "asks": side_levels("SELL", self.prices["SELL"][:depth][::-1]),
+        }
+
+
+class SimMarket:
+    """הספרים, הפקודות הנחות של כל הארנקים וזרימת ה-taker. thread-safe דרך self.lock."""
+
+    def __init__(self, fill_rate: float = 0.2, taker_size: float = 500.0, seed: Optional[int] = None,
+                 max_books: int = MAX_BOOKS, retention: float = 0.0, expire_books: bool = True):
+        self.fill_rate = fill_rate          # טריידים של taker לשנייה לכל token שיש עליו פקודה שלנו
+        self.taker_size = taker_size        # גודל taker מקסימלי
+        self.max_books = max_books
+        self.retention = retention          # שניות לשמירת ספרים לא בשימוש / פקודות סגורות / trades (0 = רק תקרות)
+        self.expire_books = expire_books
+        self.books: "OrderedDict[str, OrderBook]" = OrderedDict()  # לפי סדר שימוש (LRU)
+        self.resting: Dict[str, Dict[str, "SimulatedClobClient"]] = {}  # token -> {order_id: הארנק}
+        self.lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._rng = random.Random(seed)
+        self._last_flow = time.monotonic()
+
+    # --- זריעת ספרים ---
+
+    def seed_book(self, token_id: str, bids: List[Tuple[float, float]], asks: List[Tuple[float, float]]) -> None:
+        with self.lock:
+            self._seed_book(token_id, bids, asks)
+
+    def _seed_book(self, token_id: str, bids, asks) -> None:
+        """
+        מחליף את הנזילות החיצונית של token. הפקודות שלנו נשארות על הספר; נזילות חדשה
+        שחוצה פקודה שלנו ממלאת אותה במחיר שלה (השוק עבר דרכה - אנחנו ה-maker).
+        """
+        book = OrderBook(token_id)
+        for price, size in bids:
+            book.add(self.book_order_id(), "BUY", round(float(price), PRICE_DECIMALS), float(size))
+        for price, size in asks:
+            book.add(self.book_order_id(), "SELL", round(float(price), PRICE_DECIMALS), float(size))
+        for order_id, client in list(self.resting.get(token_id, {}).items()):
+            order = client.orders[order_id]
+            crossed, remaining = book.match(order["side"], order["price"], order["original_size"] - order["size_matched"])
+            if crossed:
+                size = sum(take for _, take, _ in crossed)
+                client._record_trade(self._trade(
+                    token_id, self.book_order_id(), "SELL" if order["side"] == "BUY" else "BUY",
+                    [(order_id, size, order["price"])]
+                ))
+                client._settle_fill(order, size, order["price"])
+            if remaining > 1e-9:
+                book.add(order_id, order["side"], order["price"], remaining)
+        self._store_book(token_id, book)
+
+    def sync_books(self, books: List[Dict]) -> None:
+        """נזילות חיצונית מתשובת POST /books (ה-CLOB האמיתי או תחליף שלו)."""
+        with self.lock:
+            for book in books:
+                self._seed_book(
+                    book["asset_id"],
+                    [(level["price"], level["size"]) for level in book.get("bids", [])],
+                    [(level["price"], level["size"]) for level in book.get("asks", [])],
+                )
+
+    def seed_from_books_file(self, path) -> None:
+        """ספרים מוקלטים: JSON list בפורמט של תשובת POST /books."""
+        self.sync_books(json.loads(Path(path).read_text(encoding="utf-8")))
+
+    def seed_from_catalog(self, markets: List[Dict]) -> None:
+        """ספרים סינתטיים סביב outcomePrices של הקטלוג המוקלט."""
+        for m in markets:
+            for token_id, price in zip(parse_json_list(m.get("clobTokenIds")), parse_json_list(m.get("outcomePrices"))):
+                try:
+                    price = float(price)
+                except (TypeError, ValueError):
+                    continue
+                if 0 < price < 1:
+                    self.seed_book(str(token_id), *synthetic_book(price))
+
+    def book_order_id(self) -> str:
+        return f"book-{next(self._ids)}"
+
+    def _store_book(self, token_id: str, book: OrderBook) -> None:
+        self.books[token_id] = book
+        self.books.move_to_end(token_id)
+        for _ in range(len(self.books) - self.max_books):
+            old_token, old_book = self.books.popitem(last=False)
+            if self.resting.get(old_token):
+                self.books[old_token] = old_book  # יש עליו פקודות שלנו - נשאר (בסוף התור)
+        if self.retention and self.expire_books:
+            self._expire_books(book.touched - self.retention)
+
+    def _expire_books(self, cutoff: float) -> None:
+        """זורק מתחילת ה-LRU ספרים שלא נגעו בהם מאז cutoff (ספר עם פקודות שלנו עובר לסוף)."""
+        while self.books:
+            old_token, old_book = next(iter(self.books.items()))
+            if old_book.touched >= cutoff:
+                return
+            del self.books[old_token]
+            if self.resting.get(old_token):
+                old_book.touched = time.monotonic()
+                self.books[old_token] = old_book
+
+    def book_for(self, token_id: str, price: float) -> OrderBook:
+        """token בלי ספר: ספר סינתטי עם tick מכל צד של הפקודה הראשונה (היא תנוח בראש הספר)."""
+        book = self.books.get(token_id)
+        if book is not None:
+            book.touched = time.monotonic()
+            self.books.move_to_end(token_id)
+            return book
+        bids, asks = synthetic_book(price + tick_size(price), spread_ticks=2)
+        book = OrderBook(token_id)
+        for p, s in bids:
+            book.add(self.book_order_id(), "BUY", p, s)
+        for p, s in asks:
+            book.add(self.book_order_id(), "SELL", p, s)
+        self._store_book(token_id, book)
+        return book
+
+    def get_books(self, token_ids: List[str]) -> List[Dict]:
+        """כמו POST /books - רק tokens שיש להם ספר."""
+        with self.lock:
+            return [self.books[token_id].snapshot() for token_id in token_ids if token_id in self.books]
+
+    # --- התאמה (נקרא תחת self.lock) ---
+
+    def rest(self, client: "SimulatedClobClient", order: Dict, book: OrderBook, size: float) -> None:
+        book.add(order["id"], order["side"], order["price"], size)
+        self.resting.setdefault(order["token_id"], {})[order["id"]] = client
+
+    def unrest(self, token_id: str, order_id: str) -> None:
+        resting = self.resting.get(token_id)
+        if resting is not None:
+            resting.pop(order_id, None)
+            if not resting:
+                del self.resting[token_id]
+
+    def match(self, book: OrderBook, side: str, limit: Optional[float], size: float,
+              taker: Optional[Tuple["SimulatedClobClient", Dict]] = None) -> Tuple[List[Tuple[str, float, float]], float]:
+        """
+        taker (שלנו, או זרימה חיצונית כש-taker=None) מול הספר. כל ארנק שפקודה שלו
+        השתתפה מתעדכן ומקבל את ה-trade.
+        """
+        fills, remaining = book.match(side, limit, size)
+        if not fills:
+            return fills, remaining
+        resting = self.resting.get(book.token_id, {})
+        makers = [(resting.get(maker_id), maker_id, take, price) for maker_id, take, price in fills]
+        involved: Dict[int, "SimulatedClobClient"] = {}
+        if taker is not None:
+            client, order = taker
+            for _, take, price in fills:
+                client._settle_fill(order, take, price)
+            involved[id(client)] = client
+        for client, maker_id, take, price in makers:
+            if client is not None:
+                client._settle_fill(client.orders[maker_id], take, price)
+                involved[id(client)] = client
+        if involved:
+            trade = self._trade(book.token_id, taker[1]["id"] if taker is not None else self.book_order_id(), side, fills)
+            for client in involved.values():
+                client._record_trade(trade)
+        return fills, remaining
+
+    def _trade(self, token_id: str, taker_order_id: str, taker_side: str,
+               fills: List[Tuple[str, float, float]]) -> Dict:
+        return {
+            "id": f"trade-{next(self._ids)}",
+            "asset_id": token_id,
+            "taker_order_id": taker_order_id,
+            "side": taker_side,
+            "size": str(sum(f[1] for f in fills)),
+            "price": str(fills[-1][2]),
+            "match_time": str(int(time.time())),
+            "maker_orders": [
+                {"order_id": order_id, "matched_amount": str(take), "price": str(price)}
+                for order_id, take, price in fills
+            ],
+        }
+
+    def advance_flow(self) -> None:
+        """זרימת taker חיצונית: ממלאת פקודות נחות (של כל הארנקים) לפי fill_rate."""
+        now = time.monotonic()
+        elapsed, self._last_flow = now - self._last_flow, now
+        if not self.fill_rate:
+            return
+        probability = min(1.0, self.fill_rate * elapsed)
+        for token_id, resting in list(self.resting.items()):
+            if self._rng.random() >= probability:
+                continue
+            book = self.books[token_id]
+            for order_id, client in list(resting.items()):
+                order = client.orders.get(order_id)
+                if order is None:
+                    continue  # התמלאה כבר בסבב הזה
+                # taker בצד ההפוך שמגיע עד המחיר שלנו
+                taker_side = "SELL" if order["side"] == "BUY" else "BUY"
+                size = self._rng.uniform(0.1, 1.0) * self.taker_size
+                self.match(book, taker_side, order["price"], size)
+
+
+_shared_market: Optional[SimMarket] = None
+_shared_market_lock = threading.Lock()
+
+
+def shared_market() -> SimMarket:
+    """ה-SimMarket של התהליך לפי config (נזרע פעם אחת, בשימוש הראשון)."""
+    global _shared_market
+    with _shared_market_lock:
+        if _shared_market is None:
+            market = SimMarket(fill_rate=SIM_FILL_RATE, seed=SIM_SEED, retention=SIM_RETENTION,
+                               expire_books=not SIM_BOOKS_FILE)
+            if SIM_BOOKS_FILE:
+                market.seed_from_books_file(SIM_BOOKS_FILE)
+            else:
+                market.seed_from_catalog(load_raw_catalog() or [])
+            logger.info(
+                f"🧪 בורסה מדומה: {len(market.books)} ספרים | "
+                f"latency={SIM_LATENCY_MS}ms fill_rate={SIM_FILL_RATE}/s"
+            )
+            _shared_market = market
+        return _shared_market
+
+
+class SimulatedClobClient:
+    """
+    ארנק אחד מול SimMarket, עם הממשק של ClobClient. thread-safe (ה-executor נקרא
+    מכמה threads) - כל הארנקים על אותו market חולקים את ה-lock שלו.
+    """
+
+    def __init__(self, starting_balance: float = 1_000.0, latency: float = 0.0, latency_jitter: float = 0.0,
+                 fill_rate: float = 0.2, taker_size: float = 500.0, seed: Optional[int] = None,
+                 address: str = "0xSIMULATED", market: Optional[SimMarket] = None):
+        self.market = market or SimMarket(fill_rate=fill_rate, taker_size=taker_size, seed=seed)
+        self.usdc_balance = starting_balance
+        self.locked_usdc = 0.0
+        self.token_balances: Dict[str, float] = {}
+        self.locked_tokens: Dict[str, float] = {}
+        self.latency = latency              # שניות לכל קריאה
+        self.latency_jitter = latency_jitter
+        self.address = address
+        self.orders: Dict[str, Dict] = {}   # הפקודות החיות שלנו
+        self.closed_orders: "OrderedDict[str, Dict]" = OrderedDict()  # מולאו/בוטלו (חסום)
+        self._closed_at: Deque[float] = deque()                         # זמן הסגירה, באותו סדר
+        self.trades: Deque[Dict] = deque(maxlen=MAX_TRADES)            # רק trades שלנו, לפי זמן
+        self._rng = random.Random(seed)
+        self._lock = self.market.lock
+
+    @classmethod
+    def from_config(cls, address: str = "0xSIMULATED") -> "SimulatedClobClient":
+        client = cls(starting_balance=SIM_STARTING_BALANCE, latency=SIM_LATENCY_MS / 1000,
+                     seed=SIM_SEED, address=address, market=shared_market())
+        logger.info(f"🧪 ארנק מדומה {address}: ${SIM_STARTING_BALANCE:.2f} USDC")
+        return client
+
+    @property
+    def books(self) -> "OrderedDict[str, OrderBook]":
+        return self.market.books
+
+    # --- זריעת ספרים (דרך ה-market) ---
+
+    def seed_book(self, token_id: str, bids: List[Tuple[float, float]], asks: List[Tuple[float, float]]) -> None:
+        self.market.seed_book(token_id, bids, asks)
+
+    def seed_from_books_file(self, path) -> None:
+        self.market.seed_from_books_file(path)
+
+    def seed_from_catalog(self, markets: List[Dict]) -> None:
+        self.market.seed_from_catalog(markets)
+
+    # --- עזרים פנימיים (נקראים תחת ה-lock) ---
+
+    def _delay(self) -> None:
+        if self.latency or self.latency_jitter:
+            time.sleep(self.latency + self._rng.uniform(0, self.latency_jitter))
+
+    def _settle_fill(self, order: Dict, size: float, price: float) -> None:
+        """מעדכן יתרות עבור מילוי של פקודה שלנו."""
+        token_id = order["token_id"]
+        order["size_matched"] += size
+        if order["side"] == "BUY":
+            self.locked_usdc -= size * order["price"]
+            self.usdc_balance -= size * price
+            self.token_balances[token_id] = self.token_balances.get(token_id, 0.0) + size
+        else:
+            self.locked_tokens[token_id] -= size
+            self.token_balances[token_id] -= size
+            self.usdc_balance += size * price
+        if order["original_size"] - order["size_matched"] <= 1e-9:
+            order["status"] = "MATCHED"
+            self.market.unrest(token_id, order["id"])
+            self._close(order)
+
+    def _release(self, order: Dict) -> None:
+        """משחרר את מה שנעול ביתרת פקודה שבוטלה."""
+        remaining = order["original_size"] - order["size_matched"]
+        if order["side"] == "BUY":
+            self.locked_usdc -= remaining * order["price"]
+        else:
+            self.locked_tokens[order["token_id"]] -= remaining
+
+    def _close(self, order: Dict) -> None:
+        """פקודה שהסתיימה עוברת ל-closed_orders (הישנה נזרקת מעל MAX_CLOSED_ORDERS או אחרי retention)."""
+        self.orders.pop(order["id"], None)
+        now = time.monotonic()
+        self.closed_orders[order["id"]] = order
+        self._closed_at.append(now)
+        cutoff = now - self.market.retention if self.market.retention else None
+        while self.closed_orders and (len(self.closed_orders) > MAX_CLOSED_ORDERS
+                                      or (cutoff is not None and self._closed_at[0] < cutoff)):
+            self.closed_orders.popitem(last=False)
+            self._closed_at.popleft()
+
+    def _record_trade(self, trade: Dict) -> None:
+        """trade שלנו (ה-deque חסום ב-MAX_TRADES; ישנים מ-retention נזרקים)."""
+        self.trades.append(trade)
+        if self.market.retention:
+            cutoff = time.time() - self.market.retention
+            while self.trades and int(self.trades[0]["match_time"]) < cutoff:
+                self.trades.popleft()
+
+    @staticmethod
+    def _view(order: Dict) -> Dict:
+        return {**order, "original_size": str(order["original_size"]), "size_matched": str(order["size_matched"]),
+                "price": str(order["price"])}
+
+    def _place(self, order: SimSignedOrder, order_type: str) -> Dict:
+        side = "BUY" if str(order.side).upper() == "BUY" else "SELL"
+        price = round(float(order.price), PRICE_DECIMALS)
+        size = float(order.size)
+        token_id = order.token_id
+        if not 0 < price < 1 or size <= 0:
+            return {"success": False, "errorMsg": "invalid price/size"}
+
+        # בדיקת יתרה ונעילה (כמו allowance ב-CLOB)
+        if side == "BUY":
+            if self.usdc_balance - self.locked_usdc < size * price - 1e-9:
+                return {"success": False, "errorMsg": "not enough balance / allowance"}
+            self.locked_usdc += size * price
+        else:
+            available = self.token_balances.get(token_id, 0.0) - self.locked_tokens.get(token_id, 0.0)
+            if available < size - 1e-9:
+                return {"success": False, "errorMsg": "not enough balance / allowance"}
+            self.locked_tokens[token_id] = self.locked_tokens.get(token_id, 0.0) + size
+
+        book = self.market.book_for(token_id, price)
+        order_id = f"0xsim{next(_ORDER_IDS):012x}"
+        state = {
+            "id": order_id, "token_id": token_id, "asset_id": token_id, "side": side, "price": price,
+            "original_size": size, "size_matched": 0.0, "status": "LIVE", "order_type": order_type,
+            "created_at": int(time.time()),
+        }
+        self.orders[order_id] = state
+
+        if order_type == "FOK":
+            opposite = "SELL" if side == "BUY" else "BUY"
+            crossing = sum(
+                sum(e[1] for e in book.levels[opposite][p]) for p in book.prices[opposite]
+                if (p <= price if side == "BUY" else p >= price)
+            )
+            if crossing < size - 1e-9:
+                self._release(state)
+                state["status"] = "CANCELED"
+                self._close(state)
+                return {"success": False, "errorMsg": "order couldn't be fully filled, FOK orders are fully filled or killed"}
+
+        _, remaining = self.market.match(book, side, price, size, taker=(self, state))
+
+        if remaining > 1e-9:
+            if order_type in ("FOK", "FAK"):
+                self._release(state)
+                state["status"] = "CANCELED"
+                self._close(state)
+            else:
+                self.market.rest(self, state, book, remaining)
+        status = "matched" if state["status"] == "MATCHED" else "live"
+        return {"success": True, "orderID": order_id, "status": status, "errorMsg": ""}
+
+    # --- הממשק של ClobClient ---
+
+    def set_api_creds(self, creds) -> None:
+        pass
+
+    def get_address(self) -> str:
+        return self.address
+
+    def get_balance_allowance(self, params=None) -> Dict:
+        """
+        כמו ב-CLOB: ביחידות בסיס (6 ספרות), USDC כברירת מחדל ו-token עם asset_type=CONDITIONAL.
+        זו היתרה הכוללת - USDC שתפוס בפקודות פתוחות לא יורד ממנה עד המילוי.
+        """
+        self._delay()
+        with self._lock:
+            if getattr(params, "asset_type", None) == "CONDITIONAL":
+                balance = self.token_balances.get(params.token_id, 0.0)
+            else:
+                balance = self.usdc_balance
+            return {"balance": str(int(round(balance * 10 ** USDC_DECIMALS))), "allowance": "inf"}
+
+    def get_balance(self, token_id: str) -> float:
+        with self._lock:
+            return self.token_balances.get(token_id, 0.0)
+
+    def create_order(self, order_args) -> SimSignedOrder:
+        return SimSignedOrder(order_args.token_id, order_args.price, order_args.size, order_args.side)
+
+    def post_order(self, order: SimSignedOrder, orderType="GTC") -> Dict:
+        self._delay()
+        with self._lock:
+            return self._place(order, str(getattr(orderType, "value", orderType)))
+
+    def post_orders(self, args) -> List[Dict]:
+        self._delay()
+        with self._lock:
+            return [self._place(arg.order, str(getattr(arg.orderType, "value", arg.orderType))) for arg in args]
+
+    def get_orders(self, params=None, next_cursor=None) -> List[Dict]:
+        self._delay()
+        with self._lock:
+            self.market.advance_flow()
+            asset_id = getattr(params, "asset_id", None)
+            return [
+                self._view(order) for order in self.orders.values()
+                if order["status"] == "LIVE" and (asset_id is None or order["token_id"] == asset_id)
+            ]
+
+    def get_order(self, order_id: str) -> Optional[Dict]:
+        """פקודה אחת (חיה, או שהסתיימה לאחרונה). None אם לא מוכרת."""
+        self._delay()
+        with self._lock:
+            order = self.orders.get(order_id) or self.closed_orders.get(order_id)
+            return self._view(order) if order else None
+
+    def get_trades(self, params=None, next_cursor=None) -> List[Dict]:
+        self._delay()
+        with self._lock:
+            self.market.advance_flow()
+            after = getattr(params, "after", None) or 0
+            # trades נשמרים לפי זמן - הולכים אחורה רק עד after
+            recent = []
+            for trade in reversed(self.trades):
+                if int(trade["match_time"]) < after:
+                    break
+                recent.append(trade)
+            return recent[::-1]
+
+    def _cancel(self, order_id: str) -> bool:
+        order = self.orders.get(order_id)
+        if order is None or order["status"] != "LIVE":
+            return False
+        self.market.books[order["token_id"]].remove(order_id, order["side"], order["price"])
+        self.market.unrest(order["token_id"], order_id)
+        self._release(order)
+        order["status"] = "CANCELED"
+        self._close(order)
+        return True
+
+    def cancel(self, order_id: str) -> Dict:
+        return self.cancel_orders([order_id])
+
+    def cancel_orders(self, order_ids: List[str]) -> Dict:
+        self._delay()
+        with self._lock:
+            canceled, not_canceled = [], {}
+            for order_id in order_ids:
+                if self._cancel(order_id):
+                    canceled.append(order_id)
+                else:
+                    not_canceled[order_id] = "order can't be found - already canceled or matched"
+            return {"canceled": canceled, "not_canceled": not_canceled}
+
+    def cancel_market_orders(self, market: str = "", asset_id: str = "") -> Dict:
+        self._delay()
+        with self._lock:
+            order_ids = [order_id for order_id, order in self.orders.items() if order["token_id"] == asset_id]
+            return {"canceled": [order_id for order_id in order_ids if self._cancel(order_id)], "not_canceled": {}}
+
+    def cancel_all(self) -> Dict:
+        self._delay()
+        with self._lock:
+            return {"canceled": [order_id for order_id in list(self.orders) if self._cancel(order_id)], "not_canceled": {}}
+
+    def get_order_book(self, token_id: str) -> Dict:
+        self._delay()
+        with self._lock:
+            book = self.market.books.get(token_id)
+            return book.snapshot() if book else {"asset_id": token_id, "bids": [], "asks": []}
+
+    def get_books(self, token_ids: List[str]) -> List[Dict]:
+        """כמו POST /books - רק tokens שיש להם ספר."""
+        return self.market.get_books(token_ids)
@@ -1,62 +1,331 @@
 # simple_bot.py
+"""
+הבוט בנוי כ-pipeline של שלבים עצמאיים שמחוברים בתורים חסומים (asyncio.Queue):
+
+    scanner -> [candidates] -> verifier -> [orders] -> submitters
+    reconciler (מילויים/ביטולים)    exit monitor (פוזיציות פתוחות)    settler (פוזיציות בשווקים סגורים)
+
+סריקה איטית לא מעכבת יציאות, ו-endpoint איטי של פקודות לא מעכב את הסריקה הבאה.
+
+הפעלה מהירה: OrderExecutor (ייבוא py_clob_client + בניית ה-client) ובדיקת היתרה רצים
+ב-thread במקביל לסריקה הראשונה, וה-warm start מכניס לתור את ההזדמנויות שנשמרו
+בהפעלה הקודמת - כך שהאימות מול ה-CLOB מתחיל מיד, וה-submitters מחכים רק ל-client.
+"""
 import asyncio
 import logging
-from .simple_scanner import scan_extreme_price_markets, get_current_price
+import time
+from typing import Dict, List
+from .simple_scanner import scan_extreme_price_markets, filter_catalog
 from .config import PORTFOLIO_PERCENT, MIN_POSITION_USD
+from .allocator import position_size_for
 from .simple_trader import SimpleTrader
 from .executor import OrderExecutor
+from .executor_pool import ExecutorPool
 from .logging_config import setup_logging
-from .config import BUY_PRICE_THRESHOLD, SELL_MULTIPLIER
+from .profiling import start_cycle, end_cycle, profile_cycle, cycle
+from .latency import latency_tracker
+from .price_verifier import price_verifier
+from .price_history import gamma_history
+from .order_tracker import OrderTracker
+from .order_manager import OrderManager
+from .metrics import start_metrics_server, SCAN_DURATION, OPEN_POSITIONS, QUEUE_DEPTH
+from .catalog_snapshot import save_opportunities, load_opportunities, load_raw_catalog
+from .opportunity_stream import OpportunityStream
+from .config import BUY_PRICE_THRESHOLD, SELL_MULTIPLIER, SCAN_WORKERS
+from .config import SCAN_FETCH_MODE, SCAN_MIN_LIQUIDITY, SCAN_MIN_VOLUME, SCAN_ORDER, VERIFY_WITH_CLOB
+from .config import PUBLISH_CATALOG_SNAPSHOT, RECORD_RAW_CATALOG, WARM_START, WARM_START_MAX_AGE, WALLETS
+from .config import METRICS_PORT, METRICS_HOST
+from .config import (
+    SCAN_INTERVAL, EXIT_CHECK_INTERVAL, SETTLE_INTERVAL, RECONCILE_INTERVAL,
+    CANDIDATE_QUEUE_SIZE, ORDER_QUEUE_SIZE, VERIFY_BATCH_SIZE, ORDER_BATCH_SIZE, ORDER_SUBMITTERS,
+    STALE_ORDER_MAX_AGE, STALE_ORDER_MAX_DISTANCE, STALE_ORDER_MAX_REPRICE
+)
 
 logger = logging.getLogger(__name__)
 
 class SimpleCryptoBot:
     def __init__(self):
-        self.executor = OrderExecutor()
+        self.executor = None  # נבנה ב-start במקביל לסריקה הראשונה
         self.trader = None  # יאותחל אחרי שנקבל את היתרה
-        self.seen_opportunities = set()
+        self.ready = asyncio.Event()  # executor + trader מוכנים
+        self.order_tracker = None
+        self.order_manager = None
+        self.opportunity_stream = OpportunityStream()  # diff מול הסריקה הקודמת + cooldown לכניסה חוזרת
         self.running = True
         self.position_size = MIN_POSITION_USD  # ברירת מחדל
+        self.cycle_number = 0
+
+        # תורים בין השלבים - חסומים כדי שיהיה backpressure
+        self.candidates: asyncio.Queue = asyncio.Queue(maxsize=CANDIDATE_QUEUE_SIZE)
+        self.orders: asyncio.Queue = asyncio.Queue(maxsize=ORDER_QUEUE_SIZE)
+        self.dropped_candidates = 0
 
     async def _init_position_size(self):
-        """מחשב גודל פוזיציה לפי אחוז מהתיק"""
+        """מחשב גודל פוזיציה לפי אחוז מהתיק (היתרה נשמרת ל-allocator כתקציב הכולל)"""
+        balance = None
         try:
             balance = await self.executor.get_usdc_balance()
-            calculated_size = balance * PORTFOLIO_PERCENT  # 0.5% מהתיק
-            self.position_size = max(calculated_size, MIN_POSITION_USD)  # מינימום $1
+            self.position_size = position_size_for(balance)  # 0.5% מהתיק, מינימום $1
             logger.info(f"💰 יתרה: ${balance:.2f} | גודל פוזיציה: ${self.position_size:.2f} ({PORTFOLIO_PERCENT*100}%)")
         except Exception as e:
             logger.warning(f"⚠️ לא הצלחתי לקבל יתרה: {e}, משתמש בברירת מחדל ${MIN_POSITION_USD}")
             self.position_size = MIN_POSITION_USD
-        
-        self.trader = SimpleTrader(self.executor, self.position_size)
+
+        self.trader = SimpleTrader(self.executor, self.position_size, balance_usd=balance)
+        self.order_tracker = OrderTracker(self.executor, self.trader)
+        self.order_manager = OrderManager(
+            self.executor, self.trader, price_verifier, BUY_PRICE_THRESHOLD,
+            max_age=STALE_ORDER_MAX_AGE, max_distance=STALE_ORDER_MAX_DISTANCE,
+            max_reprice=STALE_ORDER_MAX_REPRICE
+        )
+
+    async def _init_trading(self):
+        """בניית ה-client (ייבוא כבד + גזירת כתובת) ב-thread, ואז יתרה וגודל פוזיציה."""
+        started = time.perf_counter()
+        # כמה ארנקים מוגדרים -> ExecutorPool עם אותו ממשק; היתרה היא סך כל הארנקים
+        self.executor = await asyncio.to_thread(ExecutorPool.from_config if len(WALLETS) > 1 else OrderExecutor)
+        await self._init_position_size()
+        self.ready.set()
+        logger.info(f"⚡ מוכן למסחר אחרי {time.perf_counter() - started:.2f}s")
+
+    async def _wait_ready(self) -> bool:
+        """מחכה ש-executor/trader יהיו מוכנים. False אם הבוט נעצר בינתיים."""
+        while self.running and not self.ready.is_set():
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout=1.0)
+            except asyncio.TimeoutError:
+                pass
+        return self.running
+
+    async def _idle(self, seconds: float):
+        """שינה שמתעוררת מהר כש-self.running נכבה."""
+        remaining = seconds
+        while self.running and remaining > 0:
+            await asyncio.sleep(min(1.0, remaining))
+            remaining -= 1.0
+
+    async def _next_item(self, queue: asyncio.Queue):
+        """מחכה לפריט מהתור, אבל חוזר כל שנייה כדי לבדוק את self.running."""
+        try:
+            return await asyncio.wait_for(queue.get(), timeout=1.0)
+        except asyncio.TimeoutError:
+            return None
+
+    def _log_queue_depths(self):
+        QUEUE_DEPTH.labels("candidates").set(self.candidates.qsize())
+        QUEUE_DEPTH.labels("orders").set(self.orders.qsize())
+        logger.info(
+            f"📬 תורים | candidates={self.candidates.qsize()}/{self.candidates.maxsize} "
+            f"orders={self.orders.qsize()}/{self.orders.maxsize} "
+            f"dropped={self.dropped_candidates} open_positions={len(self.trader.open_positions) if self.trader else 0}"
+        )
+
+    def _run_scan(self) -> List[Dict]:
+        """הסריקה עצמה (רצה ב-thread כדי לא לחסום את שאר השלבים)."""
+        with profile_cycle(self.cycle_number):
+            # הגדרות: סורק הכל עם threshold מהקונפיג
+            logger.info(f"🔍 סורק שווקים עם threshold: ${BUY_PRICE_THRESHOLD}")
+            opps = scan_extreme_price_markets(
+                min_hours_until_close=1,
+                low_price_threshold=BUY_PRICE_THRESHOLD,
+                focus_crypto=False,
+                workers=SCAN_WORKERS,
+                fetch_mode=SCAN_FETCH_MODE,
+                min_liquidity=SCAN_MIN_LIQUIDITY,
+                min_volume=SCAN_MIN_VOLUME,
+                order=SCAN_ORDER,
+                publish_catalog=PUBLISH_CATALOG_SNAPSHOT,
+                record_raw=RECORD_RAW_CATALOG
+            )
+            if WARM_START and opps:
+                save_opportunities(opps)
+            return opps
+
+    def _load_warm_start(self) -> List[Dict]:
+        """ההזדמנויות מההפעלה הקודמת, או הקטלוג המוקלט מסונן מחדש אם אין כאלה."""
+        opps = load_opportunities(WARM_START_MAX_AGE)
+        if opps is None:
+            markets = load_raw_catalog(max_age=WARM_START_MAX_AGE)
+            opps = filter_catalog(
+                markets, min_hours_until_close=1, low_price_threshold=BUY_PRICE_THRESHOLD,
+                min_liquidity=SCAN_MIN_LIQUIDITY, min_volume=SCAN_MIN_VOLUME
+            ) if markets else []
+        now = time.monotonic()
+        return [
+            dict(opp, timestamps={"received": now, "filtered": now})
+            for opp in opps if opp.get("hours_until_close", 0) >= 1
+        ]
+
+    async def _warm_start(self):
+        """
+        מכניס לתור את ההזדמנויות השמורות בזמן שהסריקה הראשונה רצה. המחירים ישנים,
+        לכן רק כשהמאמת בודק כל אחת מול ה-CLOB לפני שליחה.
+        """
+        if not WARM_START:
+            return
+        if not VERIFY_WITH_CLOB:
+            logger.info("⏭️ Warm start כבוי - בלי VERIFY_WITH_CLOB המחירים השמורים לא נבדקים")
+            return
+        opps = await asyncio.to_thread(self._load_warm_start)
+        queued = 0
+        for opp in opps:
+            if not self.opportunity_stream.ready(opp["token_id"]):
+                continue
+            try:
+                self.candidates.put_nowait(opp)
+                self.opportunity_stream.mark_queued(opp["token_id"])
+                queued += 1
+            except asyncio.QueueFull:
+                break  # הסריקה הטרייה תביא את השאר
+        if queued:
+            logger.info(f"⚡ Warm start: {queued} הזדמנויות שמורות נכנסו לתור האימות")
+
+    async def _scan_cycle(self):
+        """מחזור אחד של ה-producer: סריקה + דחיפה לתור של מה שהשתנה מאז הסריקה הקודמת."""
+        self.cycle_number += 1
+        start_cycle()
+        with SCAN_DURATION.time():
+            opps = await asyncio.to_thread(self._run_scan)
+        gamma_history.record_prices((opp["token_id"], opp["price"]) for opp in opps)
+
+        diff = self.opportunity_stream.update(opps)
+        queued = 0
+        for opp in diff.to_check():
+            token_id = opp["token_id"]
+            if not self.opportunity_stream.ready(token_id):
+                continue
+            if self.trader and token_id in self.trader.open_positions:
+                continue  # כבר מחזיקים - אין מה לאמת
+            try:
+                self.candidates.put_nowait(opp)
+                self.opportunity_stream.mark_queued(token_id)
+                queued += 1
+            except asyncio.QueueFull:
+                # backpressure: לא מחכים לשלבים האיטיים - ההזדמנות תחזור (כחדשה) בסריקה הבאה
+                self.dropped_candidates += 1
+                self.opportunity_stream.forget(token_id)
+        logger.info(f"🔀 שינויים מהסריקה הקודמת: {diff.summary()} | נכנסו לתור: {queued}")
+        end_cycle()
+        self._log_queue_depths()
+        latency_tracker.maybe_export()
 
     async def _scan_loop(self):
         while self.running:
             try:
-                # הגדרות: סורק הכל עם threshold מהקונפיג
-                logger.info(f"🔍 סורק שווקים עם threshold: ${BUY_PRICE_THRESHOLD}")
-                opps = scan_extreme_price_markets(
-                    min_hours_until_close=1, 
-                    low_price_threshold=BUY_PRICE_THRESHOLD,
-                    focus_crypto=False
-                )
-                
-                for opp in opps:
-                    if opp["token_id"] not in self.seen_opportunities:
-                        self.seen_opportunities.add(opp["token_id"])
-                        await self.trader.check_entry(opp)
-                
-                await asyncio.sleep(300) # סריקה כל 5 דקות
+                await self._scan_cycle()
+                await self._idle(SCAN_INTERVAL)
             except Exception as e:
                 logger.error(f"שגיאה בסריקה: {e}")
-                await asyncio.sleep(60)
+                await self._idle(60)
+
+    async def _verify_loop(self):
+        """מאמת מחירים מול ה-CLOB ב-batches ומעביר לתור הפקודות."""
+        while self.running:
+            first = await self._next_item(self.candidates)
+            if first is None:
+                continue
+            batch = [first]
+            while len(batch) < VERIFY_BATCH_SIZE and not self.candidates.empty():
+                batch.append(self.candidates.get_nowait())
+            try:
+                if VERIFY_WITH_CLOB:
+                    batch = await asyncio.to_thread(
+                        price_verifier.verify_opportunities, batch, BUY_PRICE_THRESHOLD
+                    )
+                for opp in batch:
+                    await self.orders.put(opp)
+            except Exception as e:
+                logger.error(f"שגיאה באימות מחירים: {e}")
+
+    async def _submit_loop(self, worker_id: int):
+        """
+        שולח פקודות כניסה ב-batches: כל מה שמחכה בתור (עד ORDER_BATCH_SIZE) מוקצה
+        ונשלח יחד. כמה workers רצים במקביל (ORDER_SUBMITTERS).
+        """
+        while self.running:
+            first = await self._next_item(self.orders)
+            if first is None:
+                continue
+            if not await self._wait_ready():
+                return
+            batch = [first]
+            while len(batch) < ORDER_BATCH_SIZE and not self.orders.empty():
+                batch.append(self.orders.get_nowait())
+            try:
+                with cycle(f"submit[{worker_id}]"):
+                    await self.trader.enter_batch(batch)
+            except Exception as e:
+                logger.error(f"שגיאה בשליחת פקודה (worker {worker_id}): {e}")
+
+    async def _exit_loop(self):
+        """בודק את הפוזיציות הפתוחות מול ה-best bid ומוכר כשהיעד הושג."""
+        if not await self._wait_ready():
+            return
+        while self.running:
+            try:
+                token_ids = [token_id for token_id, pos in self.trader.positions()
+                             if not pos.get("exit_order_id")]
+                if token_ids:
+                    quotes = await asyncio.to_thread(price_verifier.get_quotes, token_ids)
+                    for token_id, (best_bid, _) in quotes.items():
+                        if best_bid:
+                            await self.trader.check_exit(token_id, best_bid)
+            except Exception as e:
+                logger.error(f"שגיאה בבדיקת יציאות: {e}")
+            await self._idle(EXIT_CHECK_INTERVAL)
+
+    def _maintain_orders(self):
+        """
+        התאמה מול ה-CLOB ואז ביטול/החלפה של פקודות ישנות (באותו סדר, כדי לא לפספס מילויים),
+        ובסוף רענון היתרה וה-ledger של הארנקים.
+        """
+        with cycle("reconcile"):
+            self.order_tracker.reconcile()
+            self.order_manager.run()
+            balance = self.executor.refresh_balance()
+        if balance is not None:
+            self.trader.balance_usd = balance
+
+    async def _reconcile_loop(self):
+        """מתאים את מצב הפקודות (מילויים/ביטולים) ומחליף פקודות ישנות, בקריאות bulk."""
+        if not await self._wait_ready():
+            return
+        while self.running:
+            try:
+                await asyncio.to_thread(self._maintain_orders)
+            except Exception as e:
+                logger.error(f"שגיאה בהתאמת פקודות: {e}")
+            await self._idle(RECONCILE_INTERVAL)
+
+    async def _settle_loop(self):
+        if not await self._wait_ready():
+            return
+        while self.running:
+            try:
+                await self.executor.check_and_settle_positions()
+            except Exception as e:
+                logger.error(f"שגיאה ב-settlement: {e}")
+            await self._idle(SETTLE_INTERVAL)
+
+    def stop(self):
+        """עצירה מסודרת - כל השלבים יוצאים אחרי הפריט הנוכחי."""
+        self.running = False
 
     async def start(self):
-        await self._init_position_size()  # מחשב גודל פוזיציה לפי יתרה
+        start_metrics_server(METRICS_PORT, METRICS_HOST)
+        OPEN_POSITIONS.set_function(lambda: len(self.trader.open_positions) if self.trader else 0)
         logger.info(f"🚀 הבוט התחיל סריקה גלובלית למחירים ≤ ${BUY_PRICE_THRESHOLD}")
         logger.info(f"📊 מכפיל מכירה: {SELL_MULTIPLIER}x (target: ${BUY_PRICE_THRESHOLD * SELL_MULTIPLIER})")
-        await asyncio.gather(self._scan_loop())
+        await asyncio.gather(
+            self._init_trading(),  # client + יתרה + גודל פוזיציה, במקביל לסריקה
+            self._warm_start(),
+            self._scan_loop(),
+            self._verify_loop(),
+            *(self._submit_loop(i) for i in range(ORDER_SUBMITTERS)),
+            self._exit_loop(),
+            self._reconcile_loop(),
+            self._settle_loop(),
+        )
 
 async def main():
     setup_logging()
@@ -64,4 +333,4 @@ async def main():
     await bot.start()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -1,71 +1,688 @@
 # simple_scanner.py
 import requests
+import heapq
+import json
 import logging
+import math
+import multiprocessing
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+from .config import GAMMA_API_URL
+from .profiling import stage, count, start_cycle, current_cycle
+from .price_verifier import price_verifier
+from .catalog_snapshot import publish_snapshot, record_raw_catalog
+from .metrics import api_call, MARKETS_BY_STAGE, REJECTIONS, OPPORTUNITIES
 
 logger = logging.getLogger(__name__)
 
-GAMMA_API_URL = "https://gamma-api.polymarket.com"
+GAMMA_HOST = urlsplit(GAMMA_API_URL).netloc
+
+PAGE_LIMIT = 500
+MAX_MARKETS = 1500        # מקסימום שווקים מ-/markets
+MAX_EVENTS_OFFSET = 3000  # מקסימום 3000 events (כדי לתפוס את Bitcoin above שנמצא ב-offset 2000+)
+
+# השדות ששורת קטלוג מצומצמת שומרת (snapshot / הקלטה בסריקה מפוצלת)
+CATALOG_ROW_FIELDS = (
+    "question", "conditionId", "endDate", "clobTokenIds", "outcomePrices",
+    "active", "closed", "liquidityNum", "volumeNum", "_event_id", "_event_title",
+)
+
+# pool של תהליכים לסריקה מפוצלת - נוצר פעם אחת ומשמש את כל הסריקות. spawn ולא fork:
+# ה-pool נוצר מה-thread של הסריקה בתהליך שכבר מריץ threads (ארנקים, מאמת, metrics),
+# ו-fork היה מעתיק ל-worker locks שמוחזקים ע"י threads שלא קיימים בו
+_shard_pool: Optional[ProcessPoolExecutor] = None
+_shard_pool_size = 0
+
+
+def build_fetch_options(
+    fetch_mode: str = "full",
+    min_hours_until_close: int = 0,
+    min_liquidity: float = 0,
+    min_volume: float = 0,
+    order: Optional[str] = None,
+    ascending: bool = False
+) -> Dict:
+    """
+    בונה את ה-query string לכל endpoint.
+    full = ההתנהגות הרגילה (active/closed בלבד).
+    minimal = הפילטרים של השוק (זמן סגירה / נזילות / נפח) עוברים גם לשרת ב-/markets.
+    ב-/events הם לא נשלחים: שם הם חלים על האירוע כולו ויכולים להפיל שווקים שעוברים אותם.
+    בשני המצבים _filter_markets מפעיל אותם שוב על כל שוק.
+    """
+    base = "active=true&closed=false"
+    if fetch_mode != "minimal":
+        return {"markets_query": base, "events_query": base, "minimal": False}
+
+    end_date_min = (datetime.now(timezone.utc) + timedelta(hours=min_hours_until_close)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    markets_query = f"{base}&end_date_min={end_date_min}"
+    events_query = base
+    if min_liquidity:
+        markets_query += f"&liquidity_num_min={min_liquidity}"
+    if min_volume:
+        markets_query += f"&volume_num_min={min_volume}"
+    if order:
+        direction = "true" if ascending else "false"
+        markets_query += f"&order={order}&ascending={direction}"
+        events_query += f"&order={order}&ascending={direction}"
+    return {"markets_query": markets_query, "events_query": events_query, "minimal": True}
+
+
+def _get_json(url: str, stage_name: str) -> Tuple[List[Dict], float]:
+    """GET + פענוח JSON, עם מדידת זמן רשת וזמן פענוח בנפרד. מחזיר גם את זמן קבלת התשובה."""
+    with stage(stage_name), api_call(GAMMA_HOST):
+        response = requests.get(url, timeout=30)
+        response.raise_for_status()
+    received_at = time.monotonic()
+    count("requests")
+    count("bytes", len(response.content))
+    with stage("decode"):
+        return response.json(), received_at
+
+
+def _fetch_markets_page(offset: int, limit: int = PAGE_LIMIT, fetch_opts: Optional[Dict] = None) -> List[Dict]:
+    """מושך עמוד אחד מ-/markets."""
+    fetch_opts = fetch_opts or build_fetch_options()
+    url = f"{GAMMA_API_URL}/markets?{fetch_opts['markets_query']}&limit={limit}&offset={offset}"
+    batch, received_at = _get_json(url, "fetch_markets")
+    for m in batch:
+        m["_received_at"] = received_at  # בשביל מדידת tick-to-trade
+    return batch
+
+
+def _fetch_events_page(offset: int, limit: int = PAGE_LIMIT, fetch_opts: Optional[Dict] = None) -> List[Dict]:
+    """מושך עמוד אחד מ-/events (עם markets מוטמעים)."""
+    fetch_opts = fetch_opts or build_fetch_options()
+    url = f"{GAMMA_API_URL}/events?{fetch_opts['events_query']}&limit={limit}&offset={offset}"
+    batch, received_at = _get_json(url, "fetch_events")
+    for event in batch:
+        for m in event.get("markets", []):
+            m["_received_at"] = received_at
+            # שיוך לאירוע - בשביל כלי הבדיקה (ladders)
+            m["_event_id"] = event.get("id")
+            m["_event_title"] = event.get("title")
+    return batch
+
+
+def _new_stats() -> Dict:
+    """סטטיסטיקות לדיבוג"""
+    return {
+        "markets_total": 0,
+        "after_active_filter": 0,
+        "after_time_filter": 0,
+        "after_tradable_filter": 0,
+        "price_fetch_success": 0,
+        "price_fetch_fail": 0,
+        "prices_seen": [],
+        "num_below_threshold": 0,
+        # סיבות פסילה
+        "rejected_inactive": 0,
+        "rejected_no_keyword": 0,
+        "rejected_no_enddate": 0,
+        "rejected_closing_soon": 0,
+        "rejected_low_liquidity": 0,
+        "rejected_low_volume": 0,
+        "rejected_no_tokens": 0,
+        "rejected_bad_tokens": 0
+    }
+
+
+def _merge_stats(total: Dict, part: Dict) -> None:
+    """מאחד סטטיסטיקות של shard לתוך הסטטיסטיקות הכוללות."""
+    for key, value in part.items():
+        if key == "prices_seen":
+            total[key].extend(value)
+        else:
+            total[key] += value
+
+
+# משקלות הדירוג של הזדמנויות (top-K)
+SCORE_WEIGHT_PRICE = 2.0       # כמה המחיר רחוק מתחת ל-threshold
+SCORE_WEIGHT_HOURS = 1.0       # יותר זמן עד הסגירה = יותר סיכוי להכפיל
+SCORE_MAX_HOURS = 168.0        # מעבר לשבוע זה כבר לא משנה
+SCORE_WEIGHT_LIQUIDITY = 0.1   # לוגריתמי - נזילות עוזרת למלא ולצאת
+SCORE_WEIGHT_VOLUME = 0.05
+
+
+def score_opportunity(
+    price: float,
+    hours_until_close: float,
+    liquidity: float,
+    volume: float,
+    low_price_threshold: float
+) -> float:
+    """ציון להזדמנות - גבוה יותר = עדיף."""
+    return (
+        SCORE_WEIGHT_PRICE * (1 - price / low_price_threshold)
+        + SCORE_WEIGHT_HOURS * min(hours_until_close, SCORE_MAX_HOURS) / SCORE_MAX_HOURS
+        + SCORE_WEIGHT_LIQUIDITY * math.log1p(max(liquidity, 0))
+        + SCORE_WEIGHT_VOLUME * math.log1p(max(volume, 0))
+    )
+
+
+def _push_top_k(heap: List[Tuple[float, int, Dict]], k: int, seq: int, opp: Dict) -> None:
+    """heap מינימום בגודל k לכל היותר - שומר רק את k ההזדמנויות עם הציון הגבוה."""
+    entry = (opp["score"], seq, opp)
+    if len(heap) < k:
+        heapq.heappush(heap, entry)
+    elif entry[0] > heap[0][0]:
+        heapq.heapreplace(heap, entry)
+
+
+def _as_float(value) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _filter_markets(
+    markets: List[Dict],
+    min_hours_until_close: int,
+    low_price_threshold: float,
+    focus_crypto: bool,
+    top_k: int,
+    verbose_rejections: bool,
+    min_liquidity: float = 0,
+    min_volume: float = 0
+) -> Tuple[List[Dict], Dict, List[Dict]]:
+    """
+    מסנן רשימת שווקים ומחזיר (הזדמנויות, סטטיסטיקות, דוגמאות לדיבוג).
+    עובר על כל הרשימה ושומר רק את top_k ההזדמנויות עם הציון הגבוה (ממוינות מהטובה לגרועה).
+    """
+    stats = _new_stats()
+    stats["markets_total"] = len(markets)
+
+    top: List[Tuple[float, int, Dict]] = []
+    seq = 0
+    now = datetime.now(timezone.utc)
+    min_close_time = now + timedelta(hours=min_hours_until_close)
+
+    # דוגמאות לדיבוג (10 ראשונים)
+    debug_samples = []
+
+    for m in markets:
+        question = m.get("question", "")
+        question_lower = question.lower()
+
+        # בדיקת תקינות בסיסית
+        if not m.get("active") or m.get("closed"):
+            stats["rejected_inactive"] += 1
+            if verbose_rejections and stats["rejected_inactive"] <= 3:
+                logger.debug(f"   ⏭️ נפסל (לא פעיל/סגור): {question[:50]}")
+            continue
+        stats["after_active_filter"] += 1
+
+        # סינון קריפטו אם מבוקש
+        if focus_crypto:
+            crypto_keywords = ["bitcoin", "btc", "$btc", "ethereum", "eth", "$eth",
+                             "crypto", "cryptocurrency", "sol", "solana"]
+            if not any(kw in question_lower for kw in crypto_keywords):
+                stats["rejected_no_keyword"] += 1
+                if verbose_rejections and stats["rejected_no_keyword"] <= 3:
+                    logger.debug(f"   ⏭️ נפסל (לא קריפטו): {question[:50]}")
+                continue
+
+        # בדיקת זמן סגירה
+        end_date_str = m.get("endDate")
+        if not end_date_str:
+            stats["rejected_no_enddate"] += 1
+            if verbose_rejections and stats["rejected_no_enddate"] <= 3:
+                logger.debug(f"   ⏭️ נפסל (אין תאריך סגירה): {question[:50]}")
+            continue
+
+        try:
+            end_date = datetime.fromisoformat(end_date_str.replace('Z', '+00:00'))
+            hours_until_close = (end_date - now).total_seconds() / 3600
+            if end_date < min_close_time:
+                stats["rejected_closing_soon"] += 1
+                if verbose_rejections and stats["rejected_closing_soon"] <= 3:
+                    logger.debug(f"   ⏭️ נפסל (נסגר בקרוב - {hours_until_close:.1f}h): {question[:50]}")
+                continue
+            stats["after_time_filter"] += 1
+        except:
+            stats["rejected_no_enddate"] += 1
+            continue
+
+        # נזילות / נפח - לכל שוק בנפרד (ב-/events הפילטר של השרת חל על האירוע, ב-full אין פילטר בשרת)
+        liquidity = _as_float(m.get("liquidityNum"))
+        volume = _as_float(m.get("volumeNum"))
+        if liquidity < min_liquidity:
+            stats["rejected_low_liquidity"] += 1
+            if verbose_rejections and stats["rejected_low_liquidity"] <= 3:
+                logger.debug(f"   ⏭️ נפסל (נזילות ${liquidity:.0f}): {question[:50]}")
+            continue
+        if volume < min_volume:
+            stats["rejected_low_volume"] += 1
+            if verbose_rejections and stats["rejected_low_volume"] <= 3:
+                logger.debug(f"   ⏭️ נפסל (נפח ${volume:.0f}): {question[:50]}")
+            continue
+
+        # בדיקת tokens
+        token_ids = m.get("clobTokenIds")
+        if not token_ids:
+            stats["rejected_no_tokens"] += 1
+            if verbose_rejections and stats["rejected_no_tokens"] <= 3:
+                logger.debug(f"   ⏭️ נפסל (אין clobTokenIds): {question[:50]}")
+            continue
+
+        if isinstance(token_ids, str):
+            try:
+                token_ids = json.loads(token_ids)
+            except:
+                stats["rejected_bad_tokens"] += 1
+                continue
+
+        if not token_ids or len(token_ids) < 2:
+            stats["rejected_bad_tokens"] += 1
+            if verbose_rejections and stats["rejected_bad_tokens"] <= 3:
+                logger.debug(f"   ⏭️ נפסל (tokens לא תקינים): {question[:50]}")
+            continue
+        stats["after_tradable_filter"] += 1
+
+        # שלב 1: סינון מהיר לפי outcomePrices (לא קוראים ל-CLOB לכולם)
+        outcome_prices_gamma = m.get("outcomePrices", [])
+        if isinstance(outcome_prices_gamma, str):
+            try:
+                outcome_prices_gamma = json.loads(outcome_prices_gamma)
+            except:
+                outcome_prices_gamma = []
+
+        # בודקים אם יש מחיר זול לפי outcomePrices (סינון ראשוני)
+        has_cheap_gamma_price = False
+        for p in outcome_prices_gamma:
+            try:
+                if 0.0001 <= float(p) <= low_price_threshold:
+                    has_cheap_gamma_price = True
+                    break
+            except:
+                pass
+
+        if not has_cheap_gamma_price:
+            continue  # דילוג - אין טעם לקרוא ל-CLOB
+
+        # שלב 2: רק לשווקים עם מחיר זול פוטנציאלי - משתמשים ב-outcomePrices ישירות
+        # (כדי לא להאט את הסורק עם קריאות CLOB)
+        try:
+            yes_token_id = token_ids[0]
+            no_token_id = token_ids[1] if len(token_ids) > 1 else None
+
+            yes_price = float(outcome_prices_gamma[0]) if len(outcome_prices_gamma) > 0 else 0
+            no_price = float(outcome_prices_gamma[1]) if len(outcome_prices_gamma) > 1 else 0
+
+            stats["price_fetch_success"] += 1
+            stats["prices_seen"].append(yes_price)
+            stats["prices_seen"].append(no_price)
+
+            # שמירת דוגמה לדיבוג
+            if len(debug_samples) < 10:
+                gamma_yes = float(outcome_prices_gamma[0]) if len(outcome_prices_gamma) > 0 else None
+                gamma_no = float(outcome_prices_gamma[1]) if len(outcome_prices_gamma) > 1 else None
+                debug_samples.append({
+                    "title": m.get("question", "")[:60],
+                    "outcome": f"YES@${yes_price:.4f} / NO@${no_price:.4f}",
+                    "gamma_price": gamma_yes,
+                    "best_ask": yes_price,
+                    "opposite_price": no_price,
+                    "hours_until_close": round(hours_until_close, 1)
+                })
+
+            filtered_at = time.monotonic()
+            received_at = m.get("_received_at", filtered_at)
+
+            # בדיקה 1: YES מתחת ל-threshold
+            if 0.0001 <= yes_price <= low_price_threshold:
+                stats["num_below_threshold"] += 1
+                seq += 1
+                _push_top_k(top, top_k, seq, {
+                    "question": m.get("question", "Unknown"),
+                    "side": "YES",
+                    "price": yes_price,
+                    "token_id": yes_token_id,
+                    "hours_until_close": round(hours_until_close, 1),
+                    "condition_id": m.get("conditionId"),
+                    "timestamps": {"received": received_at, "filtered": filtered_at},
+                    "score": score_opportunity(yes_price, hours_until_close, liquidity, volume, low_price_threshold)
+                })
+
+            # בדיקה 2: NO מתחת ל-threshold
+            if no_token_id and 0.0001 <= no_price <= low_price_threshold:
+                stats["num_below_threshold"] += 1
+                seq += 1
+                _push_top_k(top, top_k, seq, {
+                    "question": m.get("question", "Unknown"),
+                    "side": "NO",
+                    "price": no_price,
+                    "token_id": no_token_id,
+                    "hours_until_close": round(hours_until_close, 1),
+                    "condition_id": m.get("conditionId"),
+                    "timestamps": {"received": received_at, "filtered": filtered_at},
+                    "score": score_opportunity(no_price, hours_until_close, liquidity, volume, low_price_threshold)
+                })
+
+        except Exception as e:
+            stats["price_fetch_fail"] += 1
+            if verbose_rejections and stats["price_fetch_fail"] <= 3:
+                logger.debug(f"   ⏭️ נפסל (שגיאת מחיר): {question[:40]} - {str(e)[:30]}")
+            continue
+
+    opportunities = [opp for _, _, opp in sorted(top, reverse=True)]
+    return opportunities, stats, debug_samples
+
+
+# תיאור לכל סיבת פסילה ב-stats (לפי סדר הבדיקות ב-_filter_markets)
+REJECTION_REASONS = {
+    "rejected_inactive": "לא פעיל/סגור",
+    "rejected_no_keyword": "לא קריפטו",
+    "rejected_no_enddate": "אין תאריך סגירה",
+    "rejected_closing_soon": "נסגר בקרוב",
+    "rejected_low_liquidity": "נזילות נמוכה",
+    "rejected_low_volume": "נפח נמוך",
+    "rejected_no_tokens": "אין tokens",
+    "rejected_bad_tokens": "tokens לא תקינים",
+    "price_fetch_fail": "שגיאת מחיר",
+}
+
+
+def explain_market(
+    market: Dict,
+    min_hours_until_close: int = 0,
+    low_price_threshold: float = 0.01,
+    focus_crypto: bool = False,
+    min_liquidity: float = 0,
+    min_volume: float = 0
+) -> str:
+    """מריץ את אותם פילטרים על שוק בודד ומחזיר למה הוא נפסל (או שעבר)."""
+    opportunities, stats, _ = _filter_markets(
+        [market], min_hours_until_close, low_price_threshold, focus_crypto,
+        top_k=2, verbose_rejections=False, min_liquidity=min_liquidity, min_volume=min_volume
+    )
+    for key, reason in REJECTION_REASONS.items():
+        if stats[key]:
+            return reason
+    if opportunities:
+        sides = ", ".join(f"{opp['side']} @ ${opp['price']:.4f}" for opp in opportunities)
+        return f"עבר את כל הפילטרים: {sides}"
+    return f"אין outcome במחיר ≤ ${low_price_threshold} (outcomePrices: {market.get('outcomePrices')})"
+
+
+def filter_catalog(
+    markets: List[Dict],
+    min_hours_until_close: int = 0,
+    low_price_threshold: float = 0.01,
+    focus_crypto: bool = False,
+    max_price_checks: int = 5000,
+    min_liquidity: float = 0,
+    min_volume: float = 0
+) -> List[Dict]:
+    """אותם פילטרים על קטלוג שכבר נטען (למשל הקטלוג המוקלט, ב-warm start) - בלי לפנות ל-API."""
+    opportunities, _, _ = _filter_markets(
+        markets, min_hours_until_close, low_price_threshold, focus_crypto,
+        top_k=max_price_checks, verbose_rejections=False, min_liquidity=min_liquidity, min_volume=min_volume
+    )
+    return opportunities
+
+
+# שלבי הסינון (לפי הסדר) -> label של polybot_scan_markets
+MARKET_STAGES = {
+    "markets_total": "total",
+    "after_active_filter": "active",
+    "after_time_filter": "time",
+    "after_tradable_filter": "tradable",
+    "price_fetch_success": "priced",
+    "num_below_threshold": "below_threshold",
+}
+
+
+def _record_scan_metrics(stats: Dict, opportunities: List[Dict]) -> None:
+    """הסטטיסטיקות של הסריקה -> metrics (אחרי איחוד ה-shards, בתהליך הראשי)."""
+    for key, label in MARKET_STAGES.items():
+        MARKETS_BY_STAGE.labels(label).set(stats[key])
+    for key in REJECTION_REASONS:
+        if stats[key]:
+            REJECTIONS.labels(key.replace("rejected_", "")).inc(stats[key])
+    OPPORTUNITIES.set(len(opportunities))
+
+
+def _log_scan_summary(
+    stats: Dict,
+    debug_samples: List[Dict],
+    opportunities: List[Dict],
+    low_price_threshold: float,
+    focus_crypto: bool
+) -> None:
+    """הדפסת סטטיסטיקות מפורטות"""
+    logger.info(f"\n{'='*70}")
+    logger.info(f"📊 סטטיסטיקות סריקה:")
+    logger.info(f"   Markets total: {stats['markets_total']}")
+    logger.info(f"   ├─ After active filter: {stats['after_active_filter']}")
+    logger.info(f"   ├─ After time filter: {stats['after_time_filter']}")
+    logger.info(f"   └─ After tradable filter: {stats['after_tradable_filter']}")
+    logger.info(f"   Price fetches: ✅ {stats['price_fetch_success']} | ❌ {stats['price_fetch_fail']}")
+
+    # הדפסת סיבות פסילה
+    logger.info(f"\n📋 סיבות פסילה:")
+    logger.info(f"   ├─ לא פעיל/סגור: {stats['rejected_inactive']}")
+    if focus_crypto:
+        logger.info(f"   ├─ לא קריפטו: {stats['rejected_no_keyword']}")
+    logger.info(f"   ├─ אין תאריך סגירה: {stats['rejected_no_enddate']}")
+    logger.info(f"   ├─ נסגר בקרוב: {stats['rejected_closing_soon']}")
+    logger.info(f"   ├─ נזילות נמוכה: {stats['rejected_low_liquidity']}")
+    logger.info(f"   ├─ נפח נמוך: {stats['rejected_low_volume']}")
+    logger.info(f"   ├─ אין tokens: {stats['rejected_no_tokens']}")
+    logger.info(f"   └─ tokens לא תקינים: {stats['rejected_bad_tokens']}")
+
+    if stats["prices_seen"]:
+        prices = sorted(stats["prices_seen"])
+        logger.info(f"\n📈 התפלגות מחירים:")
+        logger.info(f"   ├─ Min: ${min(prices):.4f}")
+        logger.info(f"   ├─ P10: ${prices[len(prices)//10]:.4f}")
+        logger.info(f"   ├─ Median: ${statistics.median(prices):.4f}")
+        logger.info(f"   ├─ P90: ${prices[len(prices)*9//10]:.4f}")
+        logger.info(f"   └─ Max: ${max(prices):.4f}")
+
+    logger.info(f"\n🎯 Below threshold (${low_price_threshold}): {stats['num_below_threshold']}")
+    logger.info(f"{'='*70}\n")
+
+    # הדפסת דוגמאות - תמיד!
+    if debug_samples:
+        logger.info(f"🔬 דוגמאות מחירים ({len(debug_samples)} שווקים):")
+        for sample in debug_samples:
+            gamma = sample['gamma_price'] if sample['gamma_price'] else 0
+            logger.info(f"   • {sample['title']}")
+            logger.info(f"     {sample['outcome']} | Gamma: ${gamma:.4f} | {sample['hours_until_close']}h")
+        logger.info("")
+    else:
+        logger.info(f"⚠️ לא נאספו דוגמאות (אולי כל השווקים נדחו בפילטרים)\n")
+
+    if opportunities:
+        logger.info(f"🎯 נמצאו {len(opportunities)} הזדמנויות במחיר של ${low_price_threshold} ומטה!")
+        # מדפיס את כל ההזדמנויות (לא רק 5 ראשונות)
+        for opp in opportunities[:20]:  # מגביל ל-20 בלוגים
+            logger.info(f"  • {opp['question'][:60]} | {opp['side']} @ ${opp['price']:.4f}")
+        if len(opportunities) > 20:
+            logger.info(f"  ... ועוד {len(opportunities) - 20} הזדמנויות נוספות")
+    else:
+        logger.info(f"❌ לא נמצאו הזדמנויות במחיר של ${low_price_threshold} ומטה")
+
+
+def _recording_source(fetch_opts: Dict, scan: str) -> str:
+    """תיאור ההקלטה ל-inspect_catalog: סוג הסריקה, וב-minimal גם הפילטרים שרצו בצד השרת."""
+    if fetch_opts["minimal"]:
+        return f"{scan} scan, minimal fetch (server-side: {fetch_opts['markets_query']})"
+    return f"{scan} scan, full fetch"
+
+
+def _scan_shard(task: Tuple[str, int, Dict, Dict, bool]) -> Tuple[List[Dict], Dict, List[Dict], Tuple[Dict, Dict], List[Dict]]:
+    """
+    רץ בתהליך worker: מושך עמוד אחד (markets או events), מפענח ומסנן אותו.
+    מחזיר רק את ההזדמנויות הקומפקטיות + מונים, לא את ה-JSON הגולמי
+    (ואם מפרסמים snapshot - גם שורות קטלוג מצומצמות).
+    """
+    kind, offset, fetch_opts, params, with_catalog = task
+    cycle = start_cycle()
+    try:
+        if kind == "markets":
+            markets = _fetch_markets_page(offset, fetch_opts=fetch_opts)
+        else:
+            markets = [m for event in _fetch_events_page(offset, fetch_opts=fetch_opts) for m in event.get("markets", [])]
+    except Exception as e:
+        logger.debug(f"   ⚠️ שגיאה במשיכת {kind} offset={offset}: {e}")
+        return [], _new_stats(), [], (dict(cycle.stage_times), dict(cycle.counters)), []
+    count("markets_evaluated", len(markets))
+    with stage("filter"):
+        opportunities, stats, debug_samples = _filter_markets(markets, **params)
+    catalog = [{key: m.get(key) for key in CATALOG_ROW_FIELDS} for m in markets] if with_catalog else []
+    return opportunities, stats, debug_samples, (dict(cycle.stage_times), dict(cycle.counters)), catalog
+
+
+def _get_shard_pool(workers: int) -> ProcessPoolExecutor:
+    global _shard_pool, _shard_pool_size
+    if _shard_pool is None or _shard_pool_size != workers:
+        if _shard_pool is not None:
+            _shard_pool.shutdown(wait=False)
+        _shard_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        _shard_pool_size = workers
+    return _shard_pool
+
+
+def _scan_sharded(
+    workers: int,
+    fetch_opts: Dict,
+    params: Dict,
+    publish_catalog: bool = False,
+    record_raw: bool = False
+) -> Tuple[List[Dict], Dict, List[Dict]]:
+    """
+    סריקה מפוצלת: מרחב ה-offset של /markets ו-/events מחולק בין תהליכים.
+    כל worker מושך, מפענח ומסנן shard משלו; כאן רק ממזגים ומסירים כפילויות לפי conditionId.
+    """
+    with_catalog = publish_catalog or record_raw
+    tasks = [("markets", offset, fetch_opts, params, with_catalog) for offset in range(0, MAX_MARKETS, PAGE_LIMIT)]
+    tasks += [("events", offset, fetch_opts, params, with_catalog) for offset in range(0, MAX_EVENTS_OFFSET, PAGE_LIMIT)]
+
+    logger.info(f"🔍 סורק את כל השווקים בפולימרקט ({len(tasks)} shards על {workers} תהליכים)...")
+
+    stats = _new_stats()
+    opportunities = []
+    debug_samples = []
+    # שוק שמופיע בכמה shards (למשל גם ב-/markets וגם ב-/events) שייך ל-shard הראשון שדיווח עליו
+    owner_shard: Dict[str, int] = {}
+    catalog: Dict[str, Dict] = {}
+
+    pool = _get_shard_pool(workers)
+    for shard_idx, (shard_opps, shard_stats, shard_samples, shard_timing, shard_catalog) in enumerate(pool.map(_scan_shard, tasks)):
+        for row in shard_catalog:
+            existing = catalog.setdefault(row.get("conditionId") or str(len(catalog)), row)
+            if existing is not row and row.get("_event_id") and not existing.get("_event_id"):
+                existing["_event_id"] = row["_event_id"]
+                existing["_event_title"] = row["_event_title"]
+        # זמני ה-workers מצטברים (זמן CPU כולל על כל התהליכים, לא זמן קיר)
+        current_cycle().merge(*shard_timing)
+        _merge_stats(stats, shard_stats)
+        for opp in shard_opps:
+            condition_id = opp.get("condition_id") or opp["token_id"]
+            if owner_shard.setdefault(condition_id, shard_idx) == shard_idx:
+                opportunities.append(opp)
+        debug_samples.extend(shard_samples[:10 - len(debug_samples)])
+
+    logger.info(f"   └─ סה\"כ: {stats['markets_total']} שווקים נסרקו, {len(opportunities)} הזדמנויות ייחודיות")
+
+    if publish_catalog:
+        with stage("publish_snapshot"):
+            publish_snapshot(list(catalog.values()))
+    if record_raw:
+        # בסריקה מפוצלת ה-workers מחזירים רק שורות מצומצמות, אז זה מה שמוקלט (ומסומן ככזה)
+        with stage("record_raw"):
+            record_raw_catalog(list(catalog.values()), fields=CATALOG_ROW_FIELDS, source=_recording_source(fetch_opts, "sharded"))
+
+    # כל shard מחזיר את ה-top-K שלו; כאן בוחרים את ה-top-K של כל הסריקה
+    opportunities = heapq.nlargest(params["top_k"], opportunities, key=lambda opp: opp["score"])
+
+    return opportunities, stats, debug_samples
+
 
 def scan_extreme_price_markets(
     min_hours_until_close: int = 0,
     low_price_threshold: float = 0.01,
     focus_crypto: bool = False,
-    max_price_checks: int = 5000,  # הגדלנו ל-5000
-    verbose_rejections: bool = True  # לוגים מפורטים למה נפסל
+    max_price_checks: int = 5000,  # K - כמה הזדמנויות מובילות (לפי ציון) מחזירים
+    verbose_rejections: bool = True,  # לוגים מפורטים למה נפסל
+    workers: int = 0,  # 0/1 = תהליך יחיד, יותר = סריקה מפוצלת בין תהליכים
+    fetch_mode: str = "full",  # "minimal" = פילטרים גם בצד השרת (ב-/markets)
+    min_liquidity: float = 0,
+    min_volume: float = 0,
+    order: Optional[str] = None,
+    verify_prices: bool = False,  # אימות best ask מול ה-CLOB לפני שמחזירים
+    publish_catalog: bool = False,  # פרסום snapshot בינארי של הקטלוג לתהליכים אחרים
+    record_raw: bool = False  # הקלטת ה-JSON של הקטלוג (בשביל inspect_catalog)
 ) -> List[Dict]:
     """סורק מהיר של כל השווקים (עם פאג'ינציה) למציאת מחירים נמוכים."""
+    params = {
+        "min_hours_until_close": min_hours_until_close,
+        "low_price_threshold": low_price_threshold,
+        "focus_crypto": focus_crypto,
+        "top_k": max_price_checks,
+        "verbose_rejections": verbose_rejections,
+        "min_liquidity": min_liquidity,
+        "min_volume": min_volume,
+    }
+    fetch_opts = build_fetch_options(
+        fetch_mode, min_hours_until_close, min_liquidity, min_volume, order
+    )
     try:
+        if workers > 1:
+            opportunities, stats, debug_samples = _scan_sharded(workers, fetch_opts, params, publish_catalog, record_raw)
+            if verify_prices:
+                with stage("verify"):
+                    opportunities = price_verifier.verify_opportunities(opportunities, low_price_threshold)
+            with stage("log_summary"):
+                _record_scan_metrics(stats, opportunities)
+                _log_scan_summary(stats, debug_samples, opportunities, low_price_threshold, focus_crypto)
+            return opportunities
+
         markets = []
         offset = 0
-        limit = 500
-        max_markets = 1500  # מקסימום שווקים מ-/markets
-        
+
         # שלב 1: מושך markets ישירות
         logger.info(f"🔍 סורק את כל השווקים בפולימרקט...")
         logger.info(f"   📂 שלב 1: מושך markets ישירות...")
-        
-        while len(markets) < max_markets:
-            url = f"{GAMMA_API_URL}/markets?active=true&closed=false&limit={limit}&offset={offset}"
-            
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            batch = response.json()
-            
+
+        while len(markets) < MAX_MARKETS:
+            batch = _fetch_markets_page(offset, fetch_opts=fetch_opts)
+
             if not batch or len(batch) == 0:
                 break
-            
+
             markets.extend(batch)
-            
-            if len(batch) < limit:
+
+            if len(batch) < PAGE_LIMIT:
                 break
-            
-            offset += limit
-        
+
+            offset += PAGE_LIMIT
+
         logger.info(f"   ├─ מ-/markets: {len(markets)} שווקים")
-        
+
         # שלב 2: מושך events ומוציא markets מתוכם
         logger.info(f"   📂 שלב 2: מושך events עם markets מוטמעים...")
-        
+
         events_offset = 0
         events_count = 0
         markets_from_events = 0
-        seen_condition_ids = set(m.get("conditionId") for m in markets if m.get("conditionId"))
-        
-        while events_offset < 3000:  # מקסימום 3000 events (כדי לתפוס את Bitcoin above שנמצא ב-offset 2000+)
-            events_url = f"{GAMMA_API_URL}/events?active=true&closed=false&limit={limit}&offset={events_offset}"
-            
+        seen_condition_ids = {m.get("conditionId"): m for m in markets if m.get("conditionId")}
+
+        while events_offset < MAX_EVENTS_OFFSET:
             try:
-                events_response = requests.get(events_url, timeout=30)
-                events_response.raise_for_status()
-                events_batch = events_response.json()
-                
+                events_batch = _fetch_events_page(events_offset, fetch_opts=fetch_opts)
+
                 if not events_batch or len(events_batch) == 0:
                     break
-                
+
                 events_count += len(events_batch)
-                
+
                 # מוציא markets מתוך events
                 for event in events_batch:
                     event_markets = event.get("markets", [])
@@ -73,250 +690,43 @@ def scan_extreme_price_markets(
                         # רק אם לא ראינו כבר את השוק הזה
                         condition_id = m.get("conditionId")
                         if condition_id and condition_id not in seen_condition_ids:
-                            seen_condition_ids.add(condition_id)
+                            seen_condition_ids[condition_id] = m
                             markets.append(m)
                             markets_from_events += 1
-                
-                if len(events_batch) < limit:
+                        elif condition_id:
+                            # כבר הגיע מ-/markets - רק משלימים את השיוך לאירוע
+                            seen_condition_ids[condition_id].setdefault("_event_id", m.get("_event_id"))
+                            seen_condition_ids[condition_id].setdefault("_event_title", m.get("_event_title"))
+
+                if len(events_batch) < PAGE_LIMIT:
                     break
-                
-                events_offset += limit
-                
+
+                events_offset += PAGE_LIMIT
+
             except Exception as e:
                 logger.debug(f"   ⚠️ שגיאה במשיכת events: {e}")
                 break
-        
+
         logger.info(f"   ├─ מ-/events: {markets_from_events} שווקים חדשים (מתוך {events_count} events)")
         logger.info(f"   └─ סה\"כ: {len(markets)} שווקים ייחודיים")
-        
-        # סטטיסטיקות לדיבוג
-        stats = {
-            "markets_total": len(markets),
-            "after_active_filter": 0,
-            "after_time_filter": 0,
-            "after_tradable_filter": 0,
-            "price_fetch_success": 0,
-            "price_fetch_fail": 0,
-            "prices_seen": [],
-            "num_below_threshold": 0,
-            # סיבות פסילה
-            "rejected_inactive": 0,
-            "rejected_no_keyword": 0,
-            "rejected_no_enddate": 0,
-            "rejected_closing_soon": 0,
-            "rejected_no_tokens": 0,
-            "rejected_bad_tokens": 0
-        }
-        
-        opportunities = []
-        now = datetime.now(timezone.utc)
-        min_close_time = now + timedelta(hours=min_hours_until_close)
-        
-        # דוגמאות לדיבוג (10 ראשונים)
-        debug_samples = []
-        
-        for m in markets:
-            question = m.get("question", "")
-            question_lower = question.lower()
-            
-            # בדיקת תקינות בסיסית
-            if not m.get("active") or m.get("closed"):
-                stats["rejected_inactive"] += 1
-                if verbose_rejections and stats["rejected_inactive"] <= 3:
-                    logger.debug(f"   ⏭️ נפסל (לא פעיל/סגור): {question[:50]}")
-                continue
-            stats["after_active_filter"] += 1
-            
-            # סינון קריפטו אם מבוקש
-            if focus_crypto:
-                crypto_keywords = ["bitcoin", "btc", "$btc", "ethereum", "eth", "$eth", 
-                                 "crypto", "cryptocurrency", "sol", "solana"]
-                if not any(kw in question_lower for kw in crypto_keywords):
-                    stats["rejected_no_keyword"] += 1
-                    if verbose_rejections and stats["rejected_no_keyword"] <= 3:
-                        logger.debug(f"   ⏭️ נפסל (לא קריפטו): {question[:50]}")
-                    continue
-            
-            # בדיקת זמן סגירה
-            end_date_str = m.get("endDate")
-            if not end_date_str:
-                stats["rejected_no_enddate"] += 1
-                if verbose_rejections and stats["rejected_no_enddate"] <= 3:
-                    logger.debug(f"   ⏭️ נפסל (אין תאריך סגירה): {question[:50]}")
-                continue
-            
-            try:
-                end_date = datetime.fromisoformat(end_date_str.replace('Z', '+00:00'))
-                hours_until_close = (end_date - now).total_seconds() / 3600
-                if end_date < min_close_time:
-                    stats["rejected_closing_soon"] += 1
-                    if verbose_rejections and stats["rejected_closing_soon"] <= 3:
-                        logger.debug(f"   ⏭️ נפסל (נסגר בקרוב - {hours_until_close:.1f}h): {question[:50]}")
-                    continue
-                stats["after_time_filter"] += 1
-            except:
-                stats["rejected_no_enddate"] += 1
-                continue
 
-            # בדיקת tokens
-            token_ids = m.get("clobTokenIds")
-            if not token_ids:
-                stats["rejected_no_tokens"] += 1
-                if verbose_rejections and stats["rejected_no_tokens"] <= 3:
-                    logger.debug(f"   ⏭️ נפסל (אין clobTokenIds): {question[:50]}")
-                continue
-            
-            import json
-            if isinstance(token_ids, str):
-                try:
-                    token_ids = json.loads(token_ids)
-                except:
-                    stats["rejected_bad_tokens"] += 1
-                    continue
-            
-            if not token_ids or len(token_ids) < 2:
-                stats["rejected_bad_tokens"] += 1
-                if verbose_rejections and stats["rejected_bad_tokens"] <= 3:
-                    logger.debug(f"   ⏭️ נפסל (tokens לא תקינים): {question[:50]}")
-                continue
-            stats["after_tradable_filter"] += 1
-            
-            # הגבלת מספר בדיקות מחיר - רק אם הגענו ל-max
-            if stats["price_fetch_success"] >= max_price_checks:
-                logger.info(f"⚠️ הגעתי למקסימום {max_price_checks} בדיקות מחיר, עוצר")
-                break
-            
-            # שלב 1: סינון מהיר לפי outcomePrices (לא קוראים ל-CLOB לכולם)
-            outcome_prices_gamma = m.get("outcomePrices", [])
-            if isinstance(outcome_prices_gamma, str):
-                import json as json_module
-                try:
-                    outcome_prices_gamma = json_module.loads(outcome_prices_gamma)
-                except:
-                    outcome_prices_gamma = []
-            
-            # בודקים אם יש מחיר זול לפי outcomePrices (סינון ראשוני)
-            has_cheap_gamma_price = False
-            for p in outcome_prices_gamma:
-                try:
-                    if 0.0001 <= float(p) <= low_price_threshold:
-                        has_cheap_gamma_price = True
-                        break
-                except:
-                    pass
-            
-            if not has_cheap_gamma_price:
-                continue  # דילוג - אין טעם לקרוא ל-CLOB
-            
-            # שלב 2: רק לשווקים עם מחיר זול פוטנציאלי - משתמשים ב-outcomePrices ישירות
-            # (כדי לא להאט את הסורק עם קריאות CLOB)
-            try:
-                yes_token_id = token_ids[0]
-                no_token_id = token_ids[1] if len(token_ids) > 1 else None
-                
-                yes_price = float(outcome_prices_gamma[0]) if len(outcome_prices_gamma) > 0 else 0
-                no_price = float(outcome_prices_gamma[1]) if len(outcome_prices_gamma) > 1 else 0
-                
-                stats["price_fetch_success"] += 1
-                stats["prices_seen"].append(yes_price)
-                stats["prices_seen"].append(no_price)
-                
-                # שמירת דוגמה לדיבוג
-                if len(debug_samples) < 10:
-                    gamma_yes = float(outcome_prices_gamma[0]) if len(outcome_prices_gamma) > 0 else None
-                    gamma_no = float(outcome_prices_gamma[1]) if len(outcome_prices_gamma) > 1 else None
-                    debug_samples.append({
-                        "title": m.get("question", "")[:60],
-                        "outcome": f"YES@${yes_price:.4f} / NO@${no_price:.4f}",
-                        "gamma_price": gamma_yes,
-                        "best_ask": yes_price,
-                        "opposite_price": no_price,
-                        "hours_until_close": round(hours_until_close, 1)
-                    })
-                
-                # בדיקה 1: YES מתחת ל-threshold
-                if 0.0001 <= yes_price <= low_price_threshold:
-                    stats["num_below_threshold"] += 1
-                    opportunities.append({
-                        "question": m.get("question", "Unknown"),
-                        "side": "YES",
-                        "price": yes_price,
-                        "token_id": yes_token_id,
-                        "hours_until_close": round(hours_until_close, 1),
-                        "condition_id": m.get("conditionId")
-                    })
-                
-                # בדיקה 2: NO מתחת ל-threshold
-                if no_token_id and 0.0001 <= no_price <= low_price_threshold:
-                    stats["num_below_threshold"] += 1
-                    opportunities.append({
-                        "question": m.get("question", "Unknown"),
-                        "side": "NO",
-                        "price": no_price,
-                        "token_id": no_token_id,
-                        "hours_until_close": round(hours_until_close, 1),
-                        "condition_id": m.get("conditionId")
-                    })
-                    
-            except Exception as e:
-                stats["price_fetch_fail"] += 1
-                if verbose_rejections and stats["price_fetch_fail"] <= 3:
-                    logger.debug(f"   ⏭️ נפסל (שגיאת מחיר): {question[:40]} - {str(e)[:30]}")
-                continue
-        
-        # הדפסת סטטיסטיקות מפורטות
-        logger.info(f"\n{'='*70}")
-        logger.info(f"📊 סטטיסטיקות סריקה:")
-        logger.info(f"   Markets total: {stats['markets_total']}")
-        logger.info(f"   ├─ After active filter: {stats['after_active_filter']}")
-        logger.info(f"   ├─ After time filter: {stats['after_time_filter']}")
-        logger.info(f"   └─ After tradable filter: {stats['after_tradable_filter']}")
-        logger.info(f"   Price fetches: ✅ {stats['price_fetch_success']} | ❌ {stats['price_fetch_fail']}")
-        
-        # הדפסת סיבות פסילה
-        logger.info(f"\n📋 סיבות פסילה:")
-        logger.info(f"   ├─ לא פעיל/סגור: {stats['rejected_inactive']}")
-        if focus_crypto:
-            logger.info(f"   ├─ לא קריפטו: {stats['rejected_no_keyword']}")
-        logger.info(f"   ├─ אין תאריך סגירה: {stats['rejected_no_enddate']}")
-        logger.info(f"   ├─ נסגר בקרוב: {stats['rejected_closing_soon']}")
-        logger.info(f"   ├─ אין tokens: {stats['rejected_no_tokens']}")
-        logger.info(f"   └─ tokens לא תקינים: {stats['rejected_bad_tokens']}")
-        
-        if stats["prices_seen"]:
-            import statistics
-            prices = sorted(stats["prices_seen"])
-            logger.info(f"\n📈 התפלגות מחירים:")
-            logger.info(f"   ├─ Min: ${min(prices):.4f}")
-            logger.info(f"   ├─ P10: ${prices[len(prices)//10]:.4f}")
-            logger.info(f"   ├─ Median: ${statistics.median(prices):.4f}")
-            logger.info(f"   ├─ P90: ${prices[len(prices)*9//10]:.4f}")
-            logger.info(f"   └─ Max: ${max(prices):.4f}")
-        
-        logger.info(f"\n🎯 Below threshold (${low_price_threshold}): {stats['num_below_threshold']}")
-        logger.info(f"{'='*70}\n")
-        
-        # הדפסת דוגמאות - תמיד!
-        if debug_samples:
-            logger.info(f"🔬 דוגמאות מחירים ({len(debug_samples)} שווקים):")
-            for sample in debug_samples:
-                gamma = sample['gamma_price'] if sample['gamma_price'] else 0
-                logger.info(f"   • {sample['title']}")
-                logger.info(f"     {sample['outcome']} | Gamma: ${gamma:.4f} | {sample['hours_until_close']}h")
-            logger.info("")
-        else:
-            logger.info(f"⚠️ לא נאספו דוגמאות (אולי כל השווקים נדחו בפילטרים)\n")
-        
-        if opportunities:
-            logger.info(f"🎯 נמצאו {len(opportunities)} הזדמנויות במחיר של ${low_price_threshold} ומטה!")
-            # מדפיס את כל ההזדמנויות (לא רק 5 ראשונות)
-            for opp in opportunities[:20]:  # מגביל ל-20 בלוגים
-                logger.info(f"  • {opp['question'][:60]} | {opp['side']} @ ${opp['price']:.4f}")
-            if len(opportunities) > 20:
-                logger.info(f"  ... ועוד {len(opportunities) - 20} הזדמנויות נוספות")
-        else:
-            logger.info(f"❌ לא נמצאו הזדמנויות במחיר של ${low_price_threshold} ומטה")
-        
+        if publish_catalog:
+            with stage("publish_snapshot"):
+                publish_snapshot(markets)
+        if record_raw:
+            with stage("record_raw"):
+                record_raw_catalog(markets, source=_recording_source(fetch_opts, "single"))
+
+        count("markets_evaluated", len(markets))
+        with stage("filter"):
+            opportunities, stats, debug_samples = _filter_markets(markets, **params)
+        if verify_prices:
+            with stage("verify"):
+                opportunities = price_verifier.verify_opportunities(opportunities, low_price_threshold)
+        with stage("log_summary"):
+            _record_scan_metrics(stats, opportunities)
+            _log_scan_summary(stats, debug_samples, opportunities, low_price_threshold, focus_crypto)
+
         return opportunities
     except Exception as e:
         logger.error(f"❌ שגיאה בסריקה: {e}")
@@ -374,12 +784,8 @@ def search_markets_by_keywords(keywords: List[str], max_results: int = 3000) ->
         return []
 
 def get_current_price(token_id: str) -> Optional[float]:
-    """מחזיר מחיר ASK מ-Orderbook עבור פוזיציה קיימת."""
+    """מחזיר מחיר ASK מ-Orderbook עבור פוזיציה קיימת (דרך ה-cache של ה-verifier)."""
     try:
-        url = f"https://clob.polymarket.com/prices?token_id={token_id}"
-        data = requests.get(url, timeout=5).json()
-        if token_id in data:
-            price = float(data[token_id].get("ask", 0))
-            return price if price > 0 else None
-        return None
+        price = price_verifier.get_best_ask(token_id)
+        return price if price and price > 0 else None
     except: return None
\ No newline at end of file
@@ -1,58 +1,185 @@
 # simple_trader.py
+import asyncio
 import logging
-from typing import Dict, Optional
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from .executor import OrderExecutor
 from .config import SELL_MULTIPLIER
+from .allocator import allocate_batch
+from .order_tracker import update_filled
+from .profiling import stage
+from .latency import mark, latency_tracker
 
 logger = logging.getLogger(__name__)
 
 class SimpleTrader:
-    def __init__(self, executor: OrderExecutor, position_size_usd: float = 10.0):
+    def __init__(self, executor: OrderExecutor, position_size_usd: float = 10.0,
+                 balance_usd: Optional[float] = None):
         self.executor = executor
         self.position_size_usd = position_size_usd
+        self.balance_usd = balance_usd  # יתרה שמורה (None = לא ידועה, בלי תקרה כוללת)
         self.open_positions: Dict[str, Dict] = {}
+        # הפוזיציות משותפות ל-loop ול-thread של ה-reconcile: מי שתפס token (claim) הוא היחיד
+        # שמשנה/מוחק את הפוזיציה עד שהוא משחרר; lock רק סביב הגישה ל-dict ול-busy עצמם
+        self.lock = threading.Lock()
+        self.busy: Set[str] = set()
+        self.pending_entries = set()  # tokens שיש עליהם פקודה בדרך (כמה submitters במקביל)
+        self.pending_cost = 0.0       # כסף שתפוס ע"י פקודות שבדרך
         self.target_multiplier = SELL_MULTIPLIER  # מהקונפיג 
 
-    async def check_entry(self, opportunity: Dict) -> bool:
-        token_id = opportunity["token_id"]
-        if token_id in self.open_positions: return False
-        
-        price = opportunity.get("price") or opportunity.get("current_price", 0)
-        
-        # הגנה קריטית נגד חלוקה באפס (WinError/ZeroDivision)
-        if price <= 0:
-            price = 0.001 
-        
-        # חישוב יחידות (פולימרקט דורשים מינימום 5 יחידות בדר"כ)
-        shares = int(self.position_size_usd / price)
-        if shares < 5: return False
-        
-        question = opportunity.get('question') or opportunity.get('event_title', 'Unknown')
-        side = opportunity.get('side') or opportunity.get('outcome', '?')
-        logger.info(f"🎯 קונה {shares} יחידות של {side} ב-שוק: {question[:40]}...")
-        
-        # ביצוע הקנייה
-        order_result = self.executor.execute_trade(
-            token_id=token_id, side="BUY", size=shares, price=price
+    def committed_usd(self) -> float:
+        """
+        כסף שעוד ייצא מהיתרה: מה שנשאר למילוי בפקודות BUY שנחו על הספר + פקודות שבדרך.
+        מה שכבר מולא יצא מ-balance_usd (מתרענן מה-CLOB בכל reconcile).
+        """
+        return self.pending_cost + sum(
+            max(0.0, pos["shares"] - pos.get("filled_shares", 0)) * pos.get("order_price", pos["entry_price"])
+            for _, pos in self.positions()
+            if pos.get("status") in ("open", "partial")
         )
-        
-        if order_result and order_result.get("success"):
-            self.open_positions[token_id] = {
+
+    def positions(self) -> List[Tuple[str, Dict]]:
+        """snapshot של (token_id, pos) - לקריאה בלבד; כדי לשנות פוזיציה צריך claim."""
+        with self.lock:
+            return list(self.open_positions.items())
+
+    @contextmanager
+    def claim(self, token_ids: Iterable[str]) -> Iterator[Dict[str, Dict]]:
+        """
+        תופס את הפוזיציות של token_ids לכל משך ה-with ומחזיר את אלה שנתפסו: רק כאלה שקיימות
+        ושאף אחד אחר לא תפס (השאר נשארות לסבב הבא). כך I/O באמצע עדכון לא נדרס ע"י הצד השני.
+        """
+        with self.lock:
+            claimed = {
+                token_id: self.open_positions[token_id]
+                for token_id in token_ids
+                if token_id in self.open_positions and token_id not in self.busy
+            }
+            self.busy.update(claimed)
+        try:
+            yield claimed
+        finally:
+            with self.lock:
+                self.busy.difference_update(claimed)
+
+    def remove_position(self, token_id: str) -> None:
+        """סוגר פוזיציה שנתפסה (claim) ומשחרר את ה-ledger שלה."""
+        with self.lock:
+            self.open_positions.pop(token_id, None)
+        self.executor.release_token(token_id)
+
+    async def check_entry(self, opportunity: Dict) -> bool:
+        return await self.enter_batch([opportunity]) > 0
+
+    async def enter_batch(self, opportunities: List[Dict]) -> int:
+        """מקצה תקציב לכל ה-batch בבת אחת ושולח את כל הפקודות יחד. מחזיר כמה נחו על הספר."""
+        with stage("allocate"):
+            candidates = {}
+            for opp in opportunities:
+                token_id = opp["token_id"]
+                if token_id in self.open_positions or token_id in self.pending_entries:
+                    continue
+                candidates.setdefault(token_id, opp)
+            budget = None if self.balance_usd is None else self.balance_usd - self.committed_usd()
+            allocations = allocate_batch(list(candidates.values()), self.position_size_usd, budget)
+        if not allocations:
+            return 0
+
+        batch_cost = sum(a["cost"] for a in allocations)
+        for a in allocations:
+            opp = a["opportunity"]
+            mark(opp.get("timestamps"), "decided")
+            question = opp.get('question') or opp.get('event_title', 'Unknown')
+            side = opp.get('side') or opp.get('outcome', '?')
+            logger.info(f"🎯 קונה {a['shares']} יחידות של {side} ב-שוק: {question[:40]}...")
+            self.pending_entries.add(a["token_id"])
+        self.pending_cost += batch_cost
+
+        # ביצוע הקנייה (ב-thread כדי שפקודה איטית לא תחסום את שאר ה-pipeline)
+        try:
+            results = await asyncio.to_thread(self.executor.execute_batch, allocations)
+        finally:
+            self.pending_cost -= batch_cost
+            for a in allocations:
+                self.pending_entries.discard(a["token_id"])
+
+        placed = 0
+        for a, order_result in zip(allocations, results):
+            latency_tracker.record(a["opportunity"].get("timestamps"))
+            if not (order_result and order_result.get("success")):
+                continue
+            # success = הפקודה נחה על הספר; המילוי בפועל מתעדכן ע"י OrderTracker
+            price = a["price"]
+            position = {
                 "entry_price": price,
                 "target_price": price * self.target_multiplier,
-                "shares": shares,
-                "opportunity": opportunity
+                "shares": a["shares"],
+                "opportunity": a["opportunity"],
+                "order_id": order_result.get("orderID"),
+                "order_price": price,
+                "status": "open",
+                "filled_shares": 0,
+                "avg_fill_price": None,
+                "placed_at": time.time()
             }
-            logger.info(f"✅ הצלחתי להיכנס ב-${price:.4f}")
-            return True
-        return False
+            with self.lock:
+                self.open_positions[a["token_id"]] = position
+            logger.info(f"✅ פקודה נחה על הספר ב-${price:.4f}")
+            placed += 1
+        return placed
 
     async def check_exit(self, token_id: str, current_price: float) -> bool:
-        if token_id not in self.open_positions: return False
-        pos = self.open_positions[token_id]
-        if current_price >= pos["target_price"]:
-            logger.info(f"🎉 יעד הושג! מנסה למכור ב-${current_price:.4f}")
-            # כאן תבוצע המכירה באותו אופן
-            del self.open_positions[token_id]
-            return True
-        return False
\ No newline at end of file
+        """
+        שולח SELL על מה שמולא כשהיעד הושג. אם פקודת ה-BUY עוד נחה (open/partial) - מבטלים
+        קודם את היתרה וקוראים שוב כמה מולא, כדי לא למכור פוזיציה שעוד גדלה.
+        הפוזיציה לא נמחקת כאן: היא עוברת ל-exiting, ו-OrderTracker מוחק אותה כשה-SELL התמלא.
+        אם ה-reconcile באמצע עדכון של הפוזיציה - מדלגים ובודקים שוב בסבב הבא.
+        """
+        with self.claim([token_id]) as claimed:
+            pos = claimed.get(token_id)
+            if pos is None: return False
+            return await self._exit(token_id, pos, current_price)
+
+    async def _exit(self, token_id: str, pos: Dict, current_price: float) -> bool:
+        if pos.get("exit_order_id"): return False  # כבר יש SELL על הספר
+        # מוכרים רק מה שבאמת מולא
+        if pos.get("filled_shares", 0) < 5: return False
+        if current_price < pos["target_price"]: return False
+
+        if pos.get("status") in ("open", "partial") and pos.get("order_id"):
+            if not await self._finish_buy(token_id, pos):
+                return False
+        # מילויים חלקיים משאירים שברים; ה-CLOB מקבל 2 ספרות - מעגלים למטה כדי לא למכור יותר ממה שיש
+        sell_shares = math.floor(pos.get("filled_shares", 0) * 100 + 1e-9) / 100
+        if sell_shares < 5: return False
+
+        logger.info(f"🎉 יעד הושג! מנסה למכור ב-${current_price:.4f}")
+        order_result = await asyncio.to_thread(
+            self.executor.execute_trade,
+            token_id=token_id, side="SELL", size=sell_shares, price=current_price
+        )
+        if not (order_result and order_result.get("success")):
+            return False
+        pos["status"] = "exiting"
+        pos["exit_order_id"] = order_result.get("orderID")
+        pos["exit_shares"] = sell_shares
+        pos["exit_filled"] = 0
+        pos["exit_placed_at"] = time.time()
+        return True
+
+    async def _finish_buy(self, token_id: str, pos: Dict) -> bool:
+        """מבטל את יתרת פקודת ה-BUY ומקבע את הפוזיציה על מה שמולא. False אם מצב הפקודה לא ידוע."""
+        order_id = pos["order_id"]
+        await asyncio.to_thread(self.executor.cancel_orders, [order_id])
+        order = await asyncio.to_thread(self.executor.fetch_order, order_id)
+        if order is None or order.get("status") == "LIVE":
+            return False  # הביטול לא עבר - ננסה בסבב הבא
+        if update_filled(pos, order) <= 0:
+            self.remove_position(token_id)
+            return False
+        pos["shares"] = pos["filled_shares"]
+        pos["status"] = "filled"
+        return True
@@ -0,0 +1,10 @@
+# conftest.py
+import os
+import sys
+from pathlib import Path
+
+# כמו ב-src/utils: החבילה נטענת מ-src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# בלי מפתחות אמיתיים - config מאפשר זאת רק מול הבורסה המדומה
+os.environ.setdefault("SIMULATED_EXCHANGE", "true")
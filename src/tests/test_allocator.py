@@ -0,0 +1,54 @@
+# test_allocator.py
+import pytest
+
+from polymarket_bot.allocator import allocate_batch
+
+POSITION_USD = 5.0
+
+
+def opp(token_id, price, score=1.0):
+    return {"token_id": token_id, "price": price, "score": score}
+
+
+def test_allocates_by_score_until_budget_runs_out():
+    opps = [opp("low", 0.01, score=1.0), opp("high", 0.01, score=3.0), opp("mid", 0.01, score=2.0)]
+
+    allocations = allocate_batch(opps, POSITION_USD, budget_usd=12.0, min_position_usd=1.0)
+
+    # שתי הראשונות מלאות, מה שנשאר ($2) הולך לשלישית בגודל מוקטן
+    assert [a["token_id"] for a in allocations] == ["high", "mid", "low"]
+    assert [a["shares"] for a in allocations] == [500, 500, 200]
+    assert sum(a["cost"] for a in allocations) == pytest.approx(12.0)
+
+
+def test_leftover_below_minimum_is_not_allocated():
+    allocations = allocate_batch([opp("a", 0.01), opp("b", 0.01)], POSITION_USD, budget_usd=5.5, min_position_usd=1.0)
+
+    assert [a["token_id"] for a in allocations] == ["a"]
+
+
+def test_no_budget_means_no_cap():
+    allocations = allocate_batch([opp(str(i), 0.01) for i in range(4)], POSITION_USD, budget_usd=None)
+
+    assert len(allocations) == 4
+
+
+def test_sizes_on_the_rounded_price():
+    # 0.0026 נשלח כ-0.003: כמות לפי 0.003, והעלות היא מה שבאמת ננעל
+    [a] = allocate_batch([opp("a", 0.0026)], POSITION_USD, budget_usd=None)
+
+    assert a["price"] == pytest.approx(0.003)
+    assert a["shares"] == 1666
+    assert a["cost"] == pytest.approx(1666 * 0.003)
+
+
+def test_rounded_cost_stays_within_budget():
+    # לפי 0.0026 היו 1923 יחידות לכל פקודה, שנשלחות ב-0.003 ועולות $11.54 יחד - מעל התקציב
+    allocations = allocate_batch([opp("a", 0.0026), opp("b", 0.0026)], POSITION_USD, budget_usd=10.0)
+
+    assert len(allocations) == 2
+    assert sum(a["shares"] * round(a["price"], 3) for a in allocations) <= 10.0 + 1e-9
+
+
+def test_too_few_shares_is_skipped():
+    assert allocate_batch([opp("a", 0.9)], 1.0, budget_usd=None) == []
@@ -0,0 +1,62 @@
+# test_backtest.py
+import pytest
+
+from polymarket_bot.backtest import build_dataset, run_sweep, save_dataset
+
+HOUR = 3600
+FAR = 10 * 24 * HOUR
+
+# A: נכנס ב-0.002 בדיוק ויוצא ב-0.005; C: נכנס רק עם threshold 0.003 ולא יוצא;
+# D: נסגר אחרי שעה וחצי ומתיישב ל-0; B: אף פעם לא זול מספיק
+HISTORIES = {
+    "A": [(0, 0.002), (HOUR, 0.002), (2 * HOUR, 0.005)],
+    "B": [(0, 0.5), (2 * HOUR, 0.6)],
+    "C": [(0, 0.003), (2 * HOUR, 0.004)],
+    "D": [(0, 0.001), (HOUR, 0.001)],
+}
+END_TS = {"A": FAR, "B": FAR, "C": FAR, "D": 1.5 * HOUR}
+
+
+@pytest.fixture
+def dataset_path(tmp_path):
+    path = tmp_path / "history.npz"
+    save_dataset(path, build_dataset(HISTORIES, END_TS, step=HOUR))
+    return path
+
+
+def sweep(path, threshold, min_hours, multiplier=2.0, size=1.0):
+    [result] = run_sweep(path, [threshold], [multiplier], [min_hours], [size])
+    return result
+
+
+def test_entry_at_threshold_sizes_like_the_bot(dataset_path):
+    # 0.002 נשמר כ-float32 - הכניסה וה-sizing צריכים לראות 0.002 ו-500 מניות כמו int(1 / 0.002)
+    result = sweep(dataset_path, threshold=0.002, min_hours=2)
+    assert result["trades"] == 1
+    assert result["exits"] == 1
+    assert result["invested"] == pytest.approx(1.0)
+    assert result["pnl"] == pytest.approx(500 * (0.005 - 0.002))
+
+
+def test_min_hours_mask_and_settlement(dataset_path):
+    # עם min_hours=1 גם D נכנס (1.5 שעות לסגירה), לא מגיע ליעד ומתיישב ל-0
+    result = sweep(dataset_path, threshold=0.002, min_hours=1)
+    assert result["trades"] == 2
+    assert result["exits"] == 1
+    assert result["pnl"] == pytest.approx(1.5 - 1000 * 0.001)
+
+
+def test_held_position_is_valued_at_last_price(dataset_path):
+    # C: int(1 / 0.003) = 333 מניות, בלי יציאה (יעד 0.006) - שווי לפי המחיר האחרון 0.004
+    result = sweep(dataset_path, threshold=0.003, min_hours=2)
+    assert result["trades"] == 2
+    assert result["exits"] == 1
+    assert result["invested"] == pytest.approx(1.0 + 333 * 0.003)
+    assert result["pnl"] == pytest.approx(1.5 + 333 * (0.004 - 0.003))
+
+
+def test_exit_needs_target_after_entry(dataset_path):
+    # multiplier 3: A צריך 0.006 - אין יציאה, שווי לפי 0.005
+    result = sweep(dataset_path, threshold=0.002, min_hours=2, multiplier=3.0)
+    assert result["exits"] == 0
+    assert result["pnl"] == pytest.approx(500 * (0.005 - 0.002))
@@ -0,0 +1,124 @@
+# test_executor_pool.py
+import asyncio
+
+import pytest
+
+from polymarket_bot import order_tracker
+from polymarket_bot.executor import OrderExecutor
+from polymarket_bot.executor_pool import ExecutorPool
+from polymarket_bot.order_tracker import OrderTracker
+from polymarket_bot.profiling import current_cycle, cycle
+from polymarket_bot.sim_exchange import SimMarket, SimulatedClobClient
+from polymarket_bot.simple_trader import SimpleTrader
+
+# שני ארנקים של $10; כל פקודה = 500 מניות ב-0.01 = $5, כך שארבע פקודות ממצות את שניהם
+BALANCE = 10.0
+PRICE = 0.01
+POSITION_USD = 5.0
+
+
+@pytest.fixture
+def setup(monkeypatch):
+    # פקודה שנעלמה מהספר נחשבת מבוטלת מיד (בלי ה-grace של פקודה שנשלחה הרגע)
+    monkeypatch.setattr(order_tracker, "MISSING_ORDER_GRACE", 0.0)
+    market = SimMarket(fill_rate=0.0, seed=1)
+    clients = [
+        SimulatedClobClient(starting_balance=BALANCE, address=f"0xSIM-{name}", market=market)
+        for name in ("w1", "w2")
+    ]
+    pool = ExecutorPool(
+        [OrderExecutor(client=client, wallet={"name": f"w{i + 1}"}) for i, client in enumerate(clients)],
+        rate_limit=0,
+    )
+    pool.refresh_balance()
+    trader = SimpleTrader(pool, POSITION_USD)
+    return pool, trader, OrderTracker(pool, trader), clients
+
+
+def enter(trader, *token_ids):
+    opportunities = [{"token_id": token_id, "price": PRICE, "score": 1.0} for token_id in token_ids]
+    return asyncio.run(trader.enter_batch(opportunities))
+
+
+def cancel_externally(trader, clients, token_id):
+    """ביטול שלא עובר דרך ה-pool (ידני / פקיעה)."""
+    order_id = trader.open_positions[token_id]["order_id"]
+    assert any(client.cancel_orders([order_id])["canceled"] for client in clients)
+
+
+def test_orders_exhaust_both_wallets(setup):
+    pool, trader, _, _ = setup
+    assert enter(trader, "a", "b", "c", "d", "e") == 4
+    assert [slot.committed for slot in pool.slots] == pytest.approx([BALANCE, BALANCE])
+    assert enter(trader, "f") == 0
+
+
+def test_tracker_releases_externally_cancelled_order(setup):
+    pool, trader, tracker, clients = setup
+    enter(trader, "a", "b", "c", "d")
+    cancel_externally(trader, clients, "a")
+
+    summary = tracker.reconcile()
+
+    assert summary["cancelled"] == 1
+    assert "a" not in trader.open_positions
+    assert sum(slot.committed for slot in pool.slots) == pytest.approx(3 * POSITION_USD)
+    assert pool.wallet_for("a") is None
+    assert enter(trader, "e") == 1
+
+
+def test_refresh_rebuilds_ledger_from_open_orders(setup):
+    pool, trader, _, clients = setup
+    enter(trader, "a", "b", "c", "d")
+    # בלי reconcile: רק ה-ledger מתעדכן מהפקודות הפתוחות ב-CLOB
+    cancel_externally(trader, clients, "b")
+
+    assert pool.refresh_balance() == pytest.approx(2 * BALANCE)
+    assert sum(slot.committed for slot in pool.slots) == pytest.approx(3 * POSITION_USD)
+    assert enter(trader, "e") == 1
+
+
+def test_filled_order_releases_ledger_and_balance_follows(setup):
+    pool, trader, tracker, clients = setup
+    enter(trader, "a", "b", "c", "d")
+    # מוכר חיצוני חוצה את פקודת ה-BUY של a - היא מתמלאת במחיר שלה
+    clients[0].market.sync_books([{"asset_id": "a", "bids": [], "asks": [{"price": "0.005", "size": "500"}]}])
+
+    tracker.reconcile()
+    pool.refresh_balance()
+
+    assert trader.open_positions["a"]["status"] == "filled"
+    owner = next(slot for slot in pool.slots if slot.name == pool.wallet_for("a"))
+    assert owner.committed == pytest.approx(POSITION_USD)
+    assert owner.balance == pytest.approx(BALANCE - POSITION_USD)
+    assert owner.available() == pytest.approx(0.0)
+
+
+def test_budget_counts_filled_usdc_once(setup):
+    pool, trader, tracker, clients = setup
+    enter(trader, "a", "b", "c", "d")
+    clients[0].market.sync_books([{"asset_id": "a", "bids": [], "asks": [{"price": "0.005", "size": "500"}]}])
+    tracker.reconcile()
+
+    # היתרה מה-CLOB כבר בלי ה-$5 של a; רק שלוש פקודות ה-BUY שנחו עוד תופסות תקציב
+    trader.balance_usd = pool.refresh_balance()
+    assert trader.balance_usd == pytest.approx(2 * BALANCE - POSITION_USD)
+    assert trader.balance_usd - trader.committed_usd() == pytest.approx(0.0)
+
+    cancel_externally(trader, clients, "b")
+    tracker.reconcile()
+    trader.balance_usd = pool.refresh_balance()
+    assert enter(trader, "e") == 1
+
+
+def test_wallet_threads_report_to_callers_cycle(setup):
+    pool, trader, _, _ = setup
+    background = dict(current_cycle().stage_times)
+
+    with cycle("submit") as stats:
+        enter(trader, "a", "b", "c")
+
+    # החלקים של כל ארנק נשלחו מה-threads של ה-pool - והזמנים שלהם במחזור של ה-batch
+    assert {"allocate", "sign_order", "post_order"} <= set(stats.stage_times)
+    assert stats.counters["requests"] == 2
+    assert current_cycle().stage_times == background
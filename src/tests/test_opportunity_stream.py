@@ -0,0 +1,57 @@
+# test_opportunity_stream.py
+from polymarket_bot.opportunity_stream import OpportunityStream
+
+COOLDOWN = 60.0
+
+
+def opp(token_id, price=0.002):
+    return {"token_id": token_id, "price": price, "side": "YES", "condition_id": f"c-{token_id}"}
+
+
+def tokens(opps):
+    return sorted(o["token_id"] for o in opps)
+
+
+def test_diff_between_scans():
+    stream = OpportunityStream(COOLDOWN)
+    stream.update([opp("a"), opp("b"), opp("c")], now=0)
+    for token_id in "abc":
+        stream.mark_queued(token_id, now=0)
+
+    diff = stream.update([opp("a"), opp("b", 0.003), opp("d")], now=1)
+
+    assert tokens(diff.added) == ["d"]
+    assert tokens(diff.removed) == ["c"]
+    assert tokens(diff.repriced) == ["b"]
+    assert diff.unchanged == 1
+    assert diff.due == []
+    assert tokens(diff.to_check()) == ["b", "d"]
+
+
+def test_unchanged_opportunity_requeued_after_cooldown():
+    stream = OpportunityStream(COOLDOWN)
+    stream.update([opp("a")], now=0)
+    stream.mark_queued("a", now=0)
+
+    # האימות דחה את a והמחיר לא זז: בתוך ה-cooldown היא לא חוזרת
+    assert stream.update([opp("a")], now=COOLDOWN - 1).due == []
+    assert not stream.ready("a", now=COOLDOWN - 1)
+
+    diff = stream.update([opp("a")], now=COOLDOWN)
+    assert tokens(diff.due) == ["a"]
+    assert stream.ready("a", now=COOLDOWN)
+    assert stream.cooling_down() == 0
+
+
+def test_opportunity_skipped_in_cooldown_comes_back_once_it_ends():
+    stream = OpportunityStream(COOLDOWN)
+    stream.update([opp("a")], now=0)
+    stream.mark_queued("a", now=0)
+    stream.update([], now=1)
+
+    # a חזרה בזמן ה-cooldown - היא "added" אבל לא ready, ולכן לא נכנסה לתור
+    diff = stream.update([opp("a")], now=2)
+    assert tokens(diff.added) == ["a"]
+    assert not stream.ready("a", now=2)
+
+    assert tokens(stream.update([opp("a")], now=COOLDOWN).due) == ["a"]
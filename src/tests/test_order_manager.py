@@ -0,0 +1,120 @@
+# test_order_manager.py
+import asyncio
+import threading
+
+import pytest
+
+from polymarket_bot.executor import OrderExecutor
+from polymarket_bot.order_manager import OrderManager
+from polymarket_bot.sim_exchange import SimMarket, SimulatedClobClient
+from polymarket_bot.simple_trader import SimpleTrader
+
+PRICE = 0.01
+THRESHOLD = 0.02
+
+
+class FixedQuotes:
+    """verifier עם quotes קבועים: token שלא מופיע = הקריאה ל-CLOB נכשלה."""
+
+    def __init__(self, quotes):
+        self.quotes = quotes
+
+    def get_quotes(self, token_ids):
+        return {token_id: self.quotes[token_id] for token_id in token_ids if token_id in self.quotes}
+
+
+@pytest.fixture
+def setup():
+    client = SimulatedClobClient(starting_balance=100, market=SimMarket(fill_rate=0.0, seed=1))
+    executor = OrderExecutor(client=client)
+    trader = SimpleTrader(executor, 5.0)
+    asyncio.run(trader.enter_batch([{"token_id": "a", "price": PRICE, "score": 1.0}]))
+    return client, executor, trader
+
+
+def manage(executor, trader, quotes):
+    return OrderManager(executor, trader, FixedQuotes(quotes), THRESHOLD, max_age=0.0).run()
+
+
+def is_live(client, order_id):
+    return client.get_order(order_id)["status"] == "LIVE"
+
+
+def test_missing_quote_leaves_order_alone(setup):
+    client, executor, trader = setup
+    order_id = trader.open_positions["a"]["order_id"]
+
+    summary = manage(executor, trader, {})
+
+    assert summary["unquoted"] == 1
+    assert summary["cancelled"] == 0
+    assert trader.open_positions["a"]["order_id"] == order_id
+    assert is_live(client, order_id)
+
+
+def test_failed_market_cancel_keeps_position(setup, monkeypatch):
+    client, executor, trader = setup
+    order_id = trader.open_positions["a"]["order_id"]
+
+    def fail(**kwargs):
+        raise ConnectionError("timeout")
+    monkeypatch.setattr(client, "cancel_market_orders", fail)
+
+    # הספר חזר בלי asks, אבל הביטול נכשל - הפקודה עוד על הספר ואסור לשכוח אותה
+    summary = manage(executor, trader, {"a": (None, None)})
+
+    assert summary["cancelled"] == 0
+    assert trader.open_positions["a"]["order_id"] == order_id
+    assert is_live(client, order_id)
+
+
+def test_dead_market_cancel_closes_position(setup):
+    client, executor, trader = setup
+    order_id = trader.open_positions["a"]["order_id"]
+
+    summary = manage(executor, trader, {"a": (None, None)})
+
+    assert summary["cancelled"] == 1
+    assert "a" not in trader.open_positions
+    assert not is_live(client, order_id)
+
+
+def test_reprices_to_best_ask(setup):
+    client, executor, trader = setup
+    old_order_id = trader.open_positions["a"]["order_id"]
+
+    summary = manage(executor, trader, {"a": (None, 0.012)})
+
+    pos = trader.open_positions["a"]
+    assert summary["reposted"] == 1
+    assert pos["order_id"] != old_order_id
+    assert pos["order_price"] == pytest.approx(0.012)
+    assert pos["first_order_price"] == pytest.approx(PRICE)
+    assert not is_live(client, old_order_id)
+
+
+def test_exit_skips_position_while_manager_replaces_it(setup, monkeypatch):
+    client, executor, trader = setup
+    trader.open_positions["a"]["filled_shares"] = 5
+    entered, proceed = threading.Event(), threading.Event()
+    cancel_orders = executor.cancel_orders
+
+    def slow_cancel(order_ids):
+        entered.set()
+        proceed.wait(5)
+        return cancel_orders(order_ids)
+    monkeypatch.setattr(executor, "cancel_orders", slow_cancel)
+
+    # ה-manager (ב-thread של ה-reconcile) באמצע ביטול; check_exit על ה-loop לא נוגע בפוזיציה
+    results = []
+    worker = threading.Thread(target=lambda: results.append(manage(executor, trader, {"a": (None, 0.012)})))
+    worker.start()
+    assert entered.wait(5)
+    assert asyncio.run(trader.check_exit("a", 1.0)) is False
+    proceed.set()
+    worker.join(5)
+
+    assert results[0]["reposted"] == 1
+    assert trader.open_positions["a"]["status"] == "open"
+    assert "exit_order_id" not in trader.open_positions["a"]
+    assert not trader.busy
@@ -0,0 +1,94 @@
+# test_order_tracker.py
+import asyncio
+
+import pytest
+
+from polymarket_bot import order_tracker
+from polymarket_bot.executor import OrderExecutor
+from polymarket_bot.order_tracker import OrderTracker
+from polymarket_bot.sim_exchange import SimMarket, SimulatedClobClient
+from polymarket_bot.simple_trader import SimpleTrader
+
+PRICE = 0.01
+SHARES = 500  # $5 ב-0.01
+
+
+@pytest.fixture
+def setup(monkeypatch):
+    monkeypatch.setattr(order_tracker, "MISSING_ORDER_GRACE", 0.0)
+    client = SimulatedClobClient(starting_balance=100, market=SimMarket(fill_rate=0.0, seed=1))
+    trader = SimpleTrader(OrderExecutor(client=client), 5.0)
+    asyncio.run(trader.enter_batch([{"token_id": "a", "price": PRICE, "score": 1.0}]))
+    return client, trader, OrderTracker(trader.executor, trader)
+
+
+def cross(client, bids=(), asks=()):
+    """נזילות חיצונית שחוצה את הפקודות שלנו על a - הן מתמלאות במחיר שלהן."""
+    client.market.sync_books([{
+        "asset_id": "a",
+        "bids": [{"price": str(p), "size": str(s)} for p, s in bids],
+        "asks": [{"price": str(p), "size": str(s)} for p, s in asks],
+    }])
+
+
+def sell_at_target(trader):
+    target = trader.open_positions["a"]["target_price"]
+    assert asyncio.run(trader.check_exit("a", target))
+    return target
+
+
+def test_partial_fill_is_counted_once(setup):
+    client, trader, tracker = setup
+    cross(client, asks=[(0.005, 200)])
+
+    tracker.reconcile()
+    tracker.reconcile()
+
+    pos = trader.open_positions["a"]
+    assert pos["status"] == "partial"
+    assert pos["filled_shares"] == pytest.approx(200)
+    assert pos["trade_filled"] == pytest.approx(200)
+    assert pos["avg_fill_price"] == pytest.approx(PRICE)
+
+
+def test_filled_sell_closes_position(setup):
+    client, trader, tracker = setup
+    cross(client, asks=[(0.005, SHARES)])
+    tracker.reconcile()
+    target = sell_at_target(trader)
+    assert tracker.reconcile()["exiting"] == 1
+
+    cross(client, bids=[(target, SHARES)])
+
+    assert tracker.reconcile()["sold"] == 1
+    assert "a" not in trader.open_positions
+
+
+def test_cancelled_partial_sell_returns_rest_to_position(setup):
+    client, trader, tracker = setup
+    cross(client, asks=[(0.005, SHARES)])
+    tracker.reconcile()
+    target = sell_at_target(trader)
+    cross(client, bids=[(target, 200)])
+    assert client.cancel_orders([trader.open_positions["a"]["exit_order_id"]])["canceled"]
+
+    assert tracker.reconcile()["filled"] == 1
+
+    pos = trader.open_positions["a"]
+    assert pos["shares"] == pytest.approx(SHARES - 200)
+    assert pos["filled_shares"] == pytest.approx(SHARES - 200)
+    assert "exit_order_id" not in pos
+
+
+def test_claimed_position_is_reconciled_next_round(setup):
+    client, trader, tracker = setup
+    asyncio.run(trader.enter_batch([{"token_id": "b", "price": PRICE, "score": 1.0}]))
+    cross(client, asks=[(0.005, SHARES)])
+
+    # check_exit באמצע טיפול ב-a: ה-tracker מתאים רק את b, וה-trade של a לא הולך לאיבוד
+    with trader.claim(["a"]):
+        assert tracker.reconcile()["open"] == 1
+    assert trader.open_positions["a"]["status"] == "open"
+
+    assert tracker.reconcile()["filled"] == 1
+    assert trader.open_positions["a"]["trade_filled"] == pytest.approx(SHARES)
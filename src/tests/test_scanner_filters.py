@@ -0,0 +1,64 @@
+# test_scanner_filters.py
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from polymarket_bot import simple_scanner
+from polymarket_bot.simple_scanner import build_fetch_options, explain_market, filter_catalog
+
+THRESHOLD = 0.004
+
+
+def market(condition_id, liquidity=1000.0, volume=1000.0, hours=48):
+    end = datetime.now(timezone.utc) + timedelta(hours=hours)
+    return {
+        "question": f"Market {condition_id}?",
+        "conditionId": condition_id,
+        "active": True,
+        "closed": False,
+        "endDate": end.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "clobTokenIds": f'["{condition_id}-yes", "{condition_id}-no"]',
+        "outcomePrices": '["0.002", "0.998"]',
+        "liquidityNum": liquidity,
+        "volumeNum": volume,
+    }
+
+
+def conditions(opps):
+    return sorted(opp["condition_id"] for opp in opps)
+
+
+def test_minimal_fetch_keeps_market_filters_off_events():
+    opts = build_fetch_options("minimal", min_hours_until_close=1, min_liquidity=100, min_volume=50)
+
+    assert "liquidity_num_min=100" in opts["markets_query"]
+    assert "volume_num_min=50" in opts["markets_query"]
+    assert "end_date_min=" in opts["markets_query"]
+    # ב-/events אלה פילטרים של האירוע כולו - הם לא נשלחים לשרת
+    assert opts["events_query"] == "active=true&closed=false"
+
+
+def test_filters_apply_per_market():
+    markets = [market("ok"), market("thin", liquidity=10), market("quiet", volume=5), market("soon", hours=0.5)]
+
+    opps = filter_catalog(markets, min_hours_until_close=1, low_price_threshold=THRESHOLD,
+                          min_liquidity=100, min_volume=50)
+
+    assert conditions(opps) == ["ok"]
+    assert explain_market(markets[1], 1, THRESHOLD, min_liquidity=100) == "נזילות נמוכה"
+    assert explain_market(markets[2], 1, THRESHOLD, min_volume=50) == "נפח נמוך"
+
+
+@pytest.mark.parametrize("fetch_mode", ["full", "minimal"])
+def test_scan_filters_markets_inside_events(monkeypatch, fetch_mode):
+    # אירוע אחד עם שוק נזיל ושוק דליל: רק הדליל נפסל, בשני מצבי ה-fetch
+    event = {"id": "e1", "title": "Event", "markets": [market("liquid"), market("thin", liquidity=10)]}
+    monkeypatch.setattr(simple_scanner, "_fetch_markets_page", lambda offset, **kwargs: [])
+    monkeypatch.setattr(simple_scanner, "_fetch_events_page", lambda offset, **kwargs: [event] if offset == 0 else [])
+
+    opps = simple_scanner.scan_extreme_price_markets(
+        min_hours_until_close=1, low_price_threshold=THRESHOLD, fetch_mode=fetch_mode,
+        min_liquidity=100, verbose_rejections=False
+    )
+
+    assert conditions(opps) == ["liquid"]
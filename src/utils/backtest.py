@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Parameter-sweep backtester for BUY_PRICE_THRESHOLD / SELL_MULTIPLIER and friends.
+
+Step 1 builds a dataset from CLOB price history for every token in the
+recorded catalog (or --live). Step 2 scores a whole grid of
+(threshold, multiplier, min-hours-to-close, position-size) combinations
+with vectorized entry/exit logic, spread across a process pool.
+
+Grid values are comma lists or start:stop:step ranges (stop inclusive).
+
+Examples:
+    python src/utils/backtest.py fetch --out logs/backtest.npz
+    python src/utils/backtest.py sweep logs/backtest.npz \\
+        --thresholds 0.001:0.01:0.0005 --multipliers 1.5:5:0.25 \\
+        --min-hours 0,1,6,24 --sizes 1,2,5,10 --workers 8 --csv sweep.csv
+"""
+import argparse
+import csv
+import logging
+import os
+import sys
+from pathlib import Path
+
+# Add parent package to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from polymarket_bot.backtest import build_dataset, catalog_tokens, fetch_histories, run_sweep, save_dataset
+from polymarket_bot.catalog_snapshot import load_raw_catalog
+
+COLUMNS = ["threshold", "multiplier", "min_hours", "position_size", "trades", "exits", "invested", "pnl", "roi", "win_rate"]
+
+
+def parse_grid(text: str) -> list:
+    """'0.001,0.002' or '0.001:0.01:0.0005' (inclusive) -> list of floats."""
+    if ":" in text:
+        start, stop, step = (float(part) for part in text.split(":"))
+        count = int(round((stop - start) / step)) + 1
+        return [round(start + i * step, 10) for i in range(count)]
+    return [float(part) for part in text.split(",") if part]
+
+
+def cmd_fetch(args):
+    if args.live:
+        from utils.inspect_catalog import fetch_live_catalog
+        markets = fetch_live_catalog()
+    else:
+        markets = load_raw_catalog()
+    if not markets:
+        print("[ERROR] No recorded catalog found. Run the bot once, or use --live.", file=sys.stderr)
+        sys.exit(1)
+
+    tokens = catalog_tokens(markets)
+    token_ids = list(tokens)[:args.max_tokens] if args.max_tokens else list(tokens)
+    print(f"[INFO] Fetching price history for {len(token_ids)} tokens...", file=sys.stderr)
+    histories = fetch_histories(token_ids, fidelity=args.fidelity, threads=args.threads)
+    if not histories:
+        print("[ERROR] No price history returned.", file=sys.stderr)
+        sys.exit(1)
+
+    dataset = build_dataset(histories, tokens, step=args.fidelity * 60)
+    save_dataset(args.out, dataset)
+    tokens_n, steps = dataset["prices"].shape
+    print(f"[SUMMARY] {tokens_n} tokens x {steps} steps -> {args.out}")
+
+
+def cmd_sweep(args):
+    grid = {
+        "thresholds": parse_grid(args.thresholds),
+        "multipliers": parse_grid(args.multipliers),
+        "min_hours": parse_grid(args.min_hours),
+        "sizes": parse_grid(args.sizes),
+    }
+    combos = 1
+    for values in grid.values():
+        combos *= len(values)
+    print(f"[INFO] Scoring {combos} parameter sets with {args.workers} workers...", file=sys.stderr)
+
+    results = run_sweep(args.dataset, grid["thresholds"], grid["multipliers"], grid["min_hours"], grid["sizes"],
+                        workers=args.workers)
+    results.sort(key=lambda row: row[args.sort], reverse=True)
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(results)
+        print(f"[INFO] Full results -> {args.csv}", file=sys.stderr)
+
+    print(f"{'threshold':>9} {'mult':>5} {'min_h':>5} {'size':>6} {'trades':>6} {'exits':>5} "
+          f"{'invested':>9} {'pnl':>9} {'roi':>7} {'win':>5}")
+    for row in results[:args.top]:
+        print(f"{row['threshold']:>9.4f} {row['multiplier']:>5.2f} {row['min_hours']:>5.0f} {row['position_size']:>6.2f} "
+              f"{row['trades']:>6} {row['exits']:>5} {row['invested']:>9.2f} {row['pnl']:>9.2f} "
+              f"{row['roi']:>7.2%} {row['win_rate']:>5.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest threshold/multiplier settings over CLOB price history")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("fetch", help="build a price-history dataset from the recorded catalog")
+    p.add_argument("--out", default="logs/backtest.npz")
+    p.add_argument("--live", action="store_true", help="fetch a fresh catalog first")
+    p.add_argument("--fidelity", type=int, default=60, help="minutes per price point")
+    p.add_argument("--threads", type=int, default=8)
+    p.add_argument("--max-tokens", type=int, default=0, help="limit the token count (0 = all)")
+    p.set_defaults(func=cmd_fetch)
+
+    p = sub.add_parser("sweep", help="score a parameter grid on a dataset")
+    p.add_argument("dataset")
+    p.add_argument("--thresholds", default="0.001:0.01:0.001")
+    p.add_argument("--multipliers", default="1.5:4:0.5")
+    p.add_argument("--min-hours", default="0,1,6,24")
+    p.add_argument("--sizes", default="1,5,10")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    p.add_argument("--sort", choices=["pnl", "roi", "win_rate", "trades"], default="pnl")
+    p.add_argument("--top", type=int, default=20)
+    p.add_argument("--csv", help="write all results to this CSV file")
+    p.set_defaults(func=cmd_sweep)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
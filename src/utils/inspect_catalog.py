@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Inspection CLI for the Polymarket catalog.
+
+Answers questions from the catalog the bot already recorded locally
+(RECORD_RAW_CATALOG=true, into CATALOG_DIR, default logs/catalog) instead of
+hitting the API every run.
+Use --live to fetch a fresh catalog (it is recorded for the next run too).
+
+Recordings from a sharded scan keep only the fields the scanner needs; `raw` and `why` say so when reading one.
+
+Examples:
+    python src/utils/inspect_catalog.py below 0.004
+    python src/utils/inspect_catalog.py ladders --min-markets 3
+    python src/utils/inspect_catalog.py raw 0xabc...
+    python src/utils/inspect_catalog.py why 0xabc... --threshold 0.004 --min-hours 1
+    python src/utils/inspect_catalog.py --live below 0.01
+"""
+import argparse
+import json
+import math
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+# Add parent package to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from polymarket_bot.catalog_snapshot import (
+    CatalogSnapshot, load_raw_catalog, load_raw_catalog_info, record_raw_catalog, publish_snapshot, parse_json_list
+)
+from polymarket_bot.simple_scanner import (
+    explain_market, _fetch_markets_page, _fetch_events_page, PAGE_LIMIT, MAX_MARKETS, MAX_EVENTS_OFFSET
+)
+
+
+def fetch_live_catalog():
+    """Fresh fetch of /markets + /events (same paging as the scanner)."""
+    markets = []
+    by_condition = {}
+    for offset in range(0, MAX_MARKETS, PAGE_LIMIT):
+        batch = _fetch_markets_page(offset)
+        for m in batch:
+            if m.get("conditionId") not in by_condition:
+                by_condition[m.get("conditionId")] = m
+                markets.append(m)
+        if len(batch) < PAGE_LIMIT:
+            break
+    for offset in range(0, MAX_EVENTS_OFFSET, PAGE_LIMIT):
+        batch = _fetch_events_page(offset)
+        for event in batch:
+            for m in event.get("markets", []):
+                existing = by_condition.get(m.get("conditionId"))
+                if existing is None:
+                    by_condition[m.get("conditionId")] = m
+                    markets.append(m)
+                else:
+                    existing.setdefault("_event_id", m.get("_event_id"))
+                    existing.setdefault("_event_title", m.get("_event_title"))
+        if len(batch) < PAGE_LIMIT:
+            break
+    record_raw_catalog(markets)
+    publish_snapshot(markets)
+    return markets
+
+
+def load_catalog(live: bool):
+    if live:
+        print("[INFO] Fetching live catalog...", file=sys.stderr)
+        return fetch_live_catalog()
+    markets = load_raw_catalog()
+    if markets is None:
+        print("[ERROR] No recorded catalog found. Run the bot once with RECORD_RAW_CATALOG=true, "
+              "or use --live.", file=sys.stderr)
+        sys.exit(1)
+    return markets
+
+
+def cmd_below(args):
+    """Outcomes priced at or below a threshold."""
+    rows = []
+    snapshot = None if args.live else CatalogSnapshot.open_latest()
+    if snapshot is not None:
+        # fast path: scan the mmap'd price columns without decoding anything else
+        with snapshot:
+            print(f"[INFO] snapshot age: {snapshot.age_seconds():.0f}s", file=sys.stderr)
+            yes, no = snapshot.columns["yes_price"], snapshot.columns["no_price"]
+            for i in range(len(snapshot)):
+                for side, price in (("YES", yes[i]), ("NO", no[i])):
+                    if not math.isnan(price) and 0 < price <= args.price:
+                        row = snapshot.row(i)
+                        rows.append((price, side, row["question"], row["condition_id"], row["end_ts"]))
+    else:
+        for m in load_catalog(args.live):
+            prices = parse_json_list(m.get("outcomePrices"))
+            for side, price in zip(("YES", "NO"), prices):
+                try:
+                    price = float(price)
+                except (TypeError, ValueError):
+                    continue
+                if 0 < price <= args.price:
+                    end = m.get("endDate") or ""
+                    try:
+                        end_ts = datetime.fromisoformat(end.replace("Z", "+00:00")).timestamp()
+                    except ValueError:
+                        end_ts = float("nan")
+                    rows.append((price, side, m.get("question", ""), m.get("conditionId"), end_ts))
+
+    rows.sort()
+    now = time.time()
+    for price, side, question, condition_id, end_ts in rows[:args.limit]:
+        hours = (end_ts - now) / 3600 if not math.isnan(end_ts) else float("nan")
+        print(f"${price:.4f}  {side:<3}  {hours:7.1f}h  {condition_id}  {question[:70]}")
+    print(f"\n[SUMMARY] {len(rows)} outcomes <= ${args.price}")
+
+
+def cmd_ladders(args):
+    """Events with several markets (threshold ladders like 'Bitcoin above X')."""
+    events = defaultdict(list)
+    for m in load_catalog(args.live):
+        if m.get("_event_id"):
+            events[(m["_event_id"], m.get("_event_title") or "")].append(m)
+    ladders = sorted(
+        ((key, markets) for key, markets in events.items() if len(markets) >= args.min_markets),
+        key=lambda item: -len(item[1])
+    )
+    for (event_id, title), markets in ladders[:args.limit]:
+        print(f"\n[Event {event_id}] {title} ({len(markets)} markets)")
+        for m in markets[:args.show]:
+            prices = parse_json_list(m.get("outcomePrices"))
+            print(f"    {m.get('question', '')[:70]}  prices={prices}")
+    print(f"\n[SUMMARY] {len(ladders)} events with >= {args.min_markets} markets")
+
+
+def trimmed_recording(args):
+    """Info of the local recording if its rows are trimmed (None for --live or full rows)."""
+    if args.live:
+        return None
+    info = load_raw_catalog_info()
+    return info if info and info.get("fields") else None
+
+
+def _find_market(args):
+    for m in load_catalog(args.live):
+        if m.get("conditionId") == args.condition_id:
+            return m
+    print(f"[ERROR] conditionId not found in catalog: {args.condition_id}", file=sys.stderr)
+    info = trimmed_recording(args)
+    if info and "server-side" in info.get("source", ""):
+        print(f"[NOTE] Recorded by a {info['source']}: markets Gamma filtered out never reached "
+              f"the bot. Retry with --live.", file=sys.stderr)
+    sys.exit(1)
+
+
+def cmd_raw(args):
+    """Raw JSON for one market."""
+    m = _find_market(args)
+    info = trimmed_recording(args)
+    if info:
+        print(f"[NOTE] Trimmed recording ({info['source']}): only {', '.join(info['fields'])} "
+              f"were kept. Use --live for the full JSON.", file=sys.stderr)
+    print(json.dumps(m, indent=2, ensure_ascii=False))
+
+
+def cmd_why(args):
+    """Why the scanner filters accepted/rejected a market."""
+    m = _find_market(args)
+    info = trimmed_recording(args)
+    if info:
+        print(f"[NOTE] Trimmed recording ({info['source']}): the verdict is rebuilt from "
+              f"{', '.join(info['fields'])} only.", file=sys.stderr)
+        if "server-side" in info["source"]:
+            print("[NOTE] Server-side filters ran before this row was recorded; the verdict "
+                  "covers only the client-side filters.", file=sys.stderr)
+    print(f"Market: {m.get('question')}")
+    print(f"  active={m.get('active')} closed={m.get('closed')} endDate={m.get('endDate')}")
+    print(f"  outcomePrices={m.get('outcomePrices')}")
+    verdict = explain_market(m, args.min_hours, args.threshold, args.focus_crypto,
+                             args.min_liquidity, args.min_volume)
+    print(f"Verdict: {verdict}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the locally recorded Polymarket catalog")
+    parser.add_argument("--live", action="store_true", help="fetch a fresh catalog from the API")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("below", help="outcomes priced at or below PRICE")
+    p.add_argument("price", type=float)
+    p.add_argument("--limit", type=int, default=50)
+    p.set_defaults(func=cmd_below)
+
+    p = sub.add_parser("ladders", help="events with multi-market ladders")
+    p.add_argument("--min-markets", type=int, default=2)
+    p.add_argument("--limit", type=int, default=20)
+    p.add_argument("--show", type=int, default=5, help="markets to print per event")
+    p.set_defaults(func=cmd_ladders)
+
+    p = sub.add_parser("raw", help="raw JSON for a conditionId")
+    p.add_argument("condition_id")
+    p.set_defaults(func=cmd_raw)
+
+    p = sub.add_parser("why", help="why the scanner filters rejected a conditionId")
+    p.add_argument("condition_id")
+    p.add_argument("--threshold", type=float, default=0.004)
+    p.add_argument("--min-hours", type=int, default=1)
+    p.add_argument("--focus-crypto", action="store_true")
+    p.add_argument("--min-liquidity", type=float, default=0)
+    p.add_argument("--min-volume", type=float, default=0)
+    p.set_defaults(func=cmd_why)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
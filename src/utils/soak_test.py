@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+Soak test: runs SimpleCryptoBot for many simulated hours against local stand-ins.
+
+- Gamma (/markets, /events) and CLOB (/books) are served by a local HTTP server
+  backed by a synthetic catalog that churns (markets close, new ones list) and
+  random-walks its prices.
+- Orders go to the simulated exchange (SIMULATED_EXCHANGE=true).
+- Time is accelerated by scaling every interval and rate by --accel, so
+  24 simulated hours take 24*3600/accel wall seconds.
+
+Every simulated hour it samples RSS, tracemalloc, gc object counts, the bot's
+long-lived collections (the simulated exchange's included) and scan cycle
+latency. After a warm-up it fails (exit code 1) if any of them grew beyond the
+configured bounds. Scan cycles that overlap an hourly sample are not timed.
+
+Examples:
+    python src/utils/soak_test.py                      # 24h at 600x (~2.5 minutes)
+    python src/utils/soak_test.py --hours 72 --accel 1200 --markets 3000
+    python src/utils/soak_test.py --max-rss-growth-mb 20 --report soak.json
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+# Add parent package to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Base (real-time) values of the intervals/rates that get scaled by --accel
+BASE_INTERVALS = {
+    "SCAN_INTERVAL": 300,
+    "EXIT_CHECK_INTERVAL": 30,
+    "SETTLE_INTERVAL": 600,
+    "RECONCILE_INTERVAL": 15,
+    "STALE_ORDER_MAX_AGE": 120,
+    "OPPORTUNITY_COOLDOWN": 3600,
+    "SIM_RETENTION": 3600,
+}
+BASE_SIM_FILL_RATE = 0.2
+# Floor for the scaled loop intervals (*_INTERVAL), in wall seconds. At 600x the 15s
+# reconcile and 30s exit loops would otherwise run back to back; on a small machine they
+# saturate the CPU and the scan cycle latency measures scheduling, not the scan.
+MIN_LOOP_INTERVAL = 0.25
+
+# the HTTP stand-ins run in-process; their allocations are not the bot's. The simulated
+# exchange is traced: it plays the CLOB for the whole run and must stay bounded too.
+STAND_IN_FILTERS = [
+    tracemalloc.Filter(False, "*soak_test.py"),
+    tracemalloc.Filter(False, "*http/server.py"),
+    tracemalloc.Filter(False, "*socketserver.py"),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+]
+
+
+class SyntheticCatalog:
+    """A Gamma-like catalog that lists/delists markets and moves prices with simulated time."""
+
+    def __init__(self, markets: int, churn_per_hour: float, cheap_fraction: float, seed: int):
+        self.size = markets
+        self.churn_per_hour = churn_per_hour
+        self.cheap_fraction = cheap_fraction
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.next_id = 0
+        self.sim_hours = 0.0
+        self.markets = [self._new_market() for _ in range(markets)]
+
+    def _new_market(self) -> dict:
+        self.next_id += 1
+        i = self.next_id
+        if self.rng.random() < self.cheap_fraction:
+            yes = self.rng.uniform(0.001, 0.006)
+        else:
+            yes = self.rng.uniform(0.05, 0.95)
+        end = datetime.now(timezone.utc) + timedelta(hours=self.rng.uniform(2, 500))
+        return {
+            "id": str(i),
+            "question": f"Synthetic market #{i}?",
+            "conditionId": f"0xcond{i:010d}",
+            "active": True,
+            "closed": False,
+            "endDate": end.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "yes_token": f"{i}1",
+            "no_token": f"{i}2",
+            "yes": yes,
+            "liquidityNum": self.rng.uniform(100, 50_000),
+            "volumeNum": self.rng.uniform(100, 500_000),
+        }
+
+    def advance(self, sim_hours: float) -> None:
+        with self.lock:
+            dt = sim_hours - self.sim_hours
+            if dt <= 0:
+                return
+            self.sim_hours = sim_hours
+            for m in self.markets:
+                m["yes"] = min(0.999, max(0.001, m["yes"] * (1 + self.rng.gauss(0, 0.3 * dt ** 0.5))))
+            replaced = int(self.size * self.churn_per_hour * dt + self.rng.random())
+            for _ in range(min(replaced, self.size)):
+                self.markets[self.rng.randrange(self.size)] = self._new_market()
+
+    @staticmethod
+    def to_gamma(m: dict) -> dict:
+        yes = round(m["yes"], 4)
+        return {
+            "question": m["question"],
+            "conditionId": m["conditionId"],
+            "active": m["active"],
+            "closed": m["closed"],
+            "endDate": m["endDate"],
+            "clobTokenIds": json.dumps([m["yes_token"], m["no_token"]]),
+            "outcomePrices": json.dumps([str(yes), str(round(1 - yes, 4))]),
+            "liquidityNum": m["liquidityNum"],
+            "volumeNum": m["volumeNum"],
+        }
+
+    def page(self, offset: int, limit: int) -> list:
+        with self.lock:
+            return [self.to_gamma(m) for m in self.markets[offset:offset + limit]]
+
+    def events_page(self, offset: int, limit: int) -> list:
+        """Events of 3 markets each, overlapping /markets (exercises the scanner's dedup)."""
+        with self.lock:
+            events = []
+            for start in range(offset * 3, min((offset + limit) * 3, len(self.markets)), 3):
+                chunk = self.markets[start:start + 3]
+                events.append({
+                    "id": f"ev{chunk[0]['id']}",
+                    "title": f"Synthetic event {chunk[0]['id']}",
+                    "markets": [self.to_gamma(m) for m in chunk],
+                })
+            return events
+
+    def books(self, token_ids: list) -> list:
+        with self.lock:
+            prices = {}
+            for m in self.markets:
+                prices[m["yes_token"]] = m["yes"]
+                prices[m["no_token"]] = 1 - m["yes"]
+        result = []
+        for token_id in token_ids:
+            price = prices.get(token_id)
+            if price is None:
+                continue
+            tick = 0.001 if price < 0.04 or price > 0.96 else 0.01
+            ask = round(max(price, 0.001), 3)
+            bid = round(ask - tick, 3)
+            result.append({
+                "asset_id": token_id,
+                "bids": [{"price": str(bid), "size": "1000"}] if bid > 0 else [],
+                "asks": [{"price": str(ask), "size": "1000"}],
+            })
+        return result
+
+
+def make_handler(catalog: SyntheticCatalog):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, payload) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            limit = int(query.get("limit", ["500"])[0])
+            offset = int(query.get("offset", ["0"])[0])
+            if url.path == "/markets":
+                self._send(catalog.page(offset, limit))
+            elif url.path == "/events":
+                self._send(catalog.events_page(offset, limit))
+            else:
+                self.send_error(404)
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/books":
+                self.send_error(404)
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"[]")
+            self._send(catalog.books([item.get("token_id") for item in request]))
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # fallback: peak RSS (KB on Linux, bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def collection_sizes(bot) -> dict:
+    sizes = {
+        "opportunity_stream": len(bot.opportunity_stream),
+        "opportunity_cooldowns": bot.opportunity_stream.cooling_down(),
+        "candidates_queue": bot.candidates.qsize(),
+        "orders_queue": bot.orders.qsize(),
+    }
+    if bot.trader is not None:
+        sizes["trader.open_positions"] = len(bot.trader.open_positions)
+    if bot.executor is None:  # still initializing alongside the first scan
+        return sizes
+    sizes["executor.open_positions"] = len(bot.executor.open_positions)
+    client = bot.executor.client
+    for name in ("orders", "closed_orders", "trades", "books"):  # books = the shared SimMarket's
+        if hasattr(client, name):
+            sizes[f"exchange.{name}"] = len(getattr(client, name))
+    if hasattr(client, "market"):
+        sizes["exchange.resting"] = sum(len(orders) for orders in client.market.resting.values())
+    return sizes
+
+
+def scaled(name: str, seconds: float, accel: float) -> float:
+    """Wall-clock value of a BASE_INTERVALS entry; loop intervals never go below MIN_LOOP_INTERVAL."""
+    value = seconds / accel
+    return max(value, MIN_LOOP_INTERVAL) if name.endswith("_INTERVAL") else value
+
+
+def growth_ratio(first: float, last: float) -> float:
+    return last / first if first else (float("inf") if last else 1.0)
+
+
+async def run_soak(args) -> dict:
+    # imported only now: config reads the environment prepared in main()
+    from polymarket_bot.simple_bot import SimpleCryptoBot
+
+    bot = SimpleCryptoBot()
+    cycle_times = []
+    samples = []
+    scan_cycle = bot._scan_cycle
+
+    async def timed_scan_cycle():
+        started, samples_before = time.perf_counter(), len(samples)
+        await scan_cycle()
+        # a cycle that spanned an hourly sample also waited for gc + tracemalloc (seconds)
+        if len(samples) == samples_before:
+            cycle_times.append(time.perf_counter() - started)
+
+    bot._scan_cycle = timed_scan_cycle
+
+    catalog = args.catalog
+    wall_per_hour = 3600 / args.accel
+    started = time.monotonic()
+    baseline_snapshot = None
+    task = asyncio.create_task(bot.start())
+
+    hour = 0
+    while hour < args.hours and not task.done():
+        await asyncio.sleep(wall_per_hour / 4)
+        sim_hours = (time.monotonic() - started) / wall_per_hour
+        catalog.advance(sim_hours)
+        if sim_hours < hour + 1:
+            continue
+        hour += 1
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot().filter_traces(STAND_IN_FILTERS)
+        recent = cycle_times[-int(3600 / BASE_INTERVALS["SCAN_INTERVAL"]):]
+        sample = {
+            "sim_hour": hour,
+            "rss_mb": round(rss_mb(), 2),
+            "heap_mb": round(sum(stat.size for stat in snapshot.statistics("filename")) / 1024 / 1024, 2),
+            "objects": len(gc.get_objects()),
+            "cycles": len(cycle_times),
+            "cycle_p50_ms": round(statistics.median(cycle_times) * 1000, 1) if cycle_times else None,
+            "recent_cycle_ms": round(statistics.median(recent) * 1000, 1) if cycle_times else None,
+            "collections": collection_sizes(bot),
+        }
+        samples.append(sample)
+        if hour == args.warmup_hours:
+            baseline_snapshot = snapshot
+        print(
+            f"[h{hour:>3}] rss={sample['rss_mb']:.1f}MB heap={sample['heap_mb']:.1f}MB "
+            f"objects={sample['objects']} cycle={sample['recent_cycle_ms']}ms "
+            f"stream={sample['collections']['opportunity_stream']} "
+            f"cooldowns={sample['collections']['opportunity_cooldowns']} "
+            f"positions={sample['collections'].get('trader.open_positions', 0)}",
+            flush=True
+        )
+
+    bot.stop()
+    try:
+        await asyncio.wait_for(task, timeout=30)
+    except asyncio.TimeoutError:
+        task.cancel()
+
+    top_growth = []
+    if baseline_snapshot is not None:
+        final_snapshot = tracemalloc.take_snapshot().filter_traces(STAND_IN_FILTERS)
+        for stat in final_snapshot.compare_to(baseline_snapshot, "lineno")[:10]:
+            top_growth.append(f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} +{stat.size_diff / 1024:.1f}KB")
+    return {"samples": samples, "cycle_times": cycle_times, "top_heap_growth": top_growth}
+
+
+def evaluate(result: dict, args) -> list:
+    """Compares the post-warm-up baseline with the last sample. Returns failure messages."""
+    samples = [s for s in result["samples"] if s["sim_hour"] >= args.warmup_hours]
+    if len(samples) < 2:
+        return ["not enough samples after warm-up (increase --hours or lower --warmup-hours)"]
+    first, last = samples[0], samples[-1]
+    failures = []
+
+    rss_growth = last["rss_mb"] - first["rss_mb"]
+    if rss_growth > args.max_rss_growth_mb:
+        failures.append(f"RSS grew {rss_growth:.1f}MB (> {args.max_rss_growth_mb}MB)")
+    heap_growth = last["heap_mb"] - first["heap_mb"]
+    if heap_growth > args.max_heap_growth_mb:
+        failures.append(f"traced heap grew {heap_growth:.1f}MB (> {args.max_heap_growth_mb}MB)")
+    objects = growth_ratio(first["objects"], last["objects"])
+    if objects > args.max_object_growth:
+        failures.append(f"gc object count grew x{objects:.2f} (> x{args.max_object_growth})")
+
+    cycles = result["cycle_times"]
+    if len(cycles) >= 8:
+        quarter = len(cycles) // 4
+        drift = growth_ratio(statistics.median(cycles[:quarter]), statistics.median(cycles[-quarter:]))
+        if drift > args.max_latency_drift:
+            failures.append(f"scan cycle latency drifted x{drift:.2f} (> x{args.max_latency_drift})")
+
+    for name, size in last["collections"].items():
+        before = first["collections"].get(name, 0)
+        if size > args.max_collection_size:
+            failures.append(f"{name} has {size} entries (> {args.max_collection_size})")
+        elif before >= 100 and growth_ratio(before, size) > args.max_collection_growth:
+            failures.append(f"{name} grew x{growth_ratio(before, size):.2f} ({before} -> {size})")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-running soak test for SimpleCryptoBot")
+    parser.add_argument("--hours", type=int, default=24, help="simulated hours to run")
+    parser.add_argument("--accel", type=float, default=600, help="simulated seconds per wall second")
+    parser.add_argument("--warmup-hours", type=int, default=2, help="hours excluded from the growth baseline")
+    parser.add_argument("--markets", type=int, default=1500, help="markets in the synthetic catalog")
+    parser.add_argument("--churn", type=float, default=0.05, help="fraction of markets replaced per hour")
+    parser.add_argument("--cheap-fraction", type=float, default=0.1, help="fraction of markets listed under $0.01")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-rss-growth-mb", type=float, default=64)
+    parser.add_argument("--max-heap-growth-mb", type=float, default=32)
+    parser.add_argument("--max-object-growth", type=float, default=1.5)
+    parser.add_argument("--max-latency-drift", type=float, default=2.0)
+    parser.add_argument("--max-collection-size", type=int, default=50_000)
+    parser.add_argument("--max-collection-growth", type=float, default=3.0)
+    parser.add_argument("--report", help="write the full report as JSON to this path")
+    parser.add_argument("--verbose", action="store_true", help="show the bot's own log output")
+    args = parser.parse_args()
+
+    args.catalog = SyntheticCatalog(args.markets, args.churn, args.cheap_fraction, args.seed)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.catalog))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    os.environ.update({
+        "SIMULATED_EXCHANGE": "true",
+        "GAMMA_API_URL": base_url,
+        "CLOB_URL": base_url,
+        "SIM_SEED": str(args.seed),
+        "SIM_FILL_RATE": str(BASE_SIM_FILL_RATE * args.accel),
+        "PUBLISH_CATALOG_SNAPSHOT": "false",
+        "RECORD_RAW_CATALOG": "false",
+    })
+    os.environ.update({name: str(scaled(name, seconds, args.accel)) for name, seconds in BASE_INTERVALS.items()})
+    os.environ.setdefault("BOT_LOG_DIR", tempfile.mkdtemp(prefix="soak-"))
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR)
+    if not args.verbose:
+        logging.getLogger("polymarket_bot").setLevel(logging.ERROR)
+
+    print(f"[INFO] soak: {args.hours}h at {args.accel:.0f}x (~{args.hours * 3600 / args.accel:.0f}s), "
+          f"{args.markets} markets, stand-ins at {base_url}")
+    tracemalloc.start()
+    try:
+        result = asyncio.run(run_soak(args))
+    finally:
+        server.shutdown()
+
+    failures = evaluate(result, args)
+    if result["top_heap_growth"]:
+        print("\n[HEAP] top growth since warm-up:")
+        for line in result["top_heap_growth"]:
+            print(f"    {line}")
+    if args.report:
+        report = {k: v for k, v in result.items() if k != "cycle_times"}
+        report["failures"] = failures
+        Path(args.report).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    if failures:
+        print("\n[FAIL]")
+        for failure in failures:
+            print(f"    {failure}")
+        sys.exit(1)
+    print("\n[PASS] no growth beyond bounds")
+
+
+if __name__ == "__main__":
+    main()